@@ -0,0 +1,39 @@
+"""
+python -m benchmarks [--backend memory] [--latency 0.001] [--save baselines/local.json] [--compare baselines/local.json]
+"""
+import argparse
+import sys
+
+from benchmarks import bench_items, bench_schema  # noqa, register benchmarks
+from benchmarks import runner
+from benchmarks.standin import Environment
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks')
+    parser.add_argument('names', nargs='*', help='names of benchmarks, e.g. schema.construct')
+    parser.add_argument('--group', action='append', help='run only group: schema, model, items, models')
+    parser.add_argument('--backend', choices=['moto', 'memory'], default='moto', help='stand-in of DynamoDB')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--save', help='save results as JSON')
+    parser.add_argument('--compare', help='compare with JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown, 0.2 is 20%%')
+    args = parser.parse_args(argv)
+
+    env = Environment(latency=args.latency, backend=args.backend).start()
+    try:
+        document = runner.run(env, groups=args.group, names=args.names, rounds=args.rounds)
+    finally:
+        env.stop()
+    if args.save:
+        runner.save(document, args.save)
+    if args.compare:
+        regressions = runner.compare(document, runner.load(args.compare), tolerance=args.tolerance)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
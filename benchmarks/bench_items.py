@@ -0,0 +1,74 @@
+"""Data-plane operations against the stand-in"""
+import itertools
+
+from dynamite import tables
+
+from benchmarks.bench_schema import BenchModel
+from benchmarks.runner import benchmark
+
+ITEMS = 200
+
+
+def get_table(env, name):
+    table = tables.Table(name, range_attr=['num', 'N'])
+    table.create()
+    return table
+
+
+def fill(table, count=ITEMS):
+    table.items.batch_write(puts=[{'id': u'hash', 'num': num, 'text': u'text {}'.format(num)}
+                                  for num in range(1, count + 1)])
+
+
+@benchmark('items')
+def put(env):
+    table = get_table(env, 'benchmark_put')
+    counter = itertools.count(1)
+    return lambda: table.items.put(item={'id': u'hash', 'num': next(counter), 'text': u'text'}), 1
+
+
+@benchmark('items')
+def get(env):
+    table = get_table(env, 'benchmark_get')
+    fill(table, 10)
+    return lambda: table.items.get(item={'id': u'hash', 'num': 5}), 1
+
+
+@benchmark('items')
+def scan(env):
+    table = get_table(env, 'benchmark_scan')
+    fill(table)
+    return lambda: list(table.items.scan()), ITEMS
+
+
+@benchmark('items')
+def query(env):
+    table = get_table(env, 'benchmark_query')
+    fill(table)
+    return lambda: list(table.items.objects.where(id=u'hash', num__between=(1, 100))), 100
+
+
+@benchmark('items')
+def batch_write(env):
+    table = get_table(env, 'benchmark_batch_write')
+    return lambda: fill(table, 100), 100
+
+
+@benchmark('items')
+def batch_get(env):
+    table = get_table(env, 'benchmark_batch_get')
+    fill(table, 100)
+    keys = [{'id': u'hash', 'num': num} for num in range(1, 101)]
+    return lambda: table.items.batch_get(keys), 100
+
+
+@benchmark('models')
+def scan_models(env):
+    BenchModel.bulk_save(BenchModel(owner=u'a', num=num, text=u'text', data={'a': num}, tags=[u'a'])
+                         for num in range(1, ITEMS + 1))
+    return lambda: list(BenchModel.scan()), ITEMS
+
+
+@benchmark('models')
+def scan_models_trusted(env):
+    return lambda: list(BenchModel.scan(validate=False)), ITEMS
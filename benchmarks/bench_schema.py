@@ -0,0 +1,143 @@
+"""Serialization, hydration, model construction and keys"""
+from decimal import Decimal
+
+from dynamite import fields, models
+from dynamite.schema import Schema
+
+from benchmarks.runner import benchmark
+
+
+class Nested(Schema):
+    name = fields.UnicodeField()
+    count = fields.IntField()
+
+
+class AllFields(Schema):
+    unicode = fields.UnicodeField()
+    boolean = fields.BooleanField()
+    dynamo_string = fields.DynamoStringField()
+    dynamo_number = fields.DynamoNumberField()
+    binary = fields.BinaryField()
+    pickle = fields.PickleField()
+    int = fields.IntField()
+    float = fields.FloatField()
+    decimal = fields.DecimalField()
+    long = fields.LongField()
+    dict = fields.DictField()
+    list = fields.ListField()
+    base64 = fields.Base64Field()
+    schema = fields.SchemaField(Nested)
+
+
+class Telemetry(Schema):
+    count = fields.IntField(min_value=0)
+    value = fields.FloatField(precision=3)
+    total = fields.DecimalField()
+
+
+class BenchModel(models.Model):
+    owner = fields.UnicodeField(hash_field=True)
+    num = fields.IntField(range_field=True)
+    text = fields.UnicodeField()
+    data = fields.DictField()
+    tags = fields.ListField()
+
+    @classmethod
+    def get_table_name(cls):
+        return 'benchmark_schema'
+
+
+def get_all_fields():
+    nested = Nested(name=u'nested', count=3)
+    return AllFields.to_python_cls({
+        'unicode': u'text',
+        'boolean': True,
+        'dynamo_string': u'string',
+        'dynamo_number': 10,
+        'binary': b'binary',
+        'pickle': AllFields.pickle.to_db({'pickled': [1, 2, 3]}),
+        'int': 1,
+        'float': 1.5,
+        'decimal': Decimal('1.25'),
+        'long': 2 ** 40,
+        'dict': {'a': 1, 'b': [1, 2]},
+        'list': [1, u'two', 3.0],
+        'base64': AllFields.base64.to_db(b'base64'),
+        'schema': nested.to_db(),
+    }, validate=False)
+
+
+@benchmark('schema')
+def to_db_all_fields(env):
+    instance = get_all_fields()
+    return instance.to_db, 1
+
+
+@benchmark('schema')
+def to_python_all_fields(env):
+    data = get_all_fields().to_db()
+    return lambda: AllFields.to_python_cls(data, validate=False), 1
+
+
+@benchmark('schema')
+def hydrate_numbers_page(env):
+    # numbers of boto3 items are Decimal
+    page = [{'count': Decimal(num), 'value': Decimal('{}.125'.format(num)), 'total': Decimal(num) / 8}
+            for num in range(1, 101)]
+    return lambda: Telemetry.from_db_many(page), len(page)
+
+
+@benchmark('schema')
+def to_python_validated(env):
+    data = BenchModel(owner=u'a', num=1, text=u'text', data={'a': 1}, tags=[u'a']).to_db()
+    return lambda: BenchModel.to_python_cls(data), 1
+
+
+@benchmark('schema')
+def to_python_trusted(env):
+    data = BenchModel(owner=u'a', num=1, text=u'text', data={'a': 1}, tags=[u'a']).to_db()
+    return lambda: BenchModel.to_python_cls(data, validate=False), 1
+
+
+@benchmark('model')
+def construct(env):
+    return lambda: BenchModel(owner=u'a', num=1, text=u'text', data={'a': 1}, tags=[u'a']), 1
+
+
+@benchmark('model')
+def attribute_access(env):
+    instance = BenchModel(owner=u'a', num=1, text=u'text')
+
+    def access():
+        return instance.owner, instance.num, instance.text, instance.data
+
+    return access, 4
+
+
+@benchmark('model')
+def generate_key(env):
+    instance = BenchModel(owner=u'a', num=1)
+    return instance.generate_key, 1
+
+
+def get_page(count=100):
+    return [BenchModel(owner=u'a', num=num, text=u'text', data={'a': num}, tags=[u'a']).to_db()
+            for num in range(1, count + 1)]
+
+
+@benchmark('model')
+def hydrate_page_by_item(env):
+    page = get_page()
+    return lambda: [BenchModel.to_python_cls(item) for item in page], len(page)
+
+
+@benchmark('model')
+def hydrate_page(env):
+    page = get_page()
+    return lambda: BenchModel.from_db_many(page), len(page)
+
+
+@benchmark('model')
+def rows_page(env):
+    page = get_page()
+    return lambda: BenchModel.rows_many(page, tuples=True), len(page)
@@ -0,0 +1,128 @@
+"""
+Minimal reproducible benchmark runner
+
+Benchmark is a function registered by @benchmark, it gets the environment and
+returns (callable, operations per call). Callable is timed in rounds,
+statistics are per operation.
+"""
+import gc
+import json
+import platform
+import sys
+import time
+
+try:
+    perf_counter = time.perf_counter
+except AttributeError:
+    perf_counter = time.time
+
+BENCHMARKS = []
+
+
+def benchmark(group):
+    def register(func):
+        BENCHMARKS.append((group, func))
+        return func
+    return register
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def measure(func, operations, rounds, min_time=0.05):
+    """
+    :return: dict of seconds per operation: min, median, mean and ops per second
+    """
+    # warm up and calibrate number of calls per round
+    started = perf_counter()
+    func()
+    elapsed = perf_counter() - started
+    calls = max(1, int(min_time / max(elapsed, 1e-9)))
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = perf_counter()
+            for _ in range(calls):
+                func()
+            timings.append((perf_counter() - started) / (calls * operations))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    result = {
+        'min': min(timings),
+        'median': median(timings),
+        'mean': sum(timings) / len(timings),
+        'rounds': rounds,
+        'calls': calls,
+        'operations': operations,
+    }
+    result['ops'] = 1.0 / result['median'] if result['median'] else 0.0
+    return result
+
+
+def run(env, groups=None, names=None, rounds=5, out=sys.stdout):
+    """
+    :param env: environment for benchmarks
+    :param groups: run only these groups
+    :param names: run only benchmarks with these names
+    :return: results document
+    """
+    results = {}
+    for group, func in BENCHMARKS:
+        name = '{}.{}'.format(group, func.__name__)
+        if groups and group not in groups:
+            continue
+        if names and func.__name__ not in names and name not in names:
+            continue
+        target, operations = func(env)
+        result = measure(target, operations, rounds)
+        results[name] = result
+        out.write('{:<45} {:>12.2f} us/op {:>12.0f} ops/s\n'.format(name, result['median'] * 1e6, result['ops']))
+    return {
+        'machine': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+        },
+        'options': env.options,
+        'results': results,
+    }
+
+
+def save(document, path):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(document, baseline, tolerance=0.2, out=sys.stdout):
+    """
+    Compare medians with baseline
+
+    :param tolerance: allowed slowdown, 0.2 is 20%
+    :return: names of regressed benchmarks
+    """
+    regressions = []
+    for name, result in sorted(document['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None or not base['median']:
+            continue
+        ratio = result['median'] / base['median']
+        mark = ''
+        if ratio > 1 + tolerance:
+            mark = ' REGRESSION'
+            regressions.append(name)
+        out.write('{:<45} {:>8.2f}x{}\n'.format(name, ratio, mark))
+    return regressions
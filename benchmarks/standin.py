@@ -0,0 +1,63 @@
+"""
+In-process stand-in of DynamoDB for benchmarks: moto or memory backend, with injected latency
+
+Latency is added before every call of every boto3 client created by Connection,
+or before every request of memory backend.
+"""
+import time
+
+from dynamite import connection
+from dynamite.config import dynamite_options
+from dynamite.memory import MemoryBackend
+
+
+class Environment(object):
+    def __init__(self, latency=0.0, backend='moto'):
+        """
+        :param latency: seconds added to every request
+        :param backend: moto or memory
+        """
+        self.latency = latency
+        self.backend = backend
+        self.options = {'latency': latency, 'backend': backend}
+        self._mock = None
+        self._get_resource = None
+
+    def _sleep(self, **kwargs):
+        time.sleep(self.latency)
+
+    def start(self):
+        if self.backend == 'memory':
+            connection.Connection().rebuild(backend=MemoryBackend(latency=self.latency))
+            return self
+        try:
+            from moto import mock_aws
+        except ImportError:
+            from moto import mock_dynamodb as mock_aws
+        self._mock = mock_aws()
+        self._mock.start()
+        dynamite_options.CONNECTION.pop('endpoint_url', None)
+        dynamite_options.CONNECTION.aws_access_key_id = 'benchmark'
+        dynamite_options.CONNECTION.aws_secret_access_key = 'benchmark'
+
+        environment = self
+        get_resource = connection.Connection.get_resource
+        self._get_resource = get_resource
+
+        def get_resource_with_latency(conn):
+            resource = get_resource(conn)
+            if environment.latency:
+                resource.meta.client.meta.events.register('before-call.dynamodb.*', environment._sleep)
+            return resource
+
+        connection.Connection.get_resource = get_resource_with_latency
+        connection.Connection().rebuild(endpoint_url=None)
+        return self
+
+    def stop(self):
+        if self.backend == 'memory':
+            connection.Connection().rebuild(backend=None)
+        if self._get_resource is not None:
+            connection.Connection.get_resource = self._get_resource
+        if self._mock is not None:
+            self._mock.stop()
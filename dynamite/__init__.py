@@ -0,0 +1 @@
+from dynamite.sessions import session  # noqa
@@ -0,0 +1,5 @@
+import sys
+
+from dynamite.cli import main
+
+sys.exit(main())
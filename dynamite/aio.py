@@ -0,0 +1,167 @@
+"""
+asyncio API, python 3.5+
+
+Blocking boto3 calls are offloaded to a thread pool, every thread of the pool
+has its own boto3 resource. Number of concurrent calls is bounded by semaphore
+of TableItems. Serialization is shared with Model and Schema.
+"""
+import asyncio
+import collections
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dynamite.config import dynamite_options
+from dynamite.items import TableItems
+from dynamite.models import Model
+
+if 'max_workers' not in dynamite_options.ASYNC:
+    dynamite_options.ASYNC.max_workers = 16
+if 'max_concurrency' not in dynamite_options.ASYNC:
+    dynamite_options.ASYNC.max_concurrency = 64
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=dynamite_options.ASYNC.max_workers)
+    return _executor
+
+
+class AsyncResults(object):
+    """Async iterator over pages of paginated results"""
+
+    def __init__(self, items, results, converter=None, page_converter=None):
+        """
+        :param converter: converter(item) for every item
+        :param page_converter: page_converter(items) for whole pages
+        """
+        self.items = items
+        self.results = results
+        self.converter = converter
+        self.page_converter = page_converter
+        self._pages = None
+        self._page = collections.deque()
+
+    @property
+    def last_evaluated_key(self):
+        return self.results.last_evaluated_key
+
+    async def next_page(self):
+        """
+        :return: next page or None when there are no more pages
+        """
+        if self._pages is None:
+            self._pages = self.results.pages()
+        page = await self.items.run(next, self._pages, None)
+        if page is not None and self.converter is not None:
+            page = [self.converter(item) for item in page]
+        if page is not None and self.page_converter is not None:
+            page = self.page_converter(page)
+        return page
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._page:
+            page = await self.next_page()
+            if page is None:
+                raise StopAsyncIteration
+            self._page.extend(page)
+        return self._page.popleft()
+
+
+class AsyncTableItems(TableItems):
+    def __init__(self, table=None, max_concurrency=None, **kwargs):
+        super(AsyncTableItems, self).__init__(table=table, **kwargs)
+        if max_concurrency is None:
+            max_concurrency = dynamite_options.ASYNC.max_concurrency
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, func, *args, **kwargs):
+        """Run blocking func on the executor"""
+        async with self.semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+    async def aget(self, item=None, hash_attr=None, range_attr=None, consistent_read=False):
+        return await self.run(self.get, item=item, hash_attr=hash_attr, range_attr=range_attr,
+                              consistent_read=consistent_read)
+
+    async def aput(self, item=None, hash_attr=None, range_attr=None, **options):
+        return await self.run(self.put, item=item, hash_attr=hash_attr, range_attr=range_attr, **options)
+
+    async def acreate(self, item=None, hash_attr=None, range_attr=None):
+        return await self.run(self.create, item=item, hash_attr=hash_attr, range_attr=range_attr)
+
+    async def aupdate(self, item=None, hash_attr=None, range_attr=None, **options):
+        return await self.run(self.update, item=item, hash_attr=hash_attr, range_attr=range_attr, **options)
+
+    async def adelete(self, item=None, hash_attr=None, range_attr=None):
+        return await self.run(self.delete, item=item, hash_attr=hash_attr, range_attr=range_attr)
+
+    async def abatch_get(self, keys, **options):
+        return await self.run(self.batch_get, keys, **options)
+
+    async def abatch_write(self, puts=None, deletes=None):
+        return await self.run(self.batch_write, puts=puts, deletes=deletes)
+
+    def ascan(self, **options):
+        return AsyncResults(self, self.scan(**options))
+
+    def aquery(self, **options):
+        return AsyncResults(self, self.query(**options))
+
+    def aall(self, **options):
+        return AsyncResults(self, self.all(**options))
+
+
+class AsyncModel(Model):
+    Items = AsyncTableItems
+    abstract = True
+
+    @classmethod
+    async def aget(cls, consistent_read=False, **key):
+        return cls.to_python_cls(await cls.items.aget(item=key, consistent_read=consistent_read))
+
+    @classmethod
+    async def aget_many(cls, keys, **options):
+        return await cls.items.run(cls.get_many, keys, **options)
+
+    @classmethod
+    async def adelete(cls, **key):
+        return await cls.items.adelete(item=key)
+
+    @classmethod
+    async def abulk_save(cls, instances):
+        return await cls.items.run(cls.bulk_save, instances)
+
+    async def asave(self):
+        return await self.items.run(self.save)
+
+    @classmethod
+    def ascan(cls, validate=True, **params):
+        page_converter = functools.partial(cls.from_db_many, validate=validate)
+        return AsyncResults(cls.items, cls.items.scan(**params), page_converter=page_converter)
+
+    @classmethod
+    def aquery(cls, validate=True, **params):
+        page_converter = functools.partial(cls.from_db_many, validate=validate)
+        return AsyncResults(cls.items, cls.items.query(**params), page_converter=page_converter)
+
+    @classmethod
+    def aall(cls, validate=True, **params):
+        page_converter = functools.partial(cls.from_db_many, validate=validate)
+        return AsyncResults(cls.items, cls.items.all(**params), page_converter=page_converter)
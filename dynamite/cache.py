@@ -0,0 +1,122 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from dynamite.config import dynamite_options
+
+if 'enabled' not in dynamite_options.CACHE:
+    dynamite_options.CACHE.enabled = False
+if 'max_size' not in dynamite_options.CACHE:
+    dynamite_options.CACHE.max_size = 10000
+if 'ttl' not in dynamite_options.CACHE:
+    dynamite_options.CACHE.ttl = 60
+
+
+class BaseCache(object):
+    """
+    Interface of item cache
+
+    Keys are tuples (table name, key items), values are items.
+    Shared backends (memcached, redis) have to serialize both.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """:return: item or None"""
+        raise NotImplementedError
+
+    def set(self, key, item):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        return 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self),
+        }
+
+
+class LRUCache(BaseCache):
+    """In-process thread-safe LRU cache with TTL"""
+
+    def __init__(self, max_size=None, ttl=None, clock=time.time):
+        """
+        :param max_size: max number of items
+        :param ttl: seconds
+        :param clock: for tests
+        """
+        super(LRUCache, self).__init__()
+        if max_size is None:
+            max_size = dynamite_options.CACHE.max_size
+        if ttl is None:
+            ttl = dynamite_options.CACHE.ttl
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                expires, item = value
+                if expires > self.clock():
+                    self._data[key] = value
+                    self.hits += 1
+                    # items are mutable, so cache has own copy
+                    return copy.deepcopy(item)
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def set(self, key, item):
+        value = (self.clock() + self.ttl, copy.deepcopy(item))
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def get_cache(cache=None):
+    """
+    :param cache: BaseCache, True for cache from dynamite_options.CACHE,
+        None for cache only if dynamite_options.CACHE.enabled
+    :return: BaseCache or None
+    """
+    if isinstance(cache, BaseCache):
+        return cache
+    if cache is None:
+        cache = dynamite_options.CACHE.enabled
+    if not cache:
+        return None
+    backend = dynamite_options.CACHE.get('backend') or LRUCache
+    return backend()
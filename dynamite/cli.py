@@ -0,0 +1,57 @@
+"""
+Command line interface
+
+    dynamite sync app.models other.models [--dry-run]
+"""
+import argparse
+import sys
+
+from dynamite import sync
+from dynamite.config import dynamite_options
+from dynamite.connection import Connection
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='dynamite', description='Dynamite ORM')
+    parser.add_argument('--endpoint-url', help='DynamoDB endpoint, e.g. http://localhost:8000')
+    parser.add_argument('--region-name', help='AWS region')
+    commands = parser.add_subparsers(dest='command')
+    sync_parser = commands.add_parser('sync', help='create and update tables of models')
+    sync_parser.add_argument('modules', nargs='+', help='modules with models')
+    sync_parser.add_argument('--dry-run', action='store_true', help='only print changes')
+    sync_parser.add_argument('--workers', type=int, default=sync.DEFAULT_MAX_WORKERS, help='concurrent tables')
+    return parser
+
+
+def format_action(action, value):
+    if value is None:
+        return action
+    return '{} {}'.format(action, value)
+
+
+def run_sync(args, out):
+    sys.path.insert(0, '')
+    sync.import_modules(args.modules)
+    plan = sync.sync(dry_run=args.dry_run, max_workers=args.workers)
+    for model, actions in plan:
+        description = ', '.join(format_action(action, value) for action, value in actions) or 'up to date'
+        out.write('{}: {}\n'.format(model.get_table_name(), description))
+    return 0
+
+
+def main(argv=None, out=sys.stdout):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help(out)
+        return 1
+    options = {}
+    if args.endpoint_url:
+        options['endpoint_url'] = args.endpoint_url
+    if args.region_name:
+        options['region_name'] = args.region_name
+    if options:
+        dynamite_options.CONNECTION.update(options)
+        Connection().rebuild(**options)
+    if args.command == 'sync':
+        return run_sync(args, out)
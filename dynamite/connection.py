@@ -1,32 +1,110 @@
+import importlib
+import os
+import threading
+
 import boto3
+import six
+from botocore.config import Config as ClientConfig
 from dynamite.config import dynamite_options
 from dynamite.patterns import Singleton
 
 if not dynamite_options.CONNECTION.region_name:
     dynamite_options.CONNECTION.region_name = 'us-east-1'
 
+# botocore config, shared by resources of all threads
+if 'max_pool_connections' not in dynamite_options.CLIENT_CONFIG:
+    dynamite_options.CLIENT_CONFIG.max_pool_connections = 50
+if 'tcp_keepalive' not in dynamite_options.CLIENT_CONFIG:
+    dynamite_options.CLIENT_CONFIG.tcp_keepalive = True
+# requests are retried by dynamite.retry, retries of botocore would multiply attempts
+if 'retries' not in dynamite_options.CLIENT_CONFIG:
+    dynamite_options.CLIENT_CONFIG.retries = {'max_attempts': 0}
+
+
+# names of backends for dynamite_options.CONNECTION.backend, boto3 by default
+BACKENDS = {
+    'boto3': 'dynamite.connection.Boto3Backend',
+    'memory': 'dynamite.memory.MemoryBackend',
+}
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class Boto3Backend(object):
+    """Resources of boto3, requests are sent to DynamoDB or to endpoint_url"""
+
+    def get_resource(self, config, client_config):
+        session = boto3.session.Session()
+        return session.resource('dynamodb', config=client_config, **config)
+
+
+def get_backend(backend=None):
+    """
+    :param backend: name from BACKENDS, object with get_resource(config, client_config) or None for boto3
+    :return: backend, one instance per name in the process
+    """
+    if backend is None:
+        backend = 'boto3'
+    if not isinstance(backend, six.string_types):
+        return backend
+    with _backends_lock:
+        if backend not in _backends:
+            if backend not in BACKENDS:
+                raise ValueError('Unknown backend {}'.format(backend))
+            module_name, class_name = BACKENDS[backend].rsplit('.', 1)
+            _backends[backend] = getattr(importlib.import_module(module_name), class_name)()
+        return _backends[backend]
+
+
 class Connection(Singleton):
+    """
+    Connection manager
 
-    _db = None
+    boto3 resources are not thread-safe and break after fork(),
+    so every thread of every process gets its own resource.
+    Attributes are routed to the resource of the current thread.
+    Resources are made by backend of `backend` option, see get_backend.
+    """
+
+    _local = None
+    _generation = 0
     config = None
+    client_config = None
 
     def __init__(self, **options):
         if self.config is None:
             self.config = {}
+            self._local = threading.local()
             self.update_config(**options)
-        if self._db is None:
-            self._db = self.get_resource()
 
     def update_config(self, **options):
         self.config.update(dynamite_options['CONNECTION'])
         self.config.update(options)
+        self.client_config = ClientConfig(**dynamite_options['CLIENT_CONFIG'].to_dict())
+        # resources of all threads are rebuilt on next access
+        self._generation += 1
 
     def get_resource(self):
-        return boto3.resource('dynamodb', **self.config)
+        config = dict(self.config)
+        backend = get_backend(config.pop('backend', None))
+        return backend.get_resource(config, self.client_config)
+
+    @property
+    def resource(self):
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'resource', None) is None or local.pid != pid or local.generation != self._generation:
+            local.resource = self.get_resource()
+            local.pid = pid
+            local.generation = self._generation
+        return local.resource
+
+    @property
+    def client(self):
+        return self.resource.meta.client
 
     def rebuild(self, **options):
         self.update_config(**options)
-        self._db = self.get_resource()
 
     def __getattr__(self, item):
-        return getattr(self._db, item)
+        return getattr(self.resource, item)
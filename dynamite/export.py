@@ -0,0 +1,234 @@
+"""
+Columnar export of scans: Arrow record batches, Parquet files and NumPy arrays
+
+    Model.scan(parallel=8).to_parquet('model.parquet', batch_size=100000)
+
+Pages of items are converted to columns by converter plan of model and cut into
+batches of bounded size, so export to Parquet does not hold the table in memory.
+Types of columns are taken from fields: numbers, booleans, strings and binary,
+decimals are exported as floats, maps, lists and schemas as JSON strings.
+pyarrow and numpy are optional and imported on use: pip install dynamite[arrow]
+"""
+import base64
+import json
+from decimal import Decimal
+
+import six
+from boto3.dynamodb.types import Binary
+
+from dynamite import defines, fields
+
+INT = 'int'
+FLOAT = 'float'
+BOOL = 'bool'
+STRING = 'string'
+BINARY = 'binary'
+JSON = 'json'
+
+DEFAULT_BATCH_SIZE = 65536
+
+DB_TYPE_KINDS = {
+    defines.NUMBER: FLOAT,
+    defines.STRING: STRING,
+    defines.BINARY: BINARY,
+    defines.BOOLEAN: BOOL,
+}
+
+
+def get_kind(field):
+    """:return: kind of column for field"""
+    if isinstance(field, (fields.FloatField, fields.DecimalField)):
+        return FLOAT
+    if isinstance(field, fields.DynamoNumberField):
+        return INT
+    if isinstance(field, fields.BooleanField):
+        return BOOL
+    if isinstance(field, (fields.BinaryField, fields.Base64Field, fields.PickleField)):
+        return BINARY
+    if isinstance(field, fields.UnicodeField):
+        return STRING
+    if isinstance(field, (fields.DictField, fields.ListField, fields.SchemaField)):
+        return JSON
+    return DB_TYPE_KINDS.get(field.db_type, JSON)
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('pyarrow is required for export to Arrow and Parquet: pip install dynamite[arrow]')
+    return pyarrow
+
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required for export to NumPy: pip install dynamite[arrow]')
+    return numpy
+
+
+def json_default(value):
+    if isinstance(value, Decimal):
+        if value == value.to_integral_value():
+            return int(value)
+        return float(value)
+    if isinstance(value, set):
+        return sorted(value, key=repr)
+    if isinstance(value, Binary):
+        value = value.value
+    if isinstance(value, six.binary_type):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError('Type {} is not JSON serializable'.format(type(value)))
+
+
+class ColumnExport(object):
+    """Columns of model fields from pages of db items"""
+
+    def __init__(self, model, names=None):
+        """
+        :param model: Schema or Model class
+        :param names: names of fields, all fields by default
+        """
+        self.model = model
+        self.plan = model._get_plan()
+        self.names = list(names or self.plan.names)
+        self.fields = {name: self.plan.fields[name] for name in self.names}
+        self.kinds = {name: get_kind(field) for name, field in self.fields.items()}
+
+    def prepare(self, name, value):
+        """:return: python value of field as value of column"""
+        if value is None:
+            return None
+        kind = self.kinds[name]
+        if kind == INT:
+            return int(value)
+        if kind == FLOAT:
+            return float(value)
+        if kind == BOOL:
+            return bool(value)
+        if kind == STRING:
+            if isinstance(value, six.binary_type):
+                return value.decode('utf-8')
+            return six.text_type(value)
+        if kind == BINARY:
+            if isinstance(value, Binary):
+                return value.value
+            if not isinstance(value, six.binary_type):
+                return self.fields[name].to_db(value)
+            return value
+        if isinstance(value, fields.Schema):
+            value = value.to_db()
+        return json.dumps(value, default=json_default, sort_keys=True)
+
+    def get_columns(self, items):
+        """:return: {name: list of values of column}"""
+        columns = self.plan.get_columns(items, set(self.names))
+        prepare = self.prepare
+        return {name: [prepare(name, value) for value in columns[name]] for name in self.names}
+
+    def iter_columns(self, pages, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        :param pages: iterable of pages of db items
+        :return: iterator of {name: list of values}, at most batch_size rows in every batch
+        """
+        buffer = {name: [] for name in self.names}
+        count = 0
+        for page in pages:
+            if not page:
+                continue
+            columns = self.get_columns(page)
+            for name in self.names:
+                buffer[name].extend(columns[name])
+            count += len(page)
+            while count >= batch_size:
+                yield {name: values[:batch_size] for name, values in buffer.items()}
+                buffer = {name: values[batch_size:] for name, values in buffer.items()}
+                count -= batch_size
+        if count:
+            yield buffer
+
+    def get_arrow_schema(self):
+        pa = import_pyarrow()
+        types = {
+            INT: pa.int64(),
+            FLOAT: pa.float64(),
+            BOOL: pa.bool_(),
+            STRING: pa.string(),
+            BINARY: pa.binary(),
+            JSON: pa.string(),
+        }
+        return pa.schema([pa.field(name, types[self.kinds[name]]) for name in self.names])
+
+    def iter_record_batches(self, pages, batch_size=DEFAULT_BATCH_SIZE):
+        """:return: iterator of pyarrow.RecordBatch"""
+        pa = import_pyarrow()
+        schema = self.get_arrow_schema()
+        for columns in self.iter_columns(pages, batch_size=batch_size):
+            arrays = [pa.array(columns[field.name], type=field.type) for field in schema]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def to_arrow(self, pages, batch_size=DEFAULT_BATCH_SIZE):
+        """:return: pyarrow.Table, whole export in memory"""
+        pa = import_pyarrow()
+        return pa.Table.from_batches(list(self.iter_record_batches(pages, batch_size=batch_size)),
+                                     schema=self.get_arrow_schema())
+
+    def to_parquet(self, pages, path, batch_size=DEFAULT_BATCH_SIZE, **options):
+        """
+        Write batches to Parquet file one by one
+
+        :param path: path or file object
+        :param options: for pyarrow.parquet.ParquetWriter, e.g. compression
+        :return: count of rows
+        """
+        pa = import_pyarrow()
+        import pyarrow.parquet as pq
+
+        count = 0
+        writer = pq.ParquetWriter(path, self.get_arrow_schema(), **options)
+        try:
+            for batch in self.iter_record_batches(pages, batch_size=batch_size):
+                writer.write_table(pa.Table.from_batches([batch]))
+                count += batch.num_rows
+        finally:
+            writer.close()
+        return count
+
+    def to_numpy(self, pages, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Numbers without missing values are int64, with missing values float64 with nan,
+        booleans are bool, other columns are object arrays
+
+        :return: {name: numpy.ndarray}, whole export in memory
+        """
+        np = import_numpy()
+        chunks = {name: [] for name in self.names}
+        for columns in self.iter_columns(pages, batch_size=batch_size):
+            for name in self.names:
+                chunks[name].append(self.get_array(np, name, columns[name]))
+        arrays = {}
+        for name in self.names:
+            if not chunks[name]:
+                arrays[name] = np.array([], dtype=object)
+            elif len(set(chunk.dtype for chunk in chunks[name])) > 1:
+                arrays[name] = np.concatenate([chunk.astype(self.get_common_dtype(np, name)) for chunk in chunks[name]])
+            else:
+                arrays[name] = np.concatenate(chunks[name])
+        return arrays
+
+    def get_common_dtype(self, np, name):
+        return np.float64 if self.kinds[name] in (INT, FLOAT) else object
+
+    def get_array(self, np, name, values):
+        kind = self.kinds[name]
+        missing = any(value is None for value in values)
+        if kind in (INT, FLOAT):
+            if kind == INT and not missing:
+                return np.array(values, dtype=np.int64)
+            return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        if kind == BOOL and not missing:
+            return np.array(values, dtype=bool)
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
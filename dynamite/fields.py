@@ -1,4 +1,6 @@
 import base64
+import math
+from decimal import Decimal
 
 try:
     import cPickle as pickle
@@ -14,6 +16,8 @@ class BaseField(object):
     default = None
     python_type = None
     db_type = None
+    # value can be changed in place, so it is dirty after read
+    mutable = False
 
     def __init__(self, default=None, range_field=False, hash_field=False, db_type=None, name=None):
         if default is None and self.python_type is not None:
@@ -34,6 +38,11 @@ class BaseField(object):
     def to_python(self, value):
         return value
 
+    def to_python_many(self, values):
+        """Convert column of db values of a page, None stays None"""
+        to_python = self.to_python
+        return [None if value is None else to_python(value) for value in values]
+
     def to_db(self, value):
         return value
 
@@ -46,6 +55,11 @@ class SchemaValidationError(ValueError):
         return self.message
 
 
+class SchemaRangeError(SchemaValidationError):
+    def __init__(self, value, min_value=None, max_value=None):
+        self.message = 'Value {} is out of range [{}, {}]'.format(value, min_value, max_value)
+
+
 class UnicodeField(BaseField):
     python_type = six.text_type
     db_type = defines.STRING
@@ -73,12 +87,19 @@ class DynamoStringField(UnicodeField):
 
 
 class DynamoNumberField(BaseField):
+    """
+    Number of DynamoDB, boto3 returns numbers as Decimal
+
+    Values are validated by type, without string round trips, bool is not a number
+    """
     python_type = int
     db_type = defines.NUMBER
+    number_types = six.integer_types + (Decimal,)
 
     def validate(self, value):
-        str_value = str(value)
-        if not str_value.isdigit():
+        if isinstance(value, bool) or not isinstance(value, self.number_types):
+            raise SchemaValidationError(value, self.python_type)
+        if isinstance(value, Decimal) and value != value.to_integral_value():
             raise SchemaValidationError(value, self.python_type)
 
     def to_python(self, value):
@@ -86,6 +107,10 @@ class DynamoNumberField(BaseField):
             value = self.python_type(value)
         return value
 
+    def to_python_many(self, values):
+        python_type = self.python_type
+        return [value if value is None or type(value) is python_type else python_type(value) for value in values]
+
 
 class BinaryField(BaseField):
     python_type = six.binary_type
@@ -112,6 +137,7 @@ StrField = BinaryField
 class PickleField(BaseField):
     db_type = defines.BINARY
     python_type = object
+    mutable = True
 
     def to_python(self, value):
         if hasattr(value, 'value'):
@@ -125,25 +151,95 @@ class PickleField(BaseField):
 
 
 class IntField(DynamoNumberField):
-    pass
+    def __init__(self, min_value=None, max_value=None, **kwargs):
+        """
+        :param min_value: inclusive lower bound, None for no bound
+        :param max_value: inclusive upper bound, None for no bound
+        """
+        self.min_value = min_value
+        self.max_value = max_value
+        super(IntField, self).__init__(**kwargs)
+
+    def validate(self, value):
+        super(IntField, self).validate(value)
+        if (self.min_value is not None and value < self.min_value) or \
+                (self.max_value is not None and value > self.max_value):
+            raise SchemaRangeError(value, self.min_value, self.max_value)
 
 
 class FloatField(DynamoNumberField):
+    """Floats are saved as Decimal of shortest repr, rounded to precision digits after point"""
     python_type = float
 
+    def __init__(self, precision=None, **kwargs):
+        """:param precision: digits after point, None for full precision of float"""
+        self.precision = precision
+        super(FloatField, self).__init__(**kwargs)
 
-class LongField(DynamoNumberField):
-    python_type = int
+    def validate(self, value):
+        if isinstance(value, bool) or not isinstance(value, self.number_types + (float,)):
+            raise SchemaValidationError(value, self.python_type)
+        if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+            raise SchemaValidationError(value, 'finite float')
+
+    def to_python(self, value):
+        value = float(value)
+        if self.precision is not None:
+            value = round(value, self.precision)
+        return value
+
+    def to_python_many(self, values):
+        if self.precision is None:
+            return [None if value is None else float(value) for value in values]
+        precision = self.precision
+        return [None if value is None else round(float(value), precision) for value in values]
+
+    def to_db(self, value):
+        if isinstance(value, Decimal):
+            return value
+        if isinstance(value, float):
+            if self.precision is not None:
+                value = round(value, self.precision)
+            return Decimal(repr(value))
+        return Decimal(value)
+
+
+class LongField(IntField):
+    pass
+
+
+class DecimalField(DynamoNumberField):
+    """Exact numbers: Decimal of boto3 is kept as is, floats are converted by shortest repr"""
+    python_type = Decimal
+
+    def validate(self, value):
+        if isinstance(value, bool) or not isinstance(value, self.number_types):
+            raise SchemaValidationError(value, self.python_type)
+        if isinstance(value, Decimal) and not value.is_finite():
+            raise SchemaValidationError(value, 'finite Decimal')
+
+    def to_python(self, value):
+        if isinstance(value, Decimal):
+            return value
+        if isinstance(value, float):
+            return Decimal(repr(value))
+        return Decimal(value)
+
+    def to_python_many(self, values):
+        to_python = self.to_python
+        return [value if value is None or type(value) is Decimal else to_python(value) for value in values]
 
 
 class DictField(BaseField):
     python_type = dict
     db_type = defines.MAP
+    mutable = True
 
 
 class ListField(BaseField):
     python_type = list
     db_type = defines.LIST
+    mutable = True
 
 
 class Base64Field(BaseField):
@@ -164,6 +260,7 @@ class Base64Field(BaseField):
 class SchemaField(BaseField):
     python_type = Schema
     db_type = defines.MAP
+    mutable = True
 
     def __init__(self, SchemaClass, **kwargs):
         self.python_type = SchemaClass
@@ -0,0 +1,133 @@
+import copy
+
+import six
+
+from dynamite import defines
+
+ALL = 'ALL'
+KEYS_ONLY = 'KEYS_ONLY'
+INCLUDE = 'INCLUDE'
+
+
+class BaseIndex(object):
+    """
+    Secondary index declaration
+
+    Attributes are names of fields or [name, type] like in Table,
+    types of names are taken from model fields on table generation.
+    """
+
+    def __init__(self, name, hash_attr=None, range_attr=None, projection=ALL, include=None):
+        """
+        :param name: IndexName
+        :param projection: ALL, KEYS_ONLY or INCLUDE
+        :param include: NonKeyAttributes for INCLUDE projection
+        """
+        self.name = name
+        self.hash_attr = hash_attr
+        self.range_attr = range_attr
+        if include:
+            projection = INCLUDE
+        self.projection = projection
+        self.include = list(include or [])
+
+    def bind(self, types):
+        """
+        :param types: {name: db type}
+        :return: copy of index with typed attributes
+        """
+        index = copy.copy(self)
+        index.hash_attr = self._get_typed_attr(self.hash_attr, types)
+        index.range_attr = self._get_typed_attr(self.range_attr, types)
+        return index
+
+    def _get_typed_attr(self, attr, types):
+        if not attr or not isinstance(attr, six.string_types):
+            return attr
+        return [attr, types.get(attr, defines.STRING)]
+
+    def get_hash_name(self, table):
+        return self.hash_attr[0]
+
+    def get_range_name(self):
+        if self.range_attr:
+            return self.range_attr[0]
+
+    def get_key_names(self, table):
+        return [name for name in [self.get_hash_name(table), self.get_range_name()] if name]
+
+    def get_key_schema(self, table):
+        schema = [{'AttributeName': self.get_hash_name(table), 'KeyType': defines.HASH}]
+        if self.range_attr:
+            schema.append({'AttributeName': self.get_range_name(), 'KeyType': defines.RANGE})
+        return schema
+
+    def get_attribute_definitions(self):
+        return [{'AttributeName': attr[0], 'AttributeType': attr[1]}
+                for attr in [self.hash_attr, self.range_attr] if attr]
+
+    def get_projection(self):
+        projection = {'ProjectionType': self.projection}
+        if self.projection == INCLUDE:
+            projection['NonKeyAttributes'] = self.include
+        return projection
+
+    def get_schema(self, table):
+        """:return: index for CreateTable"""
+        return {
+            'IndexName': self.name,
+            'KeySchema': self.get_key_schema(table),
+            'Projection': self.get_projection(),
+        }
+
+    def match(self, table, eq_names, names):
+        """
+        :param eq_names: names of attributes with equality condition
+        :param names: names of all attributes of key conditions
+        :return: True if the index can serve the conditions
+        """
+        hash_name = self.get_hash_name(table)
+        return hash_name in eq_names and set(names) <= set(self.get_key_names(table))
+
+
+class GlobalIndex(BaseIndex):
+    def __init__(self, name, hash_attr, range_attr=None, projection=ALL, include=None,
+                 read_capacity_units=5, write_capacity_units=5):
+        super(GlobalIndex, self).__init__(name, hash_attr=hash_attr, range_attr=range_attr,
+                                          projection=projection, include=include)
+        self.read_capacity_units = read_capacity_units
+        self.write_capacity_units = write_capacity_units
+
+    def get_schema(self, table):
+        schema = super(GlobalIndex, self).get_schema(table)
+        schema['ProvisionedThroughput'] = {
+            'ReadCapacityUnits': self.read_capacity_units,
+            'WriteCapacityUnits': self.write_capacity_units,
+        }
+        return schema
+
+
+class LocalIndex(BaseIndex):
+    """Index with hash key of table and other range key, created only with table"""
+
+    def __init__(self, name, range_attr, projection=ALL, include=None):
+        super(LocalIndex, self).__init__(name, range_attr=range_attr, projection=projection, include=include)
+
+    def get_hash_name(self, table):
+        return table.get_hash_name()
+
+
+def find_index(table, eq_names, names):
+    """
+    Index for key conditions, indexes with ALL projection are preferred
+
+    :return: None if conditions are served by table key or no index matches
+    """
+    table_names = set([table.get_hash_name(), table.get_range_name()])
+    if table.get_hash_name() in eq_names and set(names) <= table_names:
+        return None
+    matched = [index for index in table.indexes if index.match(table, eq_names, names)]
+    matched.sort(key=lambda index: index.projection != ALL)
+    if matched:
+        return matched[0]
+    return None
@@ -0,0 +1,285 @@
+"""
+Instrumentation of requests and serialization
+
+Listeners subscribed to the bus get an Event after every request of TableItems
+and every conversion of Schema. Without listeners nothing is measured.
+
+    collector = HistogramCollector()
+    instrumentation.subscribe(collector)
+    ...
+    collector.percentile('table', 'query', 0.99)
+"""
+import bisect
+import collections
+import socket
+import threading
+import time
+
+from dynamite.throttle import OPERATIONS, get_consumed_units
+
+REQUEST = 'request'
+SERIALIZATION = 'serialization'
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def subscribe(listener):
+    """:param listener: listener(event)"""
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def unsubscribe(listener):
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def is_enabled():
+    return bool(_listeners)
+
+
+def emit(event):
+    for listener in list(_listeners):
+        listener(event)
+
+
+class Event(object):
+    """
+    :ivar kind: REQUEST or SERIALIZATION
+    :ivar table: table name, or name of schema for serialization
+    :ivar operation: boto3 operation, e.g. query, or to_db/to_python
+    :ivar latency: seconds
+    :ivar items: count of items in response or converted items
+    :ivar bytes: size of response
+    :ivar consumed: consumed capacity units
+    :ivar retries: retries of request
+    :ivar error: error code or None
+    """
+
+    def __init__(self, kind, table, operation, latency=0.0, items=0, bytes=0, consumed=0.0, retries=0,
+                 error=None):
+        self.kind = kind
+        self.table = table
+        self.operation = operation
+        self.latency = latency
+        self.items = items
+        self.bytes = bytes
+        self.consumed = consumed
+        self.retries = retries
+        self.error = error
+
+    @property
+    def capacity_kind(self):
+        """:return: 'read', 'write' or None"""
+        return OPERATIONS.get(self.operation)
+
+    def __repr__(self):
+        return '<Event: {} {}.{} {:.6f}s>'.format(self.kind, self.table, self.operation, self.latency)
+
+
+def get_items_count(response):
+    if 'Items' in response:
+        return len(response['Items'])
+    if 'Item' in response:
+        return 1
+    if 'Responses' in response:
+        return sum(len(items) for items in response['Responses'].values())
+    return 0
+
+
+def get_response_bytes(response):
+    headers = response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+    return int(headers.get('content-length', 0))
+
+
+def request_event(table, operation, response=None, latency=0.0, retries=0, error=None):
+    event = Event(REQUEST, table, operation, latency=latency, retries=retries, error=error)
+    if response is not None:
+        event.items = get_items_count(response)
+        event.bytes = get_response_bytes(response)
+        event.consumed = get_consumed_units(response, table)
+    return event
+
+
+class measure_serialization(object):
+    """Context manager, emits SERIALIZATION event if instrumentation is enabled"""
+
+    def __init__(self, name, operation, items=1):
+        self.name = name
+        self.operation = operation
+        self.items = items
+        self.started = None
+
+    def __enter__(self):
+        if _listeners:
+            self.started = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.started is not None:
+            emit(Event(SERIALIZATION, self.name, self.operation, latency=time.time() - self.started,
+                       items=self.items))
+        return False
+
+
+class Histogram(object):
+    """Latency histogram with fixed exponential buckets"""
+
+    # seconds: 0.1ms .. ~100s
+    BOUNDS = tuple(0.0001 * 2 ** power for power in range(21))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        """:return: upper bound of bucket with q-th value"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for index, count in enumerate(self.counts):
+            total += count
+            if total >= rank and count:
+                if index < len(self.BOUNDS):
+                    return min(self.BOUNDS[index], self.max)
+                return self.max
+        return self.max
+
+
+class Stats(object):
+    """Totals of one (kind, table, operation)"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.items = 0
+        self.bytes = 0
+        self.consumed = 0.0
+        self.retries = 0
+        self.errors = collections.Counter()
+
+    def add(self, event):
+        self.latency.add(event.latency)
+        self.items += event.items
+        self.bytes += event.bytes
+        self.consumed += event.consumed
+        self.retries += event.retries
+        if event.error:
+            self.errors[event.error] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.latency.count,
+            'latency_sum': self.latency.sum,
+            'latency_max': self.latency.max,
+            'p50': self.latency.percentile(0.5),
+            'p99': self.latency.percentile(0.99),
+            'items': self.items,
+            'bytes': self.bytes,
+            'consumed': self.consumed,
+            'retries': self.retries,
+            'errors': dict(self.errors),
+        }
+
+
+class HistogramCollector(object):
+    """In-memory listener, aggregates events by kind, table and operation"""
+
+    def __init__(self):
+        self.stats = collections.defaultdict(Stats)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self.stats[(event.kind, event.table, event.operation)].add(event)
+
+    def get(self, table, operation, kind=REQUEST):
+        with self._lock:
+            return self.stats.get((kind, table, operation))
+
+    def percentile(self, table, operation, q, kind=REQUEST):
+        stats = self.get(table, operation, kind=kind)
+        if stats is None:
+            return 0.0
+        return stats.latency.percentile(q)
+
+    def snapshot(self):
+        """:return: {(kind, table, operation): dict of totals}"""
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in self.stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+
+class StatsdAdapter(object):
+    """Listener, sends events to StatsD over UDP: <prefix>.<kind>.<table>.<operation>.<metric>"""
+
+    def __init__(self, host='localhost', port=8125, prefix='dynamite', sock=None):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.sock = sock or socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def get_lines(self, event):
+        name = '.'.join([self.prefix, event.kind, event.table, event.operation])
+        lines = [
+            '{}.latency:{:.3f}|ms'.format(name, event.latency * 1000),
+            '{}.count:1|c'.format(name),
+        ]
+        for metric in ('items', 'bytes', 'consumed', 'retries'):
+            value = getattr(event, metric)
+            if value:
+                lines.append('{}.{}:{}|c'.format(name, metric, value))
+        if event.error:
+            lines.append('{}.errors.{}:1|c'.format(name, event.error))
+        return lines
+
+    def __call__(self, event):
+        try:
+            self.sock.sendto('\n'.join(self.get_lines(event)).encode('utf-8'), self.address)
+        except socket.error:
+            pass
+
+
+class PrometheusAdapter(object):
+    """Text exposition of HistogramCollector for Prometheus scraping"""
+
+    def __init__(self, collector, prefix='dynamite'):
+        self.collector = collector
+        self.prefix = prefix
+
+    def render(self):
+        with self.collector._lock:
+            stats = sorted(self.collector.stats.items())
+        name = '{}_latency_seconds'.format(self.prefix)
+        lines = ['# TYPE {} histogram'.format(name)]
+        for key, totals in stats:
+            labels = self.get_labels(key)
+            cumulative = 0
+            for bound, count in zip(Histogram.BOUNDS, totals.latency.counts):
+                cumulative += count
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, cumulative))
+            lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, totals.latency.count))
+            lines.append('{}_sum{{{}}} {}'.format(name, labels, totals.latency.sum))
+            lines.append('{}_count{{{}}} {}'.format(name, labels, totals.latency.count))
+        for metric in ('items', 'bytes', 'consumed', 'retries'):
+            name = '{}_{}_total'.format(self.prefix, metric)
+            lines.append('# TYPE {} counter'.format(name))
+            for key, totals in stats:
+                lines.append('{}{{{}}} {}'.format(name, self.get_labels(key), getattr(totals, metric)))
+        return '\n'.join(lines) + '\n'
+
+    def get_labels(self, key):
+        return 'kind="{}",table="{}",operation="{}"'.format(*key)
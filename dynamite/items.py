@@ -1,7 +1,152 @@
+import functools
+import time
+from collections import OrderedDict
+
+from botocore import exceptions as boto_exceptions
+from dynamite import instrumentation
+from dynamite.pagination import Paginator
+from dynamite.parallel import ParallelScan, thread_map
+from dynamite.query import Query
+from dynamite.retry import get_retry_policy
+from dynamite.throttle import OPERATIONS, get_limiter
+from dynamite.utils import backoff_delay
+
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+TRANSACT_WRITE_SIZE = 100
+SERVICE_OPERATIONS = frozenset(['batch_get_item', 'batch_write_item'])
+CLIENT_OPERATIONS = frozenset(['transact_write_items'])
+
+
+def build_update_expression(set_attrs=None, remove_attrs=None):
+    """
+    :param set_attrs: dict of new values
+    :param remove_attrs: list of names
+    :return: UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues
+    """
+    names = {}
+    values = {}
+    actions = []
+    if set_attrs:
+        expressions = []
+        for index, name in enumerate(sorted(set_attrs)):
+            names['#s{}'.format(index)] = name
+            values[':s{}'.format(index)] = set_attrs[name]
+            expressions.append('#s{0} = :s{0}'.format(index))
+        actions.append('SET ' + ', '.join(expressions))
+    if remove_attrs:
+        expressions = []
+        for index, name in enumerate(sorted(remove_attrs)):
+            names['#r{}'.format(index)] = name
+            expressions.append('#r{}'.format(index))
+        actions.append('REMOVE ' + ', '.join(expressions))
+    return ' '.join(actions), names, values
+
+
 class TableItems(object):
-    def __init__(self, table=None, max_recursion_create=5):
+    def __init__(self, table=None, max_recursion_create=5, max_batch_retries=10, cache=None, throttle=None,
+                 retry=None):
+        """
+        :param cache: read-through cache of get, dynamite.cache.BaseCache
+        :param throttle: rate limiter of requests, see dynamite.throttle.get_limiter
+        :param retry: retry policy of requests, see dynamite.retry.get_retry_policy
+        """
         self.table = table
         self.max_recursion_create = max_recursion_create
+        self.max_batch_retries = max_batch_retries
+        self.cache = cache
+        self.throttle = throttle
+        self.retry = get_retry_policy(retry)
+        self._limiter = None
+        self._limiter_resolved = False
+
+    @property
+    def limiter(self):
+        """Limiter is resolved on first request, by capacity of described table"""
+        if not self._limiter_resolved:
+            self._limiter = get_limiter(self.table, self.throttle)
+            self._limiter_resolved = True
+        return self._limiter
+
+    @limiter.setter
+    def limiter(self, limiter):
+        self._limiter = limiter
+        self._limiter_resolved = True
+
+    def _get_cache_key(self, key):
+        return self.table.name, self._get_key_id(key)
+
+    def _invalidate(self, key):
+        if self.cache is not None:
+            self.cache.delete(self._get_cache_key(key))
+
+    def _request(self, operation, **params):
+        """
+        Call boto3 method of the current thread, e.g. put_item
+
+        Batch operations are called on resource, transactions on client of resource
+        (values are serialized by boto3 as for table), others on table.
+        Retryable errors are retried by retry policy.
+        """
+        if instrumentation.is_enabled():
+            return self._request_instrumented(operation, params)
+        if self.retry is None:
+            return self._request_once(operation, params)
+        return self.retry.call(operation, self._request_once, operation, params)
+
+    def _request_instrumented(self, operation, params):
+        """Request with event of instrumentation, consumed capacity is requested for it"""
+        if operation in OPERATIONS:
+            params = dict(params)
+            params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        attempts = []
+
+        def request_once(operation, params):
+            attempts.append(operation)
+            return self._request_once(operation, params)
+
+        started = time.time()
+        try:
+            if self.retry is None:
+                response = request_once(operation, params)
+            else:
+                response = self.retry.call(operation, request_once, operation, params)
+        except boto_exceptions.ClientError as e:
+            instrumentation.emit(instrumentation.request_event(
+                self.table.name, operation, latency=time.time() - started, retries=len(attempts) - 1,
+                error=e.response.get('Error', {}).get('Code')))
+            raise e
+        instrumentation.emit(instrumentation.request_event(
+            self.table.name, operation, response=response, latency=time.time() - started,
+            retries=len(attempts) - 1))
+        return response
+
+    def _request_once(self, operation, params):
+        if operation in SERVICE_OPERATIONS:
+            method = getattr(self.table.connection, operation)
+        elif operation in CLIENT_OPERATIONS:
+            method = getattr(self.table.connection.client, operation)
+        else:
+            method = getattr(self.table.table, operation)
+        limiter = self.limiter
+        if limiter is None:
+            return self._call(method, params)
+        params = limiter.before(operation, params)
+        try:
+            response = self._call(method, params)
+        except boto_exceptions.ClientError as e:
+            limiter.error(operation, e.response['Error']['Code'])
+            raise e
+        limiter.after(operation, response, self.table.name)
+        return response
+
+    def _call(self, method, params):
+        try:
+            return method(**params)
+        except boto_exceptions.ClientError as e:
+            if e.response['Error']['Code'] != u'ResourceNotFoundException' or not self.table.ensure_created():
+                raise e
+        return method(**params)
 
     def generate_key(self, item=None, hash_attr=None, range_attr=None):
         key = {}
@@ -44,70 +189,317 @@ class TableItems(object):
         key = self.generate_key(item=item, hash_attr=hash_attr, range_attr=range_attr)
 
         options.update({'Key': key})
-        response = self.table.update_item(**options)
+        response = self._request('update_item', **options)
+        self._invalidate(key)
         result = response['ResponseMetadata']['HTTPStatusCode'] == 200
         return result
 
+    def update_attrs(self, item=None, hash_attr=None, range_attr=None, set_attrs=None, remove_attrs=None, **options):
+        """
+        UpdateItem with generated SET/REMOVE expression
+
+        :param set_attrs: dict of new values
+        :param remove_attrs: list of names
+        """
+        expression, names, values = build_update_expression(set_attrs, remove_attrs)
+        if not expression:
+            return True
+        options.update({
+            'UpdateExpression': expression,
+            'ExpressionAttributeNames': names,
+        })
+        if values:
+            options['ExpressionAttributeValues'] = values
+        return self.update(item=item, hash_attr=hash_attr, range_attr=range_attr, **options)
+
     def delete(self, item=None, hash_attr=None, range_attr=None):
         key = self.generate_key(item=item, hash_attr=hash_attr, range_attr=range_attr)
 
-        response = self.table.delete_item(Key=key)
+        response = self._request('delete_item', Key=key)
+        self._invalidate(key)
         result = response['ResponseMetadata']['HTTPStatusCode'] == 200
         return result
 
-    def put(self, item=None, hash_attr=None, range_attr=None):
+    def put(self, item=None, hash_attr=None, range_attr=None, **options):
         key = self.generate_key(item=item, hash_attr=hash_attr, range_attr=range_attr)
         if item is None:
             item = {}
         item.update(key)
-        response = self.table.put_item(Item=item)
+        options.update({'Item': item})
+        response = self._request('put_item', **options)
+        self._invalidate(item)
         result = response['ResponseMetadata']['HTTPStatusCode'] == 200
         return result, item
 
-    def get(self, item=None, hash_attr=None, range_attr=None):
+    def get(self, item=None, hash_attr=None, range_attr=None, consistent_read=False):
+        """
+        :param consistent_read: strongly consistent read, bypasses cache
+        """
         key = self.generate_key(item=item, hash_attr=hash_attr, range_attr=range_attr)
-        response = self.table.get_item(
-            Key=key,
-        )
+        if self.cache is not None and not consistent_read:
+            item = self.cache.get(self._get_cache_key(key))
+            if item is not None:
+                return item
+        options = {'Key': key}
+        if consistent_read:
+            options['ConsistentRead'] = True
+        response = self._request('get_item', **options)
         item = response.get('Item', None)
+        if self.cache is not None and item is not None:
+            self.cache.set(self._get_cache_key(key), item)
         return item
 
-    def create(self, item=None, hash_attr=None, range_attr=None, _recurse_count=0):
-        if _recurse_count > self.max_recursion_create:
-            raise RuntimeError('Maximum tries for create...')
+    def create(self, item=None, hash_attr=None, range_attr=None):
+        """
+        Put item if key does not exist, in one request
+
+        On conflict key is regenerated by table.hash_generator
+        """
         key = self.generate_key(item=item, hash_attr=hash_attr, range_attr=range_attr)
         if item is None:
             item = {}
 
         item.update(key)
-        hash_attr = self.get_hash_from_item(item)
-        if not hash_attr:
-            hash_attr = self.table.hash_generator()
-            key.update(self.generate_key(hash_attr=hash_attr))
+        if not self.get_hash_from_item(item):
+            item.update(self.generate_key(hash_attr=self.table.hash_generator()))
 
-        item.update(key)
+        for _ in range(self.max_recursion_create + 1):
+            try:
+                return self.put(
+                    item=item,
+                    ConditionExpression='attribute_not_exists(#hash)',
+                    ExpressionAttributeNames={'#hash': self.table.get_hash_name()},
+                )
+            except boto_exceptions.ClientError as e:
+                if e.response['Error']['Code'] != u'ConditionalCheckFailedException':
+                    raise e
+            item.update(self.generate_key(hash_attr=self.table.hash_generator()))
+        raise RuntimeError('Maximum tries for create...')
+
+    def _iter_write_chunks(self, puts, deletes):
+        chunk = OrderedDict()
+        requests = []
+        if puts is not None:
+            requests.append(('PutRequest', 'Item', puts))
+        if deletes is not None:
+            requests.append(('DeleteRequest', 'Key', deletes))
+        for request_type, attr, items in requests:
+            for item in items:
+                key = self.get_key_from_item(item)
+                if request_type == 'DeleteRequest':
+                    item = key
+                key_id = tuple(sorted(key.items()))
+                # later request for the same key wins
+                chunk.pop(key_id, None)
+                chunk[key_id] = {request_type: {attr: item}}
+                if len(chunk) == BATCH_WRITE_SIZE:
+                    yield list(chunk.values())
+                    chunk = OrderedDict()
+        if chunk:
+            yield list(chunk.values())
+
+    def _write_chunk(self, requests):
+        stats = {
+            'items': len(requests),
+            'puts': len([request for request in requests if 'PutRequest' in request]),
+            'deletes': len([request for request in requests if 'DeleteRequest' in request]),
+            'attempts': 0,
+            'unprocessed': 0,
+        }
+        request_items = {self.table.name: requests}
+        while request_items:
+            if stats['attempts'] > self.max_batch_retries:
+                raise RuntimeError('Maximum tries for batch write...')
+            if stats['attempts']:
+                time.sleep(backoff_delay(stats['attempts']))
+            response = self._request('batch_write_item', RequestItems=request_items)
+            stats['attempts'] += 1
+            request_items = response.get('UnprocessedItems') or {}
+            stats['unprocessed'] += sum(len(value) for value in request_items.values())
+        if self.cache is not None:
+            for request in requests:
+                for request_type in request.values():
+                    self._invalidate(request_type.get('Item') or request_type.get('Key'))
+        return stats
+
+    def batch_write(self, puts=None, deletes=None):
+        """
+        Write items with BatchWriteItem, 25 items per request
 
-        if self.get(item=item) is None:
-            return self.put(item=item)
+        Items are read lazily from any iterables, so generators are fine.
+        UnprocessedItems are resubmitted with exponential backoff.
+
+        :param puts: items for PutRequest
+        :param deletes: items or keys for DeleteRequest
+        :return: list of stats for every chunk
+        """
+        return [self._write_chunk(chunk) for chunk in self._iter_write_chunks(puts, deletes)]
+
+    def _get_key_id(self, item):
+        return tuple(sorted(self.get_key_from_item(item).items()))
+
+    def _get_chunk(self, keys, projection=None, consistent_read=False):
+        table_name = self.table.name
+        request = {
+            'Keys': keys,
+            'ConsistentRead': consistent_read,
+        }
+        if projection:
+            names = list(projection) + [name for name in self.get_key_names() if name not in projection]
+            request['ProjectionExpression'] = ', '.join(['#p{}'.format(index) for index in range(len(names))])
+            request['ExpressionAttributeNames'] = {'#p{}'.format(index): name for index, name in enumerate(names)}
+        items = []
+        attempts = 0
+        request_items = {table_name: request}
+        while request_items:
+            if attempts > self.max_batch_retries:
+                raise RuntimeError('Maximum tries for batch get...')
+            if attempts:
+                time.sleep(backoff_delay(attempts))
+            response = self._request('batch_get_item', RequestItems=request_items)
+            attempts += 1
+            items.extend(response.get('Responses', {}).get(table_name, []))
+            request_items = response.get('UnprocessedKeys') or {}
+        return items
+
+    def batch_get(self, keys, projection=None, parallel=None, consistent_read=False):
+        """
+        Get items with BatchGetItem, 100 keys per request
+
+        UnprocessedKeys are requested again with exponential backoff.
+
+        :param keys: keys or items
+        :param projection: list of attribute names, key attributes are always added
+        :param parallel: threads count for concurrent requests
+        :param consistent_read: ConsistentRead for all requests
+        :return: list of items in order of keys, None for missing items
+        """
+        keys = [self.get_key_from_item(key) for key in keys]
+        key_ids = [self._get_key_id(key) for key in keys]
+        unique_keys = OrderedDict(zip(key_ids, keys))
+
+        found = {}
+        use_cache = self.cache is not None and not projection and not consistent_read
+        if use_cache:
+            for key_id in list(unique_keys):
+                item = self.cache.get((self.table.name, key_id))
+                if item is not None:
+                    found[key_id] = item
+                    del unique_keys[key_id]
+
+        unique_keys = list(unique_keys.values())
+        chunks = [unique_keys[i:i + BATCH_GET_SIZE] for i in range(0, len(unique_keys), BATCH_GET_SIZE)]
+
+        def get_chunk(chunk):
+            return self._get_chunk(chunk, projection=projection, consistent_read=consistent_read)
+
+        if parallel and len(chunks) > 1:
+            results = thread_map(get_chunk, chunks, parallel)
         else:
-            hash_attr = self.table.hash_generator()
-            item.update(self.generate_key(hash_attr=hash_attr))
-            return self.create(item=item, _recurse_count=_recurse_count + 1)
-
-    def scan(self, **options):
-        response = self.table.scan(**options)
-        items = response.get('Items', [])
-        for item in items:
-            yield item
-
-    def query(self, **options):
-        response = self.table.query(**options)
-        items = response.get('Items', [])
-        for item in items:
-            yield item
-
-    def all(self):
-        response = self.table.scan()
-        items = response.get('Items', [])
-        for item in items:
-            yield item
+            results = [get_chunk(chunk) for chunk in chunks]
+
+        for items in results:
+            for item in items:
+                key_id = self._get_key_id(item)
+                found[key_id] = item
+                if use_cache:
+                    self.cache.set((self.table.name, key_id), item)
+        return [found.get(key_id) for key_id in key_ids]
+
+    def get_transact_put(self, item, create=False):
+        """
+        TransactItem for transact_write
+
+        :param create: put only if key does not exist
+        """
+        put = {
+            'TableName': self.table.name,
+            'Item': item,
+        }
+        if create:
+            put['ConditionExpression'] = 'attribute_not_exists(#hash)'
+            put['ExpressionAttributeNames'] = {'#hash': self.table.get_hash_name()}
+        return {'Put': put}
+
+    def get_transact_update(self, key, set_attrs=None, remove_attrs=None):
+        expression, names, values = build_update_expression(set_attrs, remove_attrs)
+        update = {
+            'TableName': self.table.name,
+            'Key': self.get_key_from_item(key),
+            'UpdateExpression': expression,
+            'ExpressionAttributeNames': names,
+        }
+        if values:
+            update['ExpressionAttributeValues'] = values
+        return {'Update': update}
+
+    def get_transact_delete(self, key):
+        return {
+            'Delete': {
+                'TableName': self.table.name,
+                'Key': self.get_key_from_item(key),
+            },
+        }
+
+    def transact_write(self, transact_items):
+        """
+        Write with TransactWriteItems, all or nothing
+
+        :param transact_items: from get_transact_put/update/delete, may be of several tables
+        """
+        if len(transact_items) > TRANSACT_WRITE_SIZE:
+            raise ValueError('Maximum {} items in transaction'.format(TRANSACT_WRITE_SIZE))
+        if not transact_items:
+            return True
+        response = self._request('transact_write_items', TransactItems=transact_items)
+        return response['ResponseMetadata']['HTTPStatusCode'] == 200
+
+    def get_key_names(self):
+        return [name for name in [self.table.get_hash_name(), self.table.get_range_name()] if name]
+
+    def paginate(self, fetch, page_size=None, limit=None, start_key=None, key_names=None, **options):
+        """:param key_names: key names of table and index for resume tokens, keys of table by default"""
+        return Paginator(
+            fetch,
+            options=options,
+            page_size=page_size,
+            limit=limit,
+            start_key=start_key,
+            key_names=key_names or self.get_key_names(),
+        )
+
+    def scan(self, page_size=None, limit=None, start_key=None, parallel=None, ordered=False, max_workers=None,
+             queue_size=None, key_names=None, **options):
+        """
+        :param parallel: number of segments for parallel scan
+        :param ordered: parallel scan yields segment by segment
+        :param max_workers: threads count for parallel scan
+        :param queue_size: max pages fetched ahead by parallel scan workers
+        """
+        if parallel:
+            return ParallelScan(
+                self,
+                parallel,
+                max_workers=max_workers,
+                ordered=ordered,
+                queue_size=queue_size,
+                page_size=page_size,
+                limit=limit,
+                start_key=start_key,
+                options=options,
+                key_names=key_names,
+            )
+        return self.paginate(functools.partial(self._request, 'scan'), page_size=page_size, limit=limit, start_key=start_key,
+                             key_names=key_names, **options)
+
+    def query(self, page_size=None, limit=None, start_key=None, key_names=None, **options):
+        return self.paginate(functools.partial(self._request, 'query'), page_size=page_size, limit=limit, start_key=start_key,
+                             key_names=key_names, **options)
+
+    def all(self, **options):
+        return self.scan(**options)
+
+    @property
+    def objects(self):
+        """:return: new lazy query of raw items"""
+        return Query(self)
@@ -0,0 +1,1383 @@
+"""
+In-memory DynamoDB backend
+
+    dynamite_options.CONNECTION.backend = 'memory'
+    connection.Connection().rebuild()
+
+Resources of the backend implement the part of boto3 resource, table and client
+used by dynamite: tables with key schema and secondary indexes, item operations
+with condition and update expressions, query and scan with pagination and
+segments, batch operations and transactions. Values are normalized as boto3
+returns them (numbers are Decimal, binary is Binary), errors are ClientError
+with codes of DynamoDB.
+
+Items of a partition are kept sorted by range key, so key conditions of query
+are found by bisection: O(log n + k). Queries of indexes evaluate all items.
+Data is shared by all threads of the process, requests are serialized by one lock.
+"""
+import bisect
+import copy
+import datetime
+import operator
+import re
+import threading
+import time
+import zlib
+from decimal import Decimal
+
+import six
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+from botocore import exceptions as boto_exceptions
+
+from dynamite import defines
+
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+TRANSACT_WRITE_SIZE = 100
+
+MISSING = object()
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class RequestError(Exception):
+    def __init__(self, code, message, **response):
+        super(RequestError, self).__init__(message)
+        self.code = code
+        self.message = message
+        self.response = response
+
+
+def validation_error(message):
+    return RequestError('ValidationException', message)
+
+
+def get_client_error(operation, error):
+    response = {
+        'Error': {'Code': error.code, 'Message': error.message},
+        'ResponseMetadata': {'HTTPStatusCode': 400, 'HTTPHeaders': {}, 'RetryAttempts': 0},
+    }
+    response.update(error.response)
+    operation_name = ''.join(part.title() for part in operation.split('_'))
+    return boto_exceptions.ClientError(response, operation_name)
+
+
+def normalize(value):
+    """:return: value as boto3 returns it, TypeError for unsupported types like float"""
+    return _deserializer.deserialize(_serializer.serialize(value))
+
+
+def normalize_item(item):
+    return {name: normalize(value) for name, value in item.items()}
+
+
+def get_type(value):
+    """:return: DynamoDB type of normalized value"""
+    return next(iter(_serializer.serialize(value)))
+
+
+def comparable(value):
+    """:return: (type, value) of scalar for ordering, None for other types"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, Decimal):
+        return defines.NUMBER, value
+    if isinstance(value, six.text_type):
+        return defines.STRING, value
+    if isinstance(value, Binary):
+        return defines.BINARY, value.value
+    if isinstance(value, six.binary_type):
+        return defines.BINARY, value
+    return None
+
+
+def is_equal(left, right):
+    if isinstance(left, bool) != isinstance(right, bool):
+        return False
+    return left == right
+
+
+COMPARATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+# condition functions, size() is an operand
+FUNCTIONS = frozenset(['attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains'])
+UPDATE_FUNCTIONS = frozenset(['if_not_exists', 'list_append'])
+UPDATE_ACTIONS = frozenset(['SET', 'REMOVE', 'ADD', 'DELETE'])
+
+_TOKEN_RE = re.compile(r'\s*(<>|<=|>=|[=<>(),.\[\]+-]|[#:]?\w+)')
+
+
+def tokenize(expression):
+    tokens = []
+    expression = expression.rstrip()
+    position = 0
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if match is None:
+            raise validation_error('Invalid expression: {}'.format(expression))
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class Placeholders(object):
+    """ExpressionAttributeNames and Values of request, unused placeholders are errors as in DynamoDB"""
+
+    def __init__(self, names=None, values=None):
+        self.names = dict(names or {})
+        self.values = dict(values or {})
+        self.used = set()
+
+    def get_name(self, placeholder):
+        if placeholder not in self.names:
+            raise validation_error('An expression attribute name used in the document path is not defined; '
+                                   'attribute name: {}'.format(placeholder))
+        self.used.add(placeholder)
+        return self.names[placeholder]
+
+    def get_value(self, placeholder):
+        if placeholder not in self.values:
+            raise validation_error('An expression attribute value used in expression is not defined; '
+                                   'attribute value: {}'.format(placeholder))
+        self.used.add(placeholder)
+        return normalize(self.values[placeholder])
+
+    def check(self):
+        unused = [name for name in list(self.names) + list(self.values) if name not in self.used]
+        if unused:
+            raise validation_error('Value provided in ExpressionAttributeNames or ExpressionAttributeValues '
+                                   'unused in expressions: keys: {{{}}}'.format(', '.join(sorted(unused))))
+
+
+class Parser(object):
+    """
+    Parser of condition, update and projection expressions
+
+    Conditions are parsed to tuples: ('and', left, right), ('or', left, right),
+    ('not', condition), ('compare', operator, left, right), ('between', operand, low, high),
+    ('in', operand, operands), ('function', name, operands).
+    Operands: ('path', elements), ('value', value), ('size', elements).
+    """
+
+    def __init__(self, expression, placeholders):
+        self.expression = expression
+        self.tokens = tokenize(expression)
+        self.position = 0
+        self.placeholders = placeholders
+
+    def error(self, message=None):
+        return validation_error('Invalid expression: {}: {}'.format(message or 'syntax error', self.expression))
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise self.error('unexpected end')
+        self.position += 1
+        return token
+
+    def expect(self, token):
+        if self.next() != token:
+            raise self.error('expected {}'.format(token))
+
+    def keyword(self, word):
+        token = self.peek()
+        if token is not None and token.upper() == word:
+            self.position += 1
+            return True
+        return False
+
+    def finish(self, result):
+        if self.peek() is not None:
+            raise self.error('unexpected {}'.format(self.peek()))
+        return result
+
+    def parse_condition(self):
+        node = self.parse_and()
+        while self.keyword('OR'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.keyword('AND'):
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.keyword('NOT'):
+            return 'not', self.parse_not()
+        return self.parse_predicate()
+
+    def parse_predicate(self):
+        if self.peek() == '(':
+            self.next()
+            node = self.parse_condition()
+            self.expect(')')
+            return node
+        if self.peek() in FUNCTIONS and self.peek(1) == '(':
+            name = self.next()
+            return 'function', name, self.parse_arguments()
+        left = self.parse_operand()
+        token = self.next()
+        if token == '=' or token == '<>' or token in COMPARATORS:
+            return 'compare', token, left, self.parse_operand()
+        if token.upper() == 'BETWEEN':
+            low = self.parse_operand()
+            if not self.keyword('AND'):
+                raise self.error('expected AND')
+            return 'between', left, low, self.parse_operand()
+        if token.upper() == 'IN':
+            return 'in', left, self.parse_arguments()
+        raise self.error('unexpected {}'.format(token))
+
+    def parse_arguments(self, parse=None):
+        parse = parse or self.parse_operand
+        self.expect('(')
+        arguments = [parse()]
+        while self.peek() == ',':
+            self.next()
+            arguments.append(parse())
+        self.expect(')')
+        return arguments
+
+    def parse_operand(self):
+        token = self.peek()
+        if token is None:
+            raise self.error('unexpected end')
+        if token == 'size' and self.peek(1) == '(':
+            self.next()
+            self.expect('(')
+            path = self.parse_path()
+            self.expect(')')
+            return 'size', path
+        if token.startswith(':'):
+            self.next()
+            return 'value', self.placeholders.get_value(token)
+        return 'path', self.parse_path()
+
+    def parse_name(self):
+        token = self.next()
+        if token.startswith('#'):
+            return self.placeholders.get_name(token)
+        if token.startswith(':') or not re.match(r'[A-Za-z_]\w*$', token):
+            raise self.error('unexpected {}'.format(token))
+        return token
+
+    def parse_path(self):
+        elements = [self.parse_name()]
+        while self.peek() in ('.', '['):
+            if self.next() == '.':
+                elements.append(self.parse_name())
+            else:
+                index = self.next()
+                if not index.isdigit():
+                    raise self.error('invalid index {}'.format(index))
+                elements.append(int(index))
+                self.expect(']')
+        return tuple(elements)
+
+    def parse_projection(self):
+        paths = [self.parse_path()]
+        while self.peek() == ',':
+            self.next()
+            paths.append(self.parse_path())
+        return paths
+
+    def parse_update(self):
+        """:return: list of (action, path, operand)"""
+        actions = []
+        while self.peek() is not None:
+            action = self.next().upper()
+            if action not in UPDATE_ACTIONS:
+                raise self.error('unexpected {}'.format(action))
+            while True:
+                path = self.parse_path()
+                if action == 'SET':
+                    self.expect('=')
+                    actions.append((action, path, self.parse_set_value()))
+                elif action == 'REMOVE':
+                    actions.append((action, path, None))
+                else:
+                    actions.append((action, path, self.parse_operand()))
+                if self.peek() != ',':
+                    break
+                self.next()
+        if not actions:
+            raise self.error('empty update')
+        return actions
+
+    def parse_set_value(self):
+        left = self.parse_set_operand()
+        if self.peek() in ('+', '-'):
+            return 'arithmetic', self.next(), left, self.parse_set_operand()
+        return left
+
+    def parse_set_operand(self):
+        token = self.peek()
+        if token in UPDATE_FUNCTIONS and self.peek(1) == '(':
+            self.next()
+            arguments = self.parse_arguments(self.parse_set_operand)
+            if len(arguments) != 2 or (token == 'if_not_exists' and arguments[0][0] != 'path'):
+                raise self.error('invalid arguments of {}'.format(token))
+            return (token,) + tuple(arguments)
+        return self.parse_operand()
+
+
+def parse_condition(expression, placeholders):
+    parser = Parser(expression, placeholders)
+    return parser.finish(parser.parse_condition())
+
+
+def parse_projection(expression, placeholders):
+    if expression is None:
+        return None
+    parser = Parser(expression, placeholders)
+    return parser.finish(parser.parse_projection())
+
+
+def parse_update(expression, placeholders):
+    parser = Parser(expression, placeholders)
+    return parser.finish(parser.parse_update())
+
+
+def get_path(item, path):
+    value = item
+    for element in path:
+        if isinstance(element, int):
+            if not isinstance(value, list) or element >= len(value):
+                return MISSING
+        elif not isinstance(value, dict) or element not in value:
+            return MISSING
+        value = value[element]
+    return value
+
+
+def set_path(item, path, value):
+    parent = get_path(item, path[:-1])
+    element = path[-1]
+    if isinstance(element, int) and isinstance(parent, list):
+        if element < len(parent):
+            parent[element] = value
+        else:
+            parent.append(value)
+    elif not isinstance(element, int) and isinstance(parent, dict):
+        parent[element] = value
+    else:
+        raise validation_error('The document path provided in the update expression is invalid for update')
+
+
+def remove_path(item, path):
+    parent = get_path(item, path[:-1])
+    element = path[-1]
+    if isinstance(element, int) and isinstance(parent, list):
+        if element < len(parent):
+            del parent[element]
+    elif not isinstance(element, int) and isinstance(parent, dict):
+        parent.pop(element, None)
+
+
+def evaluate_operand(node, item):
+    kind = node[0]
+    if kind == 'value':
+        return node[1]
+    if kind == 'path':
+        return get_path(item, node[1])
+    if kind == 'size':
+        value = get_path(item, node[1])
+        if isinstance(value, Binary):
+            return Decimal(len(value.value))
+        if isinstance(value, (six.text_type, six.binary_type, list, dict, set)):
+            return Decimal(len(value))
+        return MISSING
+    if kind == 'if_not_exists':
+        value = get_path(item, node[1][1])
+        if value is MISSING:
+            return evaluate_operand(node[2], item)
+        return value
+    if kind == 'list_append':
+        first, second = evaluate_operand(node[1], item), evaluate_operand(node[2], item)
+        if not isinstance(first, list) or not isinstance(second, list):
+            raise validation_error('Incorrect operand type for operator or function; operator or function: list_append')
+        return first + second
+    if kind == 'arithmetic':
+        left, right = evaluate_operand(node[2], item), evaluate_operand(node[3], item)
+        if left is MISSING or right is MISSING:
+            raise validation_error('The provided expression refers to an attribute that does not exist in the item')
+        if not isinstance(left, Decimal) or not isinstance(right, Decimal):
+            raise validation_error('Incorrect operand type for operator or function; operator: {}'.format(node[1]))
+        return left + right if node[1] == '+' else left - right
+    raise validation_error('Invalid operand')
+
+
+def compare(operator_name, left, right):
+    if operator_name == '<>':
+        return left is MISSING or right is MISSING or not is_equal(left, right)
+    if left is MISSING or right is MISSING:
+        return False
+    if operator_name == '=':
+        return is_equal(left, right)
+    left, right = comparable(left), comparable(right)
+    if left is None or right is None or left[0] != right[0]:
+        return False
+    return COMPARATORS[operator_name](left[1], right[1])
+
+
+def call_function(name, arguments, item):
+    values = [evaluate_operand(argument, item) for argument in arguments]
+    if name == 'attribute_exists':
+        return values[0] is not MISSING
+    if name == 'attribute_not_exists':
+        return values[0] is MISSING
+    if any(value is MISSING for value in values):
+        return False
+    if name == 'attribute_type':
+        return get_type(values[0]) == values[1]
+    if name == 'begins_with':
+        value, prefix = comparable(values[0]), comparable(values[1])
+        if value is None or prefix is None or value[0] != prefix[0] or value[0] == defines.NUMBER:
+            return False
+        return value[1].startswith(prefix[1])
+    if name == 'contains':
+        value, part = values
+        if isinstance(value, (set, list)):
+            return any(is_equal(element, part) for element in value)
+        value, part = comparable(value), comparable(part)
+        if value is None or part is None or value[0] != part[0] or value[0] == defines.NUMBER:
+            return False
+        return part[1] in value[1]
+    raise validation_error('Invalid function name; function: {}'.format(name))
+
+
+def evaluate(node, item):
+    kind = node[0]
+    if kind == 'and':
+        return evaluate(node[1], item) and evaluate(node[2], item)
+    if kind == 'or':
+        return evaluate(node[1], item) or evaluate(node[2], item)
+    if kind == 'not':
+        return not evaluate(node[1], item)
+    if kind == 'compare':
+        return compare(node[1], evaluate_operand(node[2], item), evaluate_operand(node[3], item))
+    if kind == 'between':
+        value = evaluate_operand(node[1], item)
+        low, high = evaluate_operand(node[2], item), evaluate_operand(node[3], item)
+        return compare('>=', value, low) and compare('<=', value, high)
+    if kind == 'in':
+        value = evaluate_operand(node[1], item)
+        return any(compare('=', value, evaluate_operand(operand, item)) for operand in node[2])
+    return call_function(node[1], node[2], item)
+
+
+def project(item, paths):
+    """:return: copy of item with only attributes of paths"""
+    if paths is None:
+        return copy.deepcopy(item)
+    result = {}
+    for path in paths:
+        value = get_path(item, path)
+        if value is MISSING:
+            continue
+        target = result
+        for index, element in enumerate(path[:-1]):
+            default = [] if isinstance(path[index + 1], int) else {}
+            if isinstance(target, list):
+                target.append(default)
+                target = target[-1]
+            else:
+                target = target.setdefault(element, default)
+        if isinstance(target, list):
+            target.append(copy.deepcopy(value))
+        else:
+            target[path[-1]] = copy.deepcopy(value)
+    return result
+
+
+def get_key_conditions(node):
+    """
+    :param node: parsed KeyConditionExpression
+    :return: {name: (operator, values)}, operators are =, <, <=, >, >=, BETWEEN, begins_with
+    """
+    parts = []
+    stack = [node]
+    while stack:
+        part = stack.pop()
+        if part[0] == 'and':
+            stack.extend([part[2], part[1]])
+        else:
+            parts.append(part)
+    flipped = {'=': '=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+    conditions = {}
+    for part in parts:
+        if part[0] == 'compare' and part[1] in flipped:
+            operator_name, left, right = part[1:]
+            if left[0] == 'value' and right[0] == 'path':
+                operator_name, left, right = flipped[operator_name], right, left
+            operands = [left, right]
+        elif part[0] == 'between':
+            operator_name, operands = 'BETWEEN', list(part[1:])
+        elif part[0] == 'function' and part[1] == 'begins_with':
+            operator_name, operands = part[1], part[2]
+        else:
+            raise validation_error('Invalid operator used in KeyConditionExpression')
+        path, values = operands[0], operands[1:]
+        if path[0] != 'path' or len(path[1]) != 1 or any(value[0] != 'value' for value in values):
+            raise validation_error('Invalid KeyConditionExpression')
+        name = path[1][0]
+        if name in conditions:
+            raise validation_error('KeyConditionExpressions must only contain one condition per key')
+        conditions[name] = (operator_name, [value[1] for value in values])
+    return conditions
+
+
+def in_range(key, condition):
+    """:return: True if comparable key matches range condition"""
+    if condition is None:
+        return True
+    operator_name, values = condition
+    if operator_name == '=':
+        return key == values[0]
+    if operator_name == 'BETWEEN':
+        return values[0] <= key <= values[1]
+    if operator_name == 'begins_with':
+        return key[0] == values[0][0] and key[1].startswith(values[0][1])
+    return COMPARATORS[operator_name](key, values[0])
+
+
+def get_segment_hash(hash_key):
+    """Stable hash of comparable hash key for segments of scan"""
+    return zlib.crc32(repr(hash_key).encode('utf-8')) & 0xffffffff
+
+
+class Partition(object):
+    """Items of one hash key: sorted comparable range keys and items by range key"""
+
+    __slots__ = ('keys', 'items', 'segment_hash')
+
+    def __init__(self, hash_key):
+        self.keys = []
+        self.items = {}
+        self.segment_hash = get_segment_hash(hash_key)
+
+    def get_bounds(self, condition):
+        """:return: slice of keys matching range condition"""
+        keys = self.keys
+        if condition is None:
+            return 0, len(keys)
+        operator_name, values = condition
+        if operator_name == '=':
+            return bisect.bisect_left(keys, values[0]), bisect.bisect_right(keys, values[0])
+        if operator_name == 'BETWEEN':
+            return bisect.bisect_left(keys, values[0]), bisect.bisect_right(keys, values[1])
+        if operator_name == 'begins_with':
+            low = high = bisect.bisect_left(keys, values[0])
+            while high < len(keys) and in_range(keys[high], condition):
+                high += 1
+            return low, high
+        if operator_name == '<':
+            return 0, bisect.bisect_left(keys, values[0])
+        if operator_name == '<=':
+            return 0, bisect.bisect_right(keys, values[0])
+        if operator_name == '>':
+            return bisect.bisect_right(keys, values[0]), len(keys)
+        return bisect.bisect_left(keys, values[0]), len(keys)
+
+
+class Index(object):
+    def __init__(self, description, table):
+        self.name = description['IndexName']
+        self.key_names = [schema['AttributeName'] for schema in
+                          sorted(description['KeySchema'], key=lambda schema: schema['KeyType'])]
+        self.hash_name = self.key_names[0]
+        self.range_name = self.key_names[1] if len(self.key_names) > 1 else None
+        projection = description.get('Projection', {})
+        self.projection = projection.get('ProjectionType', 'ALL')
+        self.attributes = set(table.key_names + self.key_names + projection.get('NonKeyAttributes', []))
+
+    def get_view(self, item):
+        """:return: projected attributes of item"""
+        if self.projection == 'ALL':
+            return item
+        return {name: value for name, value in item.items() if name in self.attributes}
+
+
+class TableData(object):
+    """Description, partitions sorted by hash key and TTL of one table"""
+
+    def __init__(self, description):
+        self.description = description
+        self.name = description['TableName']
+        self.key_names = [schema['AttributeName'] for schema in
+                          sorted(description['KeySchema'], key=lambda schema: schema['KeyType'])]
+        self.hash_name = self.key_names[0]
+        self.range_name = self.key_names[1] if len(self.key_names) > 1 else None
+        self.partitions = {}
+        self.hash_keys = []
+        self.ttl = {'TimeToLiveStatus': 'DISABLED'}
+
+    @property
+    def types(self):
+        return {definition['AttributeName']: definition['AttributeType']
+                for definition in self.description['AttributeDefinitions']}
+
+    def get_indexes(self):
+        return [index for kind in ('GlobalSecondaryIndexes', 'LocalSecondaryIndexes')
+                for index in self.description.get(kind, [])]
+
+    def get_index(self, name):
+        for description in self.get_indexes():
+            if description['IndexName'] == name:
+                return Index(description, self)
+        raise validation_error('The table does not have the specified index: {}'.format(name))
+
+    def get_count(self):
+        return sum(len(partition.items) for partition in self.partitions.values())
+
+    def get_key_value(self, item, name, types):
+        value = item.get(name, MISSING)
+        if value is MISSING:
+            raise validation_error('One or more parameter values were invalid: '
+                                   'Missing the key {} in the item'.format(name))
+        key = comparable(value)
+        if key is None or key[0] != types[name]:
+            raise validation_error('One or more parameter values were invalid: Type mismatch for key {} '
+                                   'expected: {} actual: {}'.format(name, types[name], get_type(value)))
+        if key[0] != defines.NUMBER and not key[1]:
+            raise validation_error('One or more parameter values are not valid. '
+                                   'The AttributeValue for a key attribute cannot contain an empty value. '
+                                   'Key: {}'.format(name))
+        return key
+
+    def get_item_key(self, item):
+        """:return: (hash key, range key) of normalized item, () for range key of hash-only table"""
+        types = self.types
+        hash_key = self.get_key_value(item, self.hash_name, types)
+        if self.range_name is None:
+            return hash_key, ()
+        return hash_key, self.get_key_value(item, self.range_name, types)
+
+    def get_key(self, key):
+        """:return: key of normalized Key parameter"""
+        if set(key) != set(self.key_names):
+            raise validation_error('The provided key element does not match the schema')
+        return self.get_item_key(key)
+
+    def get(self, key):
+        partition = self.partitions.get(key[0])
+        if partition is None:
+            return None
+        return partition.items.get(key[1])
+
+    def put(self, key, item):
+        hash_key, range_key = key
+        partition = self.partitions.get(hash_key)
+        if partition is None:
+            partition = self.partitions[hash_key] = Partition(hash_key)
+            bisect.insort(self.hash_keys, hash_key)
+        if range_key not in partition.items:
+            bisect.insort(partition.keys, range_key)
+        partition.items[range_key] = item
+
+    def delete(self, key):
+        hash_key, range_key = key
+        partition = self.partitions.get(hash_key)
+        if partition is None or range_key not in partition.items:
+            return None
+        item = partition.items.pop(range_key)
+        del partition.keys[bisect.bisect_left(partition.keys, range_key)]
+        if not partition.items:
+            del self.partitions[hash_key]
+            del self.hash_keys[bisect.bisect_left(self.hash_keys, hash_key)]
+        return item
+
+    def iter_items(self, start=None, segment=None, total_segments=None):
+        """
+        Items in order of hash and range keys
+
+        :param start: key, only items after it
+        """
+        position = 0
+        if start is not None:
+            hash_key, range_key = start
+            position = bisect.bisect_left(self.hash_keys, hash_key)
+            if position < len(self.hash_keys) and self.hash_keys[position] == hash_key:
+                partition = self.partitions[hash_key]
+                if segment is None or partition.segment_hash % total_segments == segment:
+                    for key in partition.keys[bisect.bisect_right(partition.keys, range_key):]:
+                        yield partition.items[key]
+                position += 1
+        for hash_key in self.hash_keys[position:]:
+            partition = self.partitions[hash_key]
+            if segment is not None and partition.segment_hash % total_segments != segment:
+                continue
+            for key in list(partition.keys):
+                yield partition.items[key]
+
+    def iter_partition(self, hash_key, condition, forward=True, start=None):
+        """Items of one hash key by range condition, found by bisection"""
+        partition = self.partitions.get(hash_key)
+        if partition is None:
+            return
+        low, high = partition.get_bounds(condition)
+        if start is not None:
+            if forward:
+                low = max(low, bisect.bisect_right(partition.keys, start[1]))
+            else:
+                high = min(high, bisect.bisect_left(partition.keys, start[1]))
+        keys = partition.keys[low:high]
+        if not forward:
+            keys.reverse()
+        for key in keys:
+            yield partition.items[key]
+
+    def get_index_key(self, index, item):
+        """:return: comparable key of item in index, None if item is not in index"""
+        key = []
+        for name in index.key_names:
+            value = comparable(item.get(name))
+            if value is None:
+                return None
+            key.append(value)
+        if index.range_name is None:
+            key.append(())
+        return tuple(key) + self.get_item_key(item)
+
+    def iter_index(self, index, hash_key=None, condition=None, forward=True, start=None, segment=None,
+                   total_segments=None):
+        """Items of index in order of index keys, all items are evaluated"""
+        entries = []
+        for item in self.iter_items():
+            key = self.get_index_key(index, item)
+            if key is None or (hash_key is not None and key[0] != hash_key) or not in_range(key[1], condition):
+                continue
+            if segment is not None and get_segment_hash(key[0]) % total_segments != segment:
+                continue
+            if start is not None and (key <= start if forward else key >= start):
+                continue
+            entries.append((key, item))
+        entries.sort(key=operator.itemgetter(0), reverse=not forward)
+        for _, item in entries:
+            yield index.get_view(item)
+
+
+class MemoryDatabase(object):
+    """Tables of memory backend, shared by resources of all threads"""
+
+    def __init__(self, latency=0.0):
+        """:param latency: seconds added to every request, like network round trip"""
+        self.latency = latency
+        self.tables = {}
+        self._lock = threading.RLock()
+
+    def reset(self):
+        with self._lock:
+            self.tables.clear()
+
+    def request(self, operation, params):
+        if self.latency:
+            time.sleep(self.latency)
+        handler = getattr(self, '_{}'.format(operation))
+        with self._lock:
+            try:
+                response = handler(params)
+            except RequestError as e:
+                raise get_client_error(operation, e)
+        response['ResponseMetadata'] = {'HTTPStatusCode': 200, 'HTTPHeaders': {}, 'RetryAttempts': 0}
+        return response
+
+    def _get_table(self, name):
+        table = self.tables.get(name)
+        if table is None:
+            raise RequestError('ResourceNotFoundException', 'Requested resource not found: Table: {} not found'.format(name))
+        return table
+
+    def _get_placeholders(self, params):
+        return Placeholders(params.get('ExpressionAttributeNames'), params.get('ExpressionAttributeValues'))
+
+    def _get_expression(self, params, name, placeholders, is_key_condition=False):
+        """:return: expression string, conditions of boto3 are built into placeholders"""
+        expression = params.get(name)
+        if isinstance(expression, ConditionBase):
+            built = ConditionExpressionBuilder().build_expression(expression, is_key_condition=is_key_condition)
+            placeholders.names.update(built.attribute_name_placeholders)
+            placeholders.values.update(built.attribute_value_placeholders)
+            expression = built.condition_expression
+        return expression
+
+    def _get_condition(self, params, name, placeholders, is_key_condition=False):
+        expression = self._get_expression(params, name, placeholders, is_key_condition=is_key_condition)
+        if expression is None:
+            return None
+        return parse_condition(expression, placeholders)
+
+    def _check_condition(self, condition, item):
+        if condition is not None and not evaluate(condition, item or {}):
+            raise RequestError('ConditionalCheckFailedException', 'The conditional request failed')
+
+    def _get_consumed(self, params, table_name, units):
+        if params.get('ReturnConsumedCapacity', 'NONE') == 'NONE':
+            return {}
+        return {'ConsumedCapacity': {'TableName': table_name, 'CapacityUnits': float(units)}}
+
+    def _get_read_units(self, params, count):
+        return max(count, 1) * (1.0 if params.get('ConsistentRead') else 0.5)
+
+    # tables
+
+    def _create_table(self, params):
+        name = params['TableName']
+        if name in self.tables:
+            raise RequestError('ResourceInUseException', 'Table already exists: {}'.format(name))
+        defined = set(definition['AttributeName'] for definition in params['AttributeDefinitions'])
+        indexes = params.get('GlobalSecondaryIndexes', []) + params.get('LocalSecondaryIndexes', [])
+        for schema in params['KeySchema'] + [schema for index in indexes for schema in index['KeySchema']]:
+            if schema['AttributeName'] not in defined:
+                raise validation_error('One or more parameter values were invalid: Some index key attributes '
+                                       'are not defined in AttributeDefinitions')
+        description = {
+            'TableName': name,
+            'TableArn': 'arn:aws:dynamodb:memory:000000000000:table/{}'.format(name),
+            'TableStatus': 'ACTIVE',
+            'CreationDateTime': datetime.datetime.now(),
+            'KeySchema': copy.deepcopy(params['KeySchema']),
+            'AttributeDefinitions': copy.deepcopy(params['AttributeDefinitions']),
+        }
+        if params.get('BillingMode') == 'PAY_PER_REQUEST':
+            description['BillingModeSummary'] = {'BillingMode': 'PAY_PER_REQUEST'}
+            description['ProvisionedThroughput'] = {'ReadCapacityUnits': 0, 'WriteCapacityUnits': 0}
+        else:
+            description['ProvisionedThroughput'] = dict(params['ProvisionedThroughput'])
+        for kind in ('GlobalSecondaryIndexes', 'LocalSecondaryIndexes'):
+            if params.get(kind):
+                description[kind] = copy.deepcopy(params[kind])
+        for index in description.get('GlobalSecondaryIndexes', []):
+            index['IndexStatus'] = 'ACTIVE'
+        self.tables[name] = TableData(description)
+        return {'TableDescription': self._describe(self.tables[name])}
+
+    def _describe(self, table):
+        description = copy.deepcopy(table.description)
+        description['ItemCount'] = table.get_count()
+        return description
+
+    def _describe_table(self, params):
+        return {'Table': self._describe(self._get_table(params['TableName']))}
+
+    def _delete_table(self, params):
+        table = self._get_table(params['TableName'])
+        del self.tables[table.name]
+        description = self._describe(table)
+        description['TableStatus'] = 'DELETING'
+        return {'TableDescription': description}
+
+    def _list_tables(self, params):
+        return {'TableNames': sorted(self.tables)}
+
+    def _update_table(self, params):
+        table = self._get_table(params['TableName'])
+        description = table.description
+        if 'ProvisionedThroughput' in params:
+            throughput = dict(params['ProvisionedThroughput'])
+            if all(description['ProvisionedThroughput'].get(name) == value for name, value in throughput.items()):
+                raise validation_error('The provisioned throughput for the table will not change')
+            description['ProvisionedThroughput'].update(throughput)
+        if 'BillingMode' in params:
+            description['BillingModeSummary'] = {'BillingMode': params['BillingMode']}
+        defined = set(definition['AttributeName'] for definition in description['AttributeDefinitions'])
+        for definition in params.get('AttributeDefinitions', []):
+            if definition['AttributeName'] not in defined:
+                description['AttributeDefinitions'].append(dict(definition))
+                defined.add(definition['AttributeName'])
+        indexes = description.setdefault('GlobalSecondaryIndexes', [])
+        for update in params.get('GlobalSecondaryIndexUpdates', []):
+            if 'Create' in update:
+                index = copy.deepcopy(update['Create'])
+                if any(existing['IndexName'] == index['IndexName'] for existing in table.get_indexes()):
+                    raise validation_error('Attempting to create an index which already exists')
+                for schema in index['KeySchema']:
+                    if schema['AttributeName'] not in defined:
+                        raise validation_error('One or more parameter values were invalid: Some index key '
+                                               'attributes are not defined in AttributeDefinitions')
+                index['IndexStatus'] = 'ACTIVE'
+                indexes.append(index)
+            elif 'Delete' in update:
+                table.get_index(update['Delete']['IndexName'])
+                indexes[:] = [index for index in indexes if index['IndexName'] != update['Delete']['IndexName']]
+            elif 'Update' in update:
+                for index in indexes:
+                    if index['IndexName'] == update['Update']['IndexName']:
+                        index['ProvisionedThroughput'] = dict(update['Update']['ProvisionedThroughput'])
+        if not indexes:
+            del description['GlobalSecondaryIndexes']
+        return {'TableDescription': self._describe(table)}
+
+    def _update_time_to_live(self, params):
+        table = self._get_table(params['TableName'])
+        specification = params['TimeToLiveSpecification']
+        if specification['Enabled']:
+            table.ttl = {'TimeToLiveStatus': 'ENABLED', 'AttributeName': specification['AttributeName']}
+        else:
+            table.ttl = {'TimeToLiveStatus': 'DISABLED'}
+        return {'TimeToLiveSpecification': dict(specification)}
+
+    def _describe_time_to_live(self, params):
+        return {'TimeToLiveDescription': dict(self._get_table(params['TableName']).ttl)}
+
+    # items
+
+    def _get_return_values(self, params, old, new, updated=None):
+        return_values = params.get('ReturnValues', 'NONE')
+        if return_values == 'NONE':
+            return {}
+        item = old if return_values in ('ALL_OLD', 'UPDATED_OLD') else new
+        if not item:
+            return {}
+        if return_values in ('UPDATED_OLD', 'UPDATED_NEW'):
+            item = {name: value for name, value in item.items() if name in updated}
+        return {'Attributes': copy.deepcopy(item)}
+
+    def _put_item(self, params):
+        table = self._get_table(params['TableName'])
+        placeholders = self._get_placeholders(params)
+        condition = self._get_condition(params, 'ConditionExpression', placeholders)
+        placeholders.check()
+        item = normalize_item(params['Item'])
+        key = table.get_item_key(item)
+        old = table.get(key)
+        self._check_condition(condition, old)
+        table.put(key, item)
+        response = self._get_return_values(params, old, item)
+        response.update(self._get_consumed(params, table.name, 1))
+        return response
+
+    def _get_item(self, params):
+        table = self._get_table(params['TableName'])
+        placeholders = self._get_placeholders(params)
+        paths = parse_projection(params.get('ProjectionExpression'), placeholders)
+        placeholders.check()
+        item = table.get(table.get_key(normalize_item(params['Key'])))
+        response = self._get_consumed(params, table.name, self._get_read_units(params, 1))
+        if item is not None:
+            response['Item'] = project(item, paths)
+        return response
+
+    def _delete_item(self, params):
+        table = self._get_table(params['TableName'])
+        placeholders = self._get_placeholders(params)
+        condition = self._get_condition(params, 'ConditionExpression', placeholders)
+        placeholders.check()
+        key = table.get_key(normalize_item(params['Key']))
+        old = table.get(key)
+        self._check_condition(condition, old)
+        table.delete(key)
+        response = self._get_return_values(params, old, None)
+        response.update(self._get_consumed(params, table.name, 1))
+        return response
+
+    def _apply_update(self, table, key_item, old, actions):
+        """:return: new item and updated names"""
+        item = copy.deepcopy(old) if old is not None else dict(key_item)
+        current = old or {}
+        resolved = []
+        for action, path, operand in actions:
+            if path[0] in table.key_names:
+                raise validation_error('Cannot update attribute {}. This attribute is part of the key'.format(path[0]))
+            value = None
+            if operand is not None:
+                value = evaluate_operand(operand, current)
+                if value is MISSING:
+                    raise validation_error('The provided expression refers to an attribute that does not exist '
+                                           'in the item')
+            resolved.append((action, path, value))
+        for action, path, value in resolved:
+            if action == 'SET':
+                set_path(item, path, copy.deepcopy(value))
+            elif action == 'REMOVE':
+                remove_path(item, path)
+            elif action == 'ADD':
+                existing = get_path(item, path)
+                if existing is MISSING:
+                    set_path(item, path, copy.deepcopy(value))
+                elif isinstance(existing, Decimal) and isinstance(value, Decimal):
+                    set_path(item, path, existing + value)
+                elif isinstance(existing, set) and isinstance(value, set):
+                    existing.update(value)
+                else:
+                    raise validation_error('Incorrect operand type for operator or function; operator: ADD')
+            else:
+                existing = get_path(item, path)
+                if existing is MISSING:
+                    continue
+                if not isinstance(existing, set) or not isinstance(value, set):
+                    raise validation_error('Incorrect operand type for operator or function; operator: DELETE')
+                existing.difference_update(value)
+                if not existing:
+                    remove_path(item, path)
+        return item, set(path[0] for _, path, _ in resolved)
+
+    def _update_item(self, params):
+        table = self._get_table(params['TableName'])
+        placeholders = self._get_placeholders(params)
+        condition = self._get_condition(params, 'ConditionExpression', placeholders)
+        actions = []
+        if params.get('UpdateExpression'):
+            actions = parse_update(params['UpdateExpression'], placeholders)
+        placeholders.check()
+        key_item = normalize_item(params['Key'])
+        key = table.get_key(key_item)
+        old = table.get(key)
+        self._check_condition(condition, old)
+        item, updated = self._apply_update(table, key_item, old, actions)
+        table.put(key, item)
+        response = self._get_return_values(params, old, item, updated)
+        response.update(self._get_consumed(params, table.name, 1))
+        return response
+
+    def _get_start(self, table, params, index=None):
+        start_key = params.get('ExclusiveStartKey')
+        if not start_key:
+            return None
+        start_key = normalize_item(start_key)
+        if index is None:
+            return table.get_key(start_key)
+        key = table.get_index_key(index, start_key)
+        if key is None:
+            raise validation_error('The provided starting key is invalid')
+        return key
+
+    def _read_page(self, table, params, items, key_names, placeholders):
+        """Limit, filter, projection and LastEvaluatedKey of query and scan"""
+        limit = params.get('Limit')
+        if limit is not None and limit < 1:
+            raise validation_error('Limit must be greater than or equal to 1')
+        condition = self._get_condition(params, 'FilterExpression', placeholders)
+        paths = parse_projection(params.get('ProjectionExpression'), placeholders)
+        placeholders.check()
+        count = params.get('Select') == 'COUNT'
+        results = []
+        scanned = 0
+        last = None
+        last_key = None
+        for item in items:
+            if limit is not None and scanned >= limit:
+                last_key = {name: copy.deepcopy(last[name]) for name in key_names}
+                break
+            scanned += 1
+            last = item
+            if condition is None or evaluate(condition, item):
+                results.append(item if count else project(item, paths))
+        response = {'Count': len(results), 'ScannedCount': scanned}
+        if not count:
+            response['Items'] = results
+        if last_key is not None:
+            response['LastEvaluatedKey'] = last_key
+        response.update(self._get_consumed(params, table.name, self._get_read_units(params, scanned)))
+        return response
+
+    def _query(self, params):
+        table = self._get_table(params['TableName'])
+        placeholders = self._get_placeholders(params)
+        key_condition = self._get_condition(params, 'KeyConditionExpression', placeholders, is_key_condition=True)
+        if key_condition is None:
+            raise validation_error('Either the KeyConditions or KeyConditionExpression parameter must be specified')
+        conditions = get_key_conditions(key_condition)
+        index = None
+        hash_name, range_name, key_names = table.hash_name, table.range_name, list(table.key_names)
+        if params.get('IndexName'):
+            index = table.get_index(params['IndexName'])
+            hash_name, range_name = index.hash_name, index.range_name
+            key_names += [name for name in index.key_names if name not in key_names]
+        types = table.types
+        if hash_name not in conditions or conditions[hash_name][0] != '=':
+            raise validation_error('Query condition missed key schema element: {}'.format(hash_name))
+        range_condition = None
+        for name, (operator_name, values) in conditions.items():
+            if name not in (hash_name, range_name):
+                raise validation_error('Query condition missed key schema element: {}'.format(name))
+            keys = [comparable(value) for value in values]
+            if any(key is None or key[0] != types[name] for key in keys):
+                raise validation_error('One or more parameter values were invalid: '
+                                       'Condition parameter type does not match schema type')
+            if name == range_name:
+                range_condition = (operator_name, keys)
+        hash_key = comparable(conditions[hash_name][1][0])
+        forward = params.get('ScanIndexForward', True)
+        start = self._get_start(table, params, index)
+        if index is None:
+            items = table.iter_partition(hash_key, range_condition, forward=forward, start=start)
+        else:
+            items = table.iter_index(index, hash_key, range_condition, forward=forward, start=start)
+        return self._read_page(table, params, items, key_names, placeholders)
+
+    def _scan(self, params):
+        table = self._get_table(params['TableName'])
+        placeholders = self._get_placeholders(params)
+        segment, total_segments = params.get('Segment'), params.get('TotalSegments')
+        if (segment is None) != (total_segments is None):
+            raise validation_error('The TotalSegments parameter is required but was not present in the request '
+                                   'when Segment parameter is present')
+        if segment is not None and not 0 <= segment < total_segments:
+            raise validation_error('The Segment parameter is out of range')
+        key_names = list(table.key_names)
+        if params.get('IndexName'):
+            index = table.get_index(params['IndexName'])
+            key_names += [name for name in index.key_names if name not in key_names]
+            items = table.iter_index(index, start=self._get_start(table, params, index), segment=segment,
+                                     total_segments=total_segments)
+        else:
+            items = table.iter_items(start=self._get_start(table, params), segment=segment,
+                                     total_segments=total_segments)
+        return self._read_page(table, params, items, key_names, placeholders)
+
+    # batches and transactions
+
+    def _batch_get_item(self, params):
+        request_items = params['RequestItems']
+        if sum(len(request['Keys']) for request in request_items.values()) > BATCH_GET_SIZE:
+            raise validation_error('Too many items requested for the BatchGetItem call')
+        responses = {}
+        consumed = []
+        for name, request in request_items.items():
+            table = self._get_table(name)
+            placeholders = self._get_placeholders(request)
+            paths = parse_projection(request.get('ProjectionExpression'), placeholders)
+            placeholders.check()
+            keys = [table.get_key(normalize_item(key)) for key in request['Keys']]
+            if len(set(keys)) != len(keys):
+                raise validation_error('Provided list of item keys contains duplicates')
+            items = [table.get(key) for key in keys]
+            responses[name] = [project(item, paths) for item in items if item is not None]
+            consumed.append({'TableName': name, 'CapacityUnits': self._get_read_units(request, len(keys))})
+        response = {'Responses': responses, 'UnprocessedKeys': {}}
+        if params.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            response['ConsumedCapacity'] = consumed
+        return response
+
+    def _batch_write_item(self, params):
+        request_items = params['RequestItems']
+        if sum(len(requests) for requests in request_items.values()) > BATCH_WRITE_SIZE:
+            raise validation_error('Too many items requested for the BatchWriteItem call')
+        writes = []
+        consumed = []
+        for name, requests in request_items.items():
+            table = self._get_table(name)
+            keys = set()
+            for request in requests:
+                if 'PutRequest' in request:
+                    item = normalize_item(request['PutRequest']['Item'])
+                    key = table.get_item_key(item)
+                else:
+                    item = None
+                    key = table.get_key(normalize_item(request['DeleteRequest']['Key']))
+                if key in keys:
+                    raise validation_error('Provided list of item keys contains duplicates')
+                keys.add(key)
+                writes.append((table, key, item))
+            consumed.append({'TableName': name, 'CapacityUnits': float(len(requests))})
+        for table, key, item in writes:
+            if item is None:
+                table.delete(key)
+            else:
+                table.put(key, item)
+        response = {'UnprocessedItems': {}}
+        if params.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            response['ConsumedCapacity'] = consumed
+        return response
+
+    def _transact_write_items(self, params):
+        transact_items = params['TransactItems']
+        if len(transact_items) > TRANSACT_WRITE_SIZE:
+            raise validation_error('Member must have length less than or equal to {}'.format(TRANSACT_WRITE_SIZE))
+        writes = []
+        reasons = []
+        keys = set()
+        for transact_item in transact_items:
+            (kind, request), = transact_item.items()
+            table = self._get_table(request['TableName'])
+            placeholders = self._get_placeholders(request)
+            condition = self._get_condition(request, 'ConditionExpression', placeholders)
+            actions = []
+            if kind == 'Update':
+                actions = parse_update(request['UpdateExpression'], placeholders)
+            placeholders.check()
+            if kind == 'Put':
+                item = normalize_item(request['Item'])
+                key = table.get_item_key(item)
+            else:
+                item = normalize_item(request['Key'])
+                key = table.get_key(item)
+            if (table.name, key) in keys:
+                raise validation_error('Transaction request cannot include multiple operations on one item')
+            keys.add((table.name, key))
+            old = table.get(key)
+            if condition is not None and not evaluate(condition, old or {}):
+                reasons.append({'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'})
+                continue
+            reasons.append({'Code': 'None'})
+            if kind == 'Update':
+                item = self._apply_update(table, item, old, actions)[0]
+            elif kind not in ('Put', 'Delete'):
+                continue
+            writes.append((table, key, None if kind == 'Delete' else item))
+        if any(reason['Code'] != 'None' for reason in reasons):
+            raise RequestError(
+                'TransactionCanceledException',
+                'Transaction cancelled, please refer cancellation reasons for specific reasons [{}]'.format(
+                    ', '.join(reason['Code'] for reason in reasons)),
+                CancellationReasons=reasons,
+            )
+        for table, key, item in writes:
+            if item is None:
+                table.delete(key)
+            else:
+                table.put(key, item)
+        return {}
+
+
+def _operation(name):
+    def request(self, **params):
+        return self.database.request(name, params)
+
+    request.__name__ = name
+    return request
+
+
+class Meta(object):
+    def __init__(self, client):
+        self.client = client
+
+
+class MemoryWaiter(object):
+    """Waiters of client: table exists at once after create_table"""
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def wait(self, TableName, **kwargs):
+        exists = TableName in self.client.database.tables
+        if exists != (self.name == 'table_exists'):
+            raise boto_exceptions.WaiterError(name=self.name, reason='Max attempts exceeded', last_response={})
+
+
+class MemoryClient(object):
+    """Client with values of boto3 resource, not AttributeValues of low-level client"""
+
+    def __init__(self, database):
+        self.database = database
+
+    create_table = _operation('create_table')
+    describe_table = _operation('describe_table')
+    delete_table = _operation('delete_table')
+    list_tables = _operation('list_tables')
+    update_table = _operation('update_table')
+    update_time_to_live = _operation('update_time_to_live')
+    describe_time_to_live = _operation('describe_time_to_live')
+    put_item = _operation('put_item')
+    get_item = _operation('get_item')
+    update_item = _operation('update_item')
+    delete_item = _operation('delete_item')
+    query = _operation('query')
+    scan = _operation('scan')
+    batch_get_item = _operation('batch_get_item')
+    batch_write_item = _operation('batch_write_item')
+    transact_write_items = _operation('transact_write_items')
+
+    def get_waiter(self, name):
+        return MemoryWaiter(self, name)
+
+
+def _table_operation(name):
+    def request(self, **params):
+        params['TableName'] = self.name
+        return self.meta.client.database.request(name, params)
+
+    request.__name__ = name
+    return request
+
+
+class MemoryTable(object):
+    def __init__(self, client, name):
+        self.meta = Meta(client)
+        self.name = name
+
+    put_item = _table_operation('put_item')
+    get_item = _table_operation('get_item')
+    update_item = _table_operation('update_item')
+    delete_item = _table_operation('delete_item')
+    query = _table_operation('query')
+    scan = _table_operation('scan')
+
+    def delete(self):
+        return self.meta.client.delete_table(TableName=self.name)
+
+    def _describe(self):
+        return self.meta.client.describe_table(TableName=self.name)['Table']
+
+    @property
+    def table_name(self):
+        return self.name
+
+    @property
+    def table_status(self):
+        return self._describe()['TableStatus']
+
+    @property
+    def item_count(self):
+        return self._describe()['ItemCount']
+
+    @property
+    def key_schema(self):
+        return self._describe()['KeySchema']
+
+    @property
+    def attribute_definitions(self):
+        return self._describe()['AttributeDefinitions']
+
+    def __repr__(self):
+        return "dynamodb.Table(name='{}')".format(self.name)
+
+
+class MemoryResource(object):
+    def __init__(self, database):
+        self.meta = Meta(MemoryClient(database))
+
+    def Table(self, name):
+        return MemoryTable(self.meta.client, name)
+
+    def create_table(self, **params):
+        self.meta.client.create_table(**params)
+        return self.Table(params['TableName'])
+
+    def batch_get_item(self, **params):
+        return self.meta.client.batch_get_item(**params)
+
+    def batch_write_item(self, **params):
+        return self.meta.client.batch_write_item(**params)
+
+
+class MemoryBackend(object):
+    """Backend of dynamite.connection with tables in memory of the process"""
+
+    def __init__(self, latency=0.0):
+        """:param latency: seconds added to every request"""
+        self.database = MemoryDatabase(latency=latency)
+
+    def get_resource(self, config, client_config):
+        return MemoryResource(self.database)
+
+    def reset(self):
+        """Delete all tables"""
+        self.database.reset()
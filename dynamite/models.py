@@ -1,8 +1,13 @@
+import functools
+
 from dynamite import fields
+from dynamite.export import ColumnExport, DEFAULT_BATCH_SIZE
 from dynamite.defines import STRING, NUMBER
 from dynamite.schema import Schema
 from dynamite.tables import Table
 from dynamite.items import TableItems
+from dynamite.query import Query
+from dynamite.sessions import get_session
 from dynamite.utils import ClassProperty
 
 
@@ -10,22 +15,38 @@ class Model(Schema):
     _table = None
     _items = None
     _key = None
+    # model was loaded from table or saved, so it may be saved partially
+    _loaded = False
     read_capacity_units = 5
     write_capacity_units = 5
     Table = Table
     Items = TableItems
 
     # ignore class properties in get_fields
-    _ignore_elems = set(['table', 'items', 'hash', 'range'])
+    _ignore_elems = set(['table', 'items', 'hash', 'range', 'objects'])
 
     hash_generator = None
 
+    # secondary indexes: list of dynamite.indexes.GlobalIndex and LocalIndex
+    indexes = ()
+    # name of TimeToLive attribute, enabled by dynamite.sync
+    ttl_attribute = None
+    # abstract models are not synced, not inherited
+    abstract = True
+
+    # item cache of get: True, False or dynamite.cache.BaseCache,
+    # by default enabled by dynamite_options.CACHE.enabled
+    item_cache = None
+
+    # rate limiter of requests: True, False or dynamite.throttle.CapacityLimiter,
+    # by default enabled by dynamite_options.THROTTLE.enabled
+    throttle = None
+
     def __init__(self, **kwargs):
-        super(Model, self).__init__(**kwargs)
         if self.__class__._table is None:
             self.generate_table()
+        super(Model, self).__init__(**kwargs)
         self.generate_key()
-        self._update_state(**kwargs)
 
     @classmethod
     def generate_table(cls):
@@ -44,6 +65,10 @@ class Model(Schema):
             write_capacity_units=cls.write_capacity_units,
             hash_generator=cls.hash_generator,
             items=cls.Items,
+            cache=cls.item_cache,
+            indexes=cls.get_indexes(),
+            ttl_attribute=cls.ttl_attribute,
+            throttle=cls.throttle,
         )
         if cls._hash_field is None:
             field = cls._table.hash_attr[0]
@@ -60,6 +85,12 @@ class Model(Schema):
                     setattr(cls, field, fields.IntField(range_field=True))
         cls._get_fields()
 
+    @classmethod
+    def get_indexes(cls):
+        """:return: indexes with types of attributes from fields"""
+        types = {name: field.db_type for name, field in cls._fields_.items()}
+        return [index.bind(types) for index in cls.indexes]
+
     @classmethod
     def get_table(cls):
         if cls._table is None:
@@ -83,10 +114,16 @@ class Model(Schema):
         else:
             return None
 
+    @classmethod
+    def get_objects(cls):
+        """:return: new lazy query of models"""
+        return Query(cls.items, model=cls)
+
     table = ClassProperty(get_table)
     items = ClassProperty(get_items)
     hash = ClassProperty(get_hash)
     range = ClassProperty(get_range)
+    objects = ClassProperty(get_objects)
 
     @property
     def hk(self):
@@ -104,57 +141,259 @@ class Model(Schema):
     def get_table_name(cls):
         return cls.__name__
 
-    def save(self):
+    def save(self, full=False):
+        """
+        Loaded models are saved with UpdateItem of dirty fields only,
+        in session save is delayed until flush
+
+        :param full: put whole item
+        """
+        session = get_session()
+        if session is not None:
+            session.save(self)
+        else:
+            self._save(full=full)
+
+    def _save(self, full=False):
+        items = self.get_table().items
         if not self.hk:
-            created, item = self.get_table().items.create(item=self.to_db())
+            created, item = items.create(item=self.to_db())
             if created:
                 self.to_python(item)
             else:
                 raise RuntimeError('Item not created')
-        else:
-            self.get_table().items.put(self.to_db())
+        elif full or not self._loaded or self._dirty_ & set([self._hash_field, self._range_field]):
+            items.put(self.to_db())
+        elif self._dirty_:
+            set_attrs, remove_attrs = self.get_changes()
+            items.update_attrs(item=self.key, set_attrs=set_attrs, remove_attrs=remove_attrs)
+        self._loaded = True
+        self.mark_clean()
+
+    def get_changes(self):
+        """
+        :return: db values of dirty fields for SET and names of empty dirty fields for REMOVE
+        """
+        set_attrs = {}
+        remove_attrs = []
+        for name in self._dirty_:
+            value = self._state_.get(name)
+            if value is not None:
+                value = self._fields[name].to_db(value)
+            if value:
+                set_attrs[name] = value
+            else:
+                remove_attrs.append(name)
+        return set_attrs, remove_attrs
+
+    @classmethod
+    def bulk_save(cls, instances):
+        """
+        Save models with BatchWriteItem
+
+        Models without hash key get a new one from hash_generator,
+        there is no check for existing items.
+
+        :param instances: any iterable of models
+        :return: list of stats for every chunk
+        """
+        return cls.items.batch_write(puts=(cls._get_bulk_item(instance) for instance in instances))
+
+    @classmethod
+    def _get_bulk_item(cls, instance):
+        if not instance.hk:
+            instance[cls._hash_field] = cls.get_table().hash_generator()
+        return instance.to_db()
 
     def generate_key(self):
-        self._key = self.table.items.get_key_from_item(self.to_db())
+        """Key from state of hash and range fields, without serialization of other fields"""
+        key = {}
+        for name in (self._hash_field, self._range_field):
+            if name is None:
+                continue
+            value = self._state_.get(name)
+            if value is not None:
+                value = self._fields[name].to_db(value)
+            if value:
+                key[name] = value
+        self._key = key
+        return key
 
     @property
     def key(self):
-        self.generate_key()
+        if self._key is None:
+            self.generate_key()
         return self._key
 
-    def to_python(self, data):
-        super(Model, self).to_python(data)
+    def _set_state(self, name, value, validate=True):
+        if name == self._hash_field or name == self._range_field:
+            # cached key is invalid now
+            self._key = None
+        return super(Model, self)._set_state(name, value, validate=validate)
+
+    def to_python(self, data, validate=True):
+        super(Model, self).to_python(data, validate=validate)
         self.generate_key()
+        self._loaded = True
         return self
 
     @classmethod
-    def to_python_cls(cls, data):
+    def to_python_cls(cls, data, validate=True):
         if data is None:
             return None
-        instance = super(Model, cls).to_python_cls(data)
+        if cls._table is None:
+            cls.generate_table()
+        instance = super(Model, cls).to_python_cls(data, validate=validate)
         instance.generate_key()
         return instance
 
     @classmethod
-    def get(cls, **key):
-        return cls.to_python_cls(cls.items.get(item=key))
+    def from_db_many(cls, items, validate=True):
+        """
+        Models of page of items by precompiled plan, keys are taken from items without serialization
+
+        :param items: db items, None for missing items
+        :return: list of models, None for None items
+        """
+        if cls._table is None:
+            cls.generate_table()
+        instances = super(Model, cls).from_db_many(items, validate=validate)
+        key_names = [name for name in (cls._hash_field, cls._range_field) if name is not None]
+        for instance, item in zip(instances, items):
+            if instance is not None:
+                instance._key = {name: item[name] for name in key_names if item.get(name)}
+                instance._loaded = True
+        return instances
+
+    @classmethod
+    def get(cls, consistent_read=False, **key):
+        session = get_session()
+        if session is not None and not consistent_read:
+            return session.get(cls, key)
+        return cls.to_python_cls(cls.items.get(item=key, consistent_read=consistent_read))
+
+    @classmethod
+    def prefetch(cls, *keys):
+        """
+        Register keys in session, they will be requested by one BatchGetItem
+        on next get. Without session does nothing.
+
+        :param keys: keys (dict) or hash values
+        """
+        session = get_session()
+        if session is not None:
+            session.prefetch(cls, keys)
+
+    @classmethod
+    def get_many(cls, keys, projection=None, parallel=None, consistent_read=False):
+        """
+        Get models with BatchGetItem
+
+        :param keys: list of keys (dict) or hash values
+        :param projection: list of attribute names
+        :param parallel: threads count for concurrent requests
+        :param consistent_read: ConsistentRead for all requests
+        :return: list of models in order of keys, None for missing models
+        """
+        session = get_session()
+        if session is not None and not projection and not consistent_read:
+            return session.get_many(cls, keys)
+        keys = [key if isinstance(key, dict) else {cls.hash: key} for key in keys]
+        items = cls.items.batch_get(keys, projection=projection, parallel=parallel, consistent_read=consistent_read)
+        return cls.from_db_many(items)
 
     @classmethod
     def delete(cls, **key):
+        session = get_session()
+        if session is not None:
+            return session.delete(cls, key)
         return cls.items.delete(item=key)
 
     @classmethod
-    def scan(cls, **params):
-        for item in cls.items.scan(**params):
-            yield cls.to_python_cls(item)
+    def scan(cls, validate=True, **params):
+        """:param validate: False for hydration of models without validation"""
+        return ModelResults(cls, cls.items.scan(**params), validate=validate)
 
     @classmethod
-    def query(cls, **params):
-        for item in cls.items.query(**params):
-            yield cls.to_python_cls(item)
+    def query(cls, validate=True, **params):
+        """:param validate: False for hydration of models without validation"""
+        return ModelResults(cls, cls.items.query(**params), validate=validate)
 
     @classmethod
-    def all(cls):
-        for item in cls.items.all():
-            yield cls.to_python_cls(item)
+    def all(cls, validate=True, **params):
+        """:param validate: False for hydration of models without validation"""
+        return ModelResults(cls, cls.items.all(**params), validate=validate)
+
+
+class ModelResults(object):
+    """
+    Lazy iterator of models over paginated items
+
+    Pages are hydrated at once by Model.from_db_many, resume tokens
+    are still taken from every yielded item.
+    """
+
+    def __init__(self, model, items, validate=True):
+        self.model = model
+        self.items = items
+        self.validate = validate
+
+    @property
+    def last_evaluated_key(self):
+        return self.items.last_evaluated_key
+
+    def get_models(self, page):
+        return self.model.from_db_many(page, validate=self.validate)
+
+    def pages(self):
+        self.items.page_converter = self.get_models
+        return self.items.pages()
+
+    def __iter__(self):
+        self.items.page_converter = self.get_models
+        return iter(self.items)
+
+    def rows(self, names=None, tuples=False):
+        """
+        Raw rows instead of models: dicts or tuples of python values, see Model.rows_many
+
+        :param names: names of fields, all fields by default
+        :param tuples: tuples in order of names instead of dicts
+        """
+        self.items.page_converter = functools.partial(self.model.rows_many, names=names, tuples=tuples)
+        return iter(self.items)
+
+    def _get_export(self, names):
+        self.items.page_converter = None
+        return ColumnExport(self.model, names=names)
+
+    def iter_columns(self, names=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Columns of python values, pages are not hydrated to models
+
+        :param names: names of fields, all fields by default
+        :param batch_size: max rows in batch
+        :return: iterator of {name: list of values}
+        """
+        return self._get_export(names).iter_columns(self.items.pages(), batch_size=batch_size)
+
+    def iter_record_batches(self, names=None, batch_size=DEFAULT_BATCH_SIZE):
+        """:return: iterator of pyarrow.RecordBatch, types of columns by fields"""
+        return self._get_export(names).iter_record_batches(self.items.pages(), batch_size=batch_size)
+
+    def to_arrow(self, names=None, batch_size=DEFAULT_BATCH_SIZE):
+        """:return: pyarrow.Table"""
+        return self._get_export(names).to_arrow(self.items.pages(), batch_size=batch_size)
+
+    def to_parquet(self, path, names=None, batch_size=DEFAULT_BATCH_SIZE, **options):
+        """
+        Stream results to Parquet file batch by batch
+
+        :param options: for pyarrow.parquet.ParquetWriter, e.g. compression
+        :return: count of rows
+        """
+        return self._get_export(names).to_parquet(self.items.pages(), path, batch_size=batch_size, **options)
 
+    def to_numpy(self, names=None, batch_size=DEFAULT_BATCH_SIZE):
+        """:return: {name: numpy.ndarray}"""
+        return self._get_export(names).to_numpy(self.items.pages(), batch_size=batch_size)
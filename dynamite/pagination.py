@@ -0,0 +1,107 @@
+class Paginator(object):
+    """
+    Lazy iterator over paginated scan/query responses
+
+    Next page is requested only when the current one is exhausted.
+    `last_evaluated_key` is a resume token: pass it as `start_key`
+    to continue from the last yielded item.
+    """
+
+    def __init__(self, fetch, options=None, page_size=None, limit=None, start_key=None, key_names=None,
+                 page_converter=None):
+        """
+        :param fetch: callable, e.g. boto3 table.scan or table.query
+        :param options: kwargs for fetch
+        :param page_size: hint for Limit of every request
+        :param limit: total number of items
+        :param start_key: ExclusiveStartKey for resume
+        :param key_names: names of key attributes, used to build resume token inside a page
+        :param page_converter: page_converter(items) -> list of results of the same length,
+            resume tokens are taken from items
+        """
+        self.fetch = fetch
+        self.options = dict(options or {})
+        self.page_size = page_size
+        self.limit = limit
+        self.start_key = start_key
+        self.key_names = key_names
+        self.page_converter = page_converter
+        self.last_evaluated_key = start_key
+        self.count = 0
+        self.scanned_count = 0
+        self.pages_count = 0
+        self._finished = False
+
+    def _get_request_limit(self):
+        limit = self.page_size
+        if self.limit is not None:
+            remaining = self.limit - self.count
+            if limit is None or remaining < limit:
+                limit = remaining
+        return limit
+
+    def _get_item_key(self, item, page_key):
+        names = self.key_names
+        if page_key:
+            names = page_key.keys()
+        if not names:
+            return None
+        return {name: item[name] for name in names if name in item}
+
+    def fetch_page(self):
+        """
+        Request next page
+
+        :return: list of items or None when there are no more pages
+        """
+        if self._finished:
+            return None
+        if self.limit is not None and self.count >= self.limit:
+            self._finished = True
+            return None
+        options = dict(self.options)
+        request_limit = self._get_request_limit()
+        if request_limit is not None:
+            options['Limit'] = request_limit
+        if self.last_evaluated_key:
+            options['ExclusiveStartKey'] = self.last_evaluated_key
+        response = self.fetch(**options)
+        self.pages_count += 1
+        self.scanned_count += response.get('ScannedCount', 0)
+        self.last_evaluated_key = response.get('LastEvaluatedKey', None)
+        if not self.last_evaluated_key:
+            self._finished = True
+        return response.get('Items', [])
+
+    def _convert(self, page):
+        if self.page_converter is None:
+            return page
+        return self.page_converter(page)
+
+    def _pages(self):
+        while True:
+            page = self.fetch_page()
+            if page is None:
+                break
+            page_key = self.last_evaluated_key
+            if page:
+                self.count += len(page)
+                yield page
+            self.last_evaluated_key = page_key
+
+    def pages(self):
+        for page in self._pages():
+            yield self._convert(page)
+
+    def __iter__(self):
+        for page in self._pages():
+            page_key = self.last_evaluated_key
+            results = self._convert(page)
+            last = len(page) - 1
+            for index, item in enumerate(page):
+                if index != last:
+                    # resume token points to current item until the page is exhausted
+                    self.last_evaluated_key = self._get_item_key(item, page_key)
+                else:
+                    self.last_evaluated_key = page_key
+                yield results[index]
@@ -0,0 +1,252 @@
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from six.moves import queue
+
+from dynamite.config import dynamite_options
+from dynamite.pagination import Paginator
+
+# threads of the process for parallel scans and concurrent batches
+if 'max_workers' not in dynamite_options.PARALLEL:
+    dynamite_options.PARALLEL.max_workers = 32
+
+_DONE = object()
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Thread pool shared by ParallelScan and thread_map, threads are reused by calls and recreated after fork"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=dynamite_options.PARALLEL.max_workers)
+            _executor_pid = os.getpid()
+    return _executor
+
+
+class _Error(object):
+    def __init__(self, exception):
+        self.exception = exception
+
+
+class ParallelScan(object):
+    """
+    Segmented scan: TotalSegments workers on a thread pool, merged into one iterator
+
+    Every worker thread uses its own boto3 resource and paginates its segments lazily.
+    Pages are passed to the consumer through bounded queues, so workers wait
+    while the consumer is busy.
+    `last_evaluated_key` is a resume token: {segment: key} for unfinished segments,
+    pass it as `start_key` to continue.
+    """
+
+    def __init__(self, items, segments, max_workers=None, ordered=False, queue_size=None,
+                 page_size=None, limit=None, start_key=None, options=None, page_converter=None, key_names=None):
+        """
+        :param items: TableItems
+        :param segments: TotalSegments
+        :param max_workers: threads count, segments by default
+        :param ordered: yield segment by segment, otherwise pages are yielded as they arrive
+        :param queue_size: max pages waiting for consumer (per segment if ordered)
+        :param page_size: hint for Limit of every request
+        :param limit: total number of items
+        :param start_key: resume token from previous scan
+        :param options: kwargs for table.scan
+        :param page_converter: page_converter(items) -> list of results, see Paginator
+        :param key_names: key names of table and index for resume tokens, keys of table by default
+        """
+        self.items = items
+        self.segments = segments
+        if max_workers is None:
+            max_workers = segments
+        self.max_workers = min(max_workers, segments)
+        self.ordered = ordered
+        if queue_size is None:
+            queue_size = 2 if ordered else self.max_workers * 2
+        self.queue_size = queue_size
+        self.page_size = page_size
+        self.limit = limit
+        self.options = dict(options or {})
+        self.page_converter = page_converter
+        self.key_names = key_names or items.get_key_names()
+        if start_key is None:
+            start_key = {segment: None for segment in range(segments)}
+        self.start_key = dict(start_key)
+        self.count = 0
+        self.pages_count = 0
+        self._tokens = dict(self.start_key)
+        self._stop = threading.Event()
+
+    @property
+    def last_evaluated_key(self):
+        if not self._tokens:
+            return None
+        return dict(self._tokens)
+
+    def _put(self, target, value):
+        while not self._stop.is_set():
+            try:
+                target.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get_queue(self, segment):
+        if self.ordered:
+            return self._queues[segment]
+        return self._queues
+
+    def _scan_segment(self, segment):
+        target = self._get_queue(segment)
+        options = dict(self.options)
+        options.update({
+            'Segment': segment,
+            'TotalSegments': self.segments,
+        })
+        paginator = Paginator(
+            functools.partial(self.items._request, 'scan'),
+            options=options,
+            page_size=self.page_size,
+            limit=self.limit,
+            start_key=self.start_key[segment],
+            key_names=self.key_names,
+        )
+        for page in paginator.pages():
+            if not self._put(target, (segment, page, paginator.last_evaluated_key)):
+                return False
+        return self._put(target, (segment, _DONE, None))
+
+    def _worker(self, pending):
+        while not self._stop.is_set():
+            try:
+                segment = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                # every worker thread requests with own boto3 resource
+                if not self._scan_segment(segment):
+                    return
+            except Exception as e:
+                self._put(self._get_queue(segment), (segment, _Error(e), None))
+                return
+
+    def _start(self):
+        pending = queue.Queue()
+        for segment in sorted(self.start_key):
+            pending.put(segment)
+        if self.ordered:
+            self._queues = {segment: queue.Queue(self.queue_size) for segment in self.start_key}
+        else:
+            self._queues = queue.Queue(self.queue_size)
+        executor = get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(self._worker, pending)
+
+    def _segment_pages(self):
+        active = set(self.start_key)
+        if self.ordered:
+            for segment in sorted(self.start_key):
+                while True:
+                    message = self._queues[segment].get()
+                    yield message
+                    if message[1] is _DONE:
+                        break
+        else:
+            while active:
+                message = self._queues.get()
+                if message[1] is _DONE:
+                    active.discard(message[0])
+                yield message
+
+    def _iter_messages(self):
+        if self.limit is not None and self.limit <= 0:
+            return
+        self._start()
+        try:
+            for segment, page, token in self._segment_pages():
+                if page is _DONE:
+                    self._tokens.pop(segment, None)
+                    continue
+                if isinstance(page, _Error):
+                    raise page.exception
+                if self.limit is not None and len(page) > self.limit - self.count:
+                    page = page[:self.limit - self.count]
+                    token = self._get_item_key(page[-1])
+                self.count += len(page)
+                self.pages_count += 1
+                yield segment, page, token
+                if self.limit is not None and self.count >= self.limit:
+                    break
+        finally:
+            self._stop.set()
+
+    def _get_item_key(self, item):
+        return {name: item[name] for name in self.key_names if name in item}
+
+    def _set_token(self, segment, token):
+        if token is None:
+            # segment is exhausted
+            self._tokens.pop(segment, None)
+        else:
+            self._tokens[segment] = token
+
+    def _convert(self, page):
+        if self.page_converter is None:
+            return page
+        return self.page_converter(page)
+
+    def pages(self):
+        for segment, page, token in self._iter_messages():
+            self._set_token(segment, token)
+            yield self._convert(page)
+
+    def __iter__(self):
+        for segment, page, token in self._iter_messages():
+            results = self._convert(page)
+            last = len(page) - 1
+            for index, item in enumerate(page):
+                if index != last:
+                    self._set_token(segment, self._get_item_key(item))
+                else:
+                    self._set_token(segment, token)
+                yield results[index]
+
+
+def thread_map(func, items, max_workers):
+    """
+    Map func over items on the shared thread pool, results are in order of items
+
+    :param func: func(item)
+    :param items: list of args
+    :param max_workers: max items in progress at once
+    """
+    results = [None] * len(items)
+    errors = []
+    pending = queue.Queue()
+    for index, item in enumerate(items):
+        pending.put((index, item))
+
+    def worker():
+        while not errors:
+            try:
+                index, item = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = func(item)
+            except Exception as e:
+                errors.append(e)
+
+    executor = get_executor()
+    futures = [executor.submit(worker) for _ in range(min(max_workers, len(items)))]
+    for future in futures:
+        future.result()
+    if errors:
+        raise errors[0]
+    return results
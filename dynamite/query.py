@@ -0,0 +1,334 @@
+import copy
+import functools
+import re
+
+from dynamite.indexes import find_index
+
+KEY_OPERATORS = {
+    'eq': '{name} = {value}',
+    'lt': '{name} < {value}',
+    'lte': '{name} <= {value}',
+    'gt': '{name} > {value}',
+    'gte': '{name} >= {value}',
+    'between': '{name} BETWEEN {value[0]} AND {value[1]}',
+    'begins_with': 'begins_with({name}, {value})',
+}
+
+FILTER_OPERATORS = dict(KEY_OPERATORS)
+FILTER_OPERATORS.update({
+    'ne': '{name} <> {value}',
+    'in': '{name} IN ({values})',
+    'contains': 'contains({name}, {value})',
+    'exists': 'attribute_exists({name})',
+    'not_exists': 'attribute_not_exists({name})',
+})
+
+# operators with several values or without value
+MULTI_VALUE_OPERATORS = set(['between', 'in'])
+NO_VALUE_OPERATORS = set(['exists', 'not_exists'])
+
+LOOKUP_SEPARATOR = '__'
+
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_lookup(lookup):
+    """
+    :param lookup: 'name' or 'name__operator'
+    :return: name, operator
+    """
+    if LOOKUP_SEPARATOR in lookup:
+        return tuple(lookup.rsplit(LOOKUP_SEPARATOR, 1))
+    return lookup, 'eq'
+
+
+class ExpressionBuilder(object):
+    """Placeholders of names and values shared by all expressions of one request"""
+
+    def __init__(self, convert=None):
+        """
+        :param convert: convert(name, value) -> db value
+        """
+        self.convert = convert
+        self.names = {}
+        self.values = {}
+        self._name_placeholders = {}
+
+    def name(self, name):
+        if name not in self._name_placeholders:
+            placeholder = '#n{}'.format(len(self._name_placeholders))
+            self._name_placeholders[name] = placeholder
+            self.names[placeholder] = name
+        return self._name_placeholders[name]
+
+    def value(self, name, value):
+        placeholder = ':v{}'.format(len(self.values))
+        if self.convert is not None:
+            value = self.convert(name, value)
+        self.values[placeholder] = value
+        return placeholder
+
+    def condition(self, name, operator, value, operators):
+        """:return: condition expression of one lookup"""
+        if operator not in operators:
+            raise QueryError('Unsupported operator {} for {}'.format(operator, name))
+        placeholder = self.name(name)
+        if operator in NO_VALUE_OPERATORS:
+            if not value:
+                operator = 'exists' if operator == 'not_exists' else 'not_exists'
+            return operators[operator].format(name=placeholder)
+        if operator in MULTI_VALUE_OPERATORS:
+            values = [self.value(name, item) for item in value]
+            if operator == 'between' and len(values) != 2:
+                raise QueryError('between needs two values for {}'.format(name))
+            return operators[operator].format(name=placeholder, value=values, values=', '.join(values))
+        return operators[operator].format(name=placeholder, value=self.value(name, value))
+
+    def conditions(self, lookups, operators):
+        """
+        :param lookups: list of (name, operator, value)
+        :return: conditions joined with AND or None
+        """
+        expressions = [self.condition(name, operator, value, operators) for name, operator, value in lookups]
+        if not expressions:
+            return None
+        return ' AND '.join(expressions)
+
+    def projection(self, names):
+        return ', '.join(self.name(name) for name in names)
+
+
+class Query(object):
+    """
+    Lazy chainable query
+
+        Model.objects.where(hash=1, range__between=(1, 10)).filter(tags__contains='a').only('a').limit(10)
+
+    Every method returns a new query, request is compiled once per query and
+    sent only on iteration. `hash` and `range` in where are names of key fields.
+    Without where conditions the table is scanned.
+    Values of model fields are converted with to_db of fields.
+    IndexName is chosen automatically when conditions match a secondary index.
+    """
+
+    def __init__(self, items, model=None):
+        """
+        :param items: TableItems
+        :param model: Model for conversions of values and results, None for raw items
+        """
+        self.items = items
+        self.model = model
+        self._key_lookups = []
+        self._filter_lookups = []
+        self._projection = None
+        self._limit = None
+        self._page_size = None
+        self._start_key = None
+        self._options = {}
+        self._compiled = None
+
+    def _clone(self):
+        query = copy.copy(self)
+        query._key_lookups = list(self._key_lookups)
+        query._filter_lookups = list(self._filter_lookups)
+        query._options = dict(self._options)
+        query._compiled = None
+        return query
+
+    def _get_lookups(self, kwargs, aliases=None):
+        lookups = []
+        for lookup in sorted(kwargs):
+            name, operator = parse_lookup(lookup)
+            if aliases and name in aliases:
+                name = aliases[name]
+            lookups.append((name, operator, kwargs[lookup]))
+        return lookups
+
+    def _get_key_aliases(self):
+        hash_name = self.items.table.get_hash_name()
+        range_name = self.items.table.get_range_name()
+        aliases = {'hash': hash_name}
+        if range_name:
+            aliases['range'] = range_name
+        return aliases
+
+    def where(self, **kwargs):
+        """Key conditions: hash=value and optional range__<operator>=value"""
+        query = self._clone()
+        query._key_lookups.extend(self._get_lookups(kwargs, self._get_key_aliases()))
+        return query
+
+    def filter(self, **kwargs):
+        """Filter conditions, applied by DynamoDB after read"""
+        query = self._clone()
+        query._filter_lookups.extend(self._get_lookups(kwargs))
+        return query
+
+    def only(self, *names):
+        """Read only these attributes, key attributes are always read"""
+        query = self._clone()
+        query._projection = list(query._projection or [])
+        for name in names:
+            if name not in query._projection:
+                query._projection.append(name)
+        return query
+
+    def limit(self, limit):
+        query = self._clone()
+        query._limit = limit
+        return query
+
+    def page_size(self, page_size):
+        query = self._clone()
+        query._page_size = page_size
+        return query
+
+    def start(self, start_key):
+        """Continue from last_evaluated_key of previous results"""
+        query = self._clone()
+        query._start_key = start_key
+        return query
+
+    def reverse(self):
+        query = self._clone()
+        query._options['ScanIndexForward'] = not query._options.get('ScanIndexForward', True)
+        return query
+
+    def index(self, name):
+        query = self._clone()
+        query._options['IndexName'] = name
+        return query
+
+    def consistent(self, consistent_read=True):
+        query = self._clone()
+        query._options['ConsistentRead'] = consistent_read
+        return query
+
+    def _convert(self, name, value):
+        if self.model is None:
+            return value
+        field = self.model._fields_.get(name)
+        if field is None:
+            return value
+        return field.to_db(value)
+
+    def _get_index(self):
+        """
+        Index of key conditions: set by index() or found by names of conditions
+
+        :return: dynamite.indexes.BaseIndex or None for table key
+        """
+        table = self.items.table
+        names = [name for name, _, _ in self._key_lookups]
+        eq_names = [name for name, operator, _ in self._key_lookups if operator == 'eq']
+        for name, operator, _ in self._key_lookups:
+            if operator not in KEY_OPERATORS:
+                raise QueryError('Unsupported operator {} for key {}'.format(operator, name))
+        if 'IndexName' in self._options:
+            index = table.get_index(self._options['IndexName'])
+            if index is None or index.match(table, eq_names, names):
+                return index
+        else:
+            index = find_index(table, eq_names, names)
+            if index is not None:
+                return index
+            if table.get_hash_name() in eq_names and set(names) <= set(self.items.get_key_names()):
+                return None
+        raise QueryError('No key or index for conditions on {}'.format(', '.join(names)))
+
+    def compile(self):
+        """
+        :return: kwargs for query or scan of boto3 table
+        """
+        if self._compiled is not None:
+            return self._compiled
+        builder = ExpressionBuilder(convert=self._convert)
+        options = dict(self._options)
+        key_names = self.get_key_names()
+        if self._key_lookups:
+            index = self._get_index()
+            if index is not None:
+                options['IndexName'] = index.name
+            options['KeyConditionExpression'] = builder.conditions(self._key_lookups, KEY_OPERATORS)
+        else:
+            options.pop('ScanIndexForward', None)
+        filter_expression = builder.conditions(self._filter_lookups, FILTER_OPERATORS)
+        if filter_expression:
+            options['FilterExpression'] = filter_expression
+        if self._projection:
+            names = list(self._projection)
+            for name in reversed(key_names):
+                if name not in names:
+                    names.insert(0, name)
+            options['ProjectionExpression'] = builder.projection(names)
+        if builder.names:
+            options['ExpressionAttributeNames'] = builder.names
+        if builder.values:
+            options['ExpressionAttributeValues'] = builder.values
+        self._compiled = options
+        return options
+
+    def get_key_names(self):
+        """:return: key names of table and of index of query, they are in every item of results"""
+        key_names = self.items.get_key_names()
+        if self._key_lookups:
+            index = self._get_index()
+            if index is not None:
+                key_names += [name for name in index.get_key_names(self.items.table) if name not in key_names]
+        return key_names
+
+    @property
+    def operation(self):
+        return 'query' if self._key_lookups else 'scan'
+
+    def get_results(self):
+        """:return: lazy paginated results, new request on every call"""
+        fetch = self.items.query if self._key_lookups else self.items.scan
+        results = fetch(page_size=self._page_size, limit=self._limit, start_key=self._start_key,
+                        key_names=self.get_key_names(), **self.compile())
+        if self.model is not None:
+            from dynamite.models import ModelResults
+            results = ModelResults(self.model, results)
+        return results
+
+    def pages(self):
+        return self.get_results().pages()
+
+    def __iter__(self):
+        return iter(self.get_results())
+
+    def rows(self, names=None, tuples=False):
+        """Raw rows of model query, see ModelResults.rows"""
+        if self.model is None:
+            raise QueryError('Rows are converted by fields of model')
+        return self.get_results().rows(names=names, tuples=tuples)
+
+    def first(self):
+        for result in self.limit(1):
+            return result
+        return None
+
+    def count(self):
+        """Count of matched items with Select=COUNT, items are not transferred"""
+        options = dict(self.compile())
+        options.pop('ProjectionExpression', None)
+        options['Select'] = 'COUNT'
+        if 'ExpressionAttributeNames' in options:
+            # names of projection are not allowed without projection
+            used = set(re.findall(r'#n\d+', ' '.join(
+                options.get(name, '') for name in ('KeyConditionExpression', 'FilterExpression'))))
+            names = {key: value for key, value in options['ExpressionAttributeNames'].items() if key in used}
+            if names:
+                options['ExpressionAttributeNames'] = names
+            else:
+                del options['ExpressionAttributeNames']
+        fetch = functools.partial(self.items._request, self.operation)
+        count = 0
+        while True:
+            response = fetch(**options)
+            count += response.get('Count', 0)
+            if not response.get('LastEvaluatedKey'):
+                return count
+            options['ExclusiveStartKey'] = response['LastEvaluatedKey']
@@ -0,0 +1,194 @@
+"""
+Retry policy of requests
+
+Retryable errors (throttling, transaction conflicts, 5xx) are retried with
+exponential backoff and full jitter. Retries are limited by attempts, by
+deadline of operation and by retry budget: every request earns a part of
+retry token, so retries can not multiply load when DynamoDB is in trouble.
+"""
+import collections
+import threading
+import time
+
+from botocore import exceptions as boto_exceptions
+from dynamite.config import dynamite_options
+from dynamite.utils import backoff_delay
+
+if 'enabled' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.enabled = True
+if 'max_attempts' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.max_attempts = 4
+if 'base' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.base = 0.05
+if 'cap' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.cap = 5.0
+# seconds for all attempts of operation, None for no deadline
+if 'deadline' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.deadline = None
+# {operation: seconds}, e.g. {'get_item': 0.5}
+if 'deadlines' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.deadlines = {}
+# retry tokens earned by every request
+if 'budget_ratio' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.budget_ratio = 0.1
+if 'budget_max' not in dynamite_options.RETRY:
+    dynamite_options.RETRY.budget_max = 100
+
+RETRYABLE_ERRORS = frozenset([
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'TransactionConflictException',
+    'TransactionInProgressException',
+    'InternalServerError',
+    'ServiceUnavailable',
+])
+
+
+def get_error_code(error):
+    """:return: code of retryable error or None"""
+    if isinstance(error, boto_exceptions.ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        if code in RETRYABLE_ERRORS:
+            return code
+        if code == 'TransactionCanceledException':
+            reasons = [reason.get('Code') for reason in error.response.get('CancellationReasons', [])]
+            if 'TransactionConflict' in reasons:
+                return 'TransactionConflict'
+        if status >= 500:
+            return code or str(status)
+        return None
+    if isinstance(error, (boto_exceptions.ConnectionError, boto_exceptions.ReadTimeoutError)):
+        return error.__class__.__name__
+    return None
+
+
+class RetryBudget(object):
+    """Thread-safe budget of retries: requests deposit ratio of token, retry withdraws one"""
+
+    def __init__(self, ratio=None, max_tokens=None):
+        if ratio is None:
+            ratio = dynamite_options.RETRY.budget_ratio
+        if max_tokens is None:
+            max_tokens = dynamite_options.RETRY.budget_max
+        self.ratio = ratio
+        self.max_tokens = float(max_tokens)
+        self.tokens = self.max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """:return: False if budget is exhausted"""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    def __init__(self, max_attempts=None, base=None, cap=None, deadline=None, deadlines=None, budget=None,
+                 clock=time.time, sleep=time.sleep):
+        """
+        :param max_attempts: attempts of operation including the first one
+        :param base: seconds of first backoff
+        :param cap: max seconds of backoff
+        :param deadline: seconds for all attempts of any operation
+        :param deadlines: {operation: seconds}
+        :param budget: RetryBudget, shared by all operations of policy
+        :param clock: for tests
+        :param sleep: for tests
+        """
+        options = dynamite_options.RETRY
+        self.max_attempts = options.max_attempts if max_attempts is None else max_attempts
+        self.base = options.base if base is None else base
+        self.cap = options.cap if cap is None else cap
+        self.deadline = options.deadline if deadline is None else deadline
+        self.deadlines = dict(options.deadlines if deadlines is None else deadlines)
+        self.budget = budget or RetryBudget()
+        self.clock = clock
+        self.sleep = sleep
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._stats = collections.defaultdict(collections.Counter)
+
+    def get_deadline(self, operation):
+        return self.deadlines.get(operation, self.deadline)
+
+    def add_listener(self, listener):
+        """:param listener: listener(operation, attempt, code, delay), called before every retry"""
+        self.listeners.append(listener)
+
+    def _count(self, operation, name, value=1):
+        with self._lock:
+            self._stats[operation][name] += value
+
+    def call(self, operation, func, *args, **kwargs):
+        """
+        Call func and retry it on retryable errors
+
+        :return: result of func, the last error is raised when retries are over
+        """
+        started = self.clock()
+        deadline = self.get_deadline(operation)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._count(operation, 'attempts')
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                code = get_error_code(e)
+                if code is None:
+                    raise
+                self._count(operation, 'error:{}'.format(code))
+                if attempt >= self.max_attempts:
+                    self._count(operation, 'exhausted')
+                    raise
+                delay = backoff_delay(attempt - 1, base=self.base, cap=self.cap)
+                if deadline is not None and self.clock() + delay - started > deadline:
+                    self._count(operation, 'deadline_exceeded')
+                    raise
+                if not self.budget.withdraw():
+                    self._count(operation, 'budget_exhausted')
+                    raise
+                self._count(operation, 'retries')
+                self._count(operation, 'backoff', delay)
+                for listener in self.listeners:
+                    listener(operation, attempt, code, delay)
+                self.sleep(delay)
+                continue
+            self.budget.deposit()
+            return result
+
+    def stats(self):
+        """:return: {operation: {attempts, retries, backoff, error:<code>, exhausted...}}"""
+        with self._lock:
+            return {operation: dict(counter) for operation, counter in self._stats.items()}
+
+
+_default_policy = None
+_default_policy_lock = threading.Lock()
+
+
+def get_retry_policy(retry=None):
+    """
+    :param retry: RetryPolicy, True for shared policy by dynamite_options.RETRY,
+        None for shared policy only if dynamite_options.RETRY.enabled
+    :return: RetryPolicy or None
+    """
+    global _default_policy
+    if isinstance(retry, RetryPolicy):
+        return retry
+    if retry is None:
+        retry = dynamite_options.RETRY.enabled
+    if not retry:
+        return None
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = RetryPolicy()
+        return _default_policy
@@ -1,8 +1,117 @@
-class Schema(object):
+import collections
+
+import six
+
+from dynamite.instrumentation import measure_serialization
+
+
+class FieldDescriptor(object):
+    """Data descriptor, routes attribute of instance to state of field"""
+
+    def __init__(self, name, field, renamed=False):
+        """:param renamed: descriptor of renamed field, the field itself stays under its attribute"""
+        self.name = name
+        self.field = field
+        self.renamed = renamed
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self.field
+        if self.field.mutable:
+            # value may be changed in place
+            instance._dirty_.add(self.name)
+        return instance._state_.get(self.name)
+
+    def __set__(self, instance, value):
+        instance._set_state(self.name, value)
+
+
+class ConverterPlan(object):
+    """
+    Conversion of db items to state of schema, compiled once per class
+
+    Fields with identity to_python are copied as is, other fields are converted
+    column by column for a whole page by to_python_many, fields of the same class
+    one after another.
+    """
+
+    def __init__(self, fields):
+        from dynamite.fields import BaseField
+
+        self.fields = fields
+        self.names = sorted(fields)
+        self.copied = []
+        groups = collections.OrderedDict()
+        for name in self.names:
+            field = fields[name]
+            if type(field).to_python is BaseField.to_python and \
+                    type(field).to_python_many is BaseField.to_python_many:
+                self.copied.append(name)
+            else:
+                groups.setdefault(type(field), []).append(name)
+        self.converted = [name for names in groups.values() for name in names]
+        self.defaults = [(name, fields[name].default) for name in self.names]
+
+    def get_columns(self, items, names=None):
+        """:return: {name: [python value or None for every item]}"""
+        columns = {}
+        for name in self.copied:
+            if names is None or name in names:
+                columns[name] = [item.get(name) for item in items]
+        for name in self.converted:
+            if names is None or name in names:
+                columns[name] = self.fields[name].to_python_many([item.get(name) for item in items])
+        return columns
+
+    def get_states(self, items, validate=True):
+        """:return: list of states: defaults updated by converted values"""
+        columns = self.get_columns(items)
+        if validate:
+            for name, values in columns.items():
+                field_validate = self.fields[name].validate
+                for value in values:
+                    if value is not None:
+                        field_validate(value)
+        states = []
+        for index in range(len(items)):
+            state = {}
+            for name, default in self.defaults:
+                value = columns[name][index]
+                if value is None:
+                    value = default() if callable(default) else default
+                state[name] = value
+            states.append(state)
+        return states
+
+    def get_rows(self, items, names=None, tuples=False):
+        """
+        :param names: names of fields, all fields by default
+        :param tuples: rows are tuples of values in order of names, otherwise dicts
+        :return: list of rows with python values, None for missing values
+        """
+        names = list(names or self.names)
+        columns = self.get_columns(items, set(names))
+        if tuples:
+            return list(zip(*[columns[name] for name in names])) if names else [() for _ in items]
+        return [{name: columns[name][index] for name in names} for index in range(len(items))]
+
+
+class SchemaMeta(type):
+    """Compiles fields once, at class creation"""
+
+    def __init__(cls, name, bases, attrs):
+        super(SchemaMeta, cls).__init__(name, bases, attrs)
+        if any(isinstance(base, SchemaMeta) for base in bases):
+            cls._get_fields()
+
+
+class Schema(six.with_metaclass(SchemaMeta, object)):
     _state_ = None
+    _dirty_ = None
     _fields_ = None
     _range_field = None
     _hash_field = None
+    _plan_ = None
     _ignore_elems = set([])
 
     @classmethod
@@ -14,13 +123,14 @@ class Schema(object):
     _defaults_to_python = False
 
     def _update_state(self, **kwargs):
-        self._set_default_state(**kwargs)
+        self._set_default_state(exclude=kwargs)
         for key in kwargs:
             if key in self._fields:
                 self._set_state(key, kwargs[key])
 
     def __init__(self, **kwargs):
         self._state_ = {}
+        self._dirty_ = set()
         if self.__class__._fields_ is None:
             self._get_fields()
         self._update_state(**kwargs)
@@ -31,29 +141,27 @@ class Schema(object):
             value = value()
         return value
 
-    def _set_default_state(self, **kwargs):
-        fields = {k: self._fields[k] for k in self._fields if k not in kwargs}
-        for field in fields:
-            if self._get_state(field) is None:
+    def _set_default_state(self, exclude=(), validate=True):
+        for field in self._fields:
+            if field not in exclude and self._get_state(field) is None:
                 value = self._get_default_value(field)
-                self._set_state(field, value)
+                self._set_state(field, value, validate=validate)
 
-    def _set_state(self, name, value):
-        self._fields[name].validate(value)
-        self._state[name] = value
+    def _set_state(self, name, value, validate=True):
+        """Values are validated only here, on assignment"""
+        if validate:
+            self.__class__._fields_[name].validate(value)
+        self._state_[name] = value
+        self._dirty_.add(name)
         return value
 
     def _get_state(self, name):
-        if name in self._state:
-            value = self._state[name]
-            if value is not None:
-                self._fields[name].validate(value)
-        else:
-            value = None
-        return value
+        return self._state_.get(name)
 
     def __getitem__(self, item):
         if item in self._fields:
+            if self._fields[item].mutable:
+                self._dirty_.add(item)
             return self._get_state(item)
         return None
 
@@ -72,21 +180,28 @@ class Schema(object):
     def _get_fields(cls):
         from dynamite.fields import BaseField
 
-        elems = [elem for elem in dir(cls) if not cls._ignore_elem(elem, BaseField)]
-        cls._fields_ = {elem: getattr(cls, elem) for elem in elems}
-
-        pre_fields = dict(cls._fields_)
-        for field in cls._fields_.keys():
-            if cls._fields_[field].name is not None:
-                pre_fields[cls._fields_[field].name] = cls._fields_[field]
-                del pre_fields[field]
-        cls._fields_ = pre_fields
+        fields = {}
+        elems = {}
+        for elem in dir(cls):
+            if cls._ignore_elem(elem, BaseField):
+                continue
+            attr = next(klass.__dict__[elem] for klass in cls.__mro__ if elem in klass.__dict__)
+            if isinstance(attr, FieldDescriptor) and attr.renamed:
+                continue
+            field = getattr(cls, elem)
+            name = field.name if field.name is not None else elem
+            fields[name] = field
+            elems[name] = elem
+        cls._fields_ = fields
+        cls._plan_ = None
 
         for field in cls._fields_:
             if cls._fields_[field]._range:
                 cls._range_field = field
             if cls._fields_[field]._hash:
                 cls._hash_field = field
+            if not isinstance(cls.__dict__.get(field), FieldDescriptor):
+                setattr(cls, field, FieldDescriptor(field, cls._fields_[field], renamed=elems[field] != field))
 
     @property
     def _fields(self):
@@ -96,18 +211,6 @@ class Schema(object):
     def _state(self):
         return self._state_
 
-    def __setattr__(self, key, value):
-        if self._fields is not None and key in self._fields:
-            self._set_state(key, value)
-        else:
-            super(Schema, self).__setattr__(key, value)
-
-    def __getattribute__(self, item):
-        fields = super(Schema, self).__getattribute__('_fields_')
-        if fields is not None and item in fields:
-            return self._get_state(item)
-        return super(Schema, self).__getattribute__(item)
-
     @classmethod
     def to_db_cls(cls, data):
         result = {}
@@ -121,15 +224,73 @@ class Schema(object):
         return result
 
     def to_db(self):
-        return self.to_db_cls(self._state)
+        with measure_serialization(self.__class__.__name__, 'to_db'):
+            return self.to_db_cls(self._state)
 
     @classmethod
-    def to_python_cls(cls, data):
-        instance = cls()
-        instance.to_python(data)
-        return instance
+    def to_python_cls(cls, data, validate=True):
+        """
+        :param validate: False for trusted data, e.g. items of own table,
+            instance is filled without __init__ and validation
+        """
+        with measure_serialization(cls.__name__, 'to_python'):
+            if validate:
+                instance = cls()
+            else:
+                instance = cls.__new__(cls)
+                instance._state_ = {}
+                instance._dirty_ = set()
+                instance._set_default_state(validate=False)
+            instance.to_python(data, validate=validate)
+            instance._dirty_.clear()
+            return instance
 
-    def to_python(self, data):
+    @classmethod
+    def _get_plan(cls):
+        plan = cls.__dict__.get('_plan_')
+        if plan is None:
+            if cls._fields_ is None:
+                cls._get_fields()
+            plan = cls._plan_ = ConverterPlan(cls._fields_)
+        return plan
+
+    @classmethod
+    def from_db_many(cls, items, validate=True):
+        """
+        Instances of page of items, converted by precompiled plan of class
+
+        :param items: db items, None for missing items
+        :param validate: False for trusted data, validated are loaded values only
+        :return: list of instances, None for None items
+        """
+        found = [item for item in items if item is not None]
+        with measure_serialization(cls.__name__, 'to_python', items=len(found)):
+            states = iter(cls._get_plan().get_states(found, validate=validate))
+            instances = []
+            for item in items:
+                if item is None:
+                    instances.append(None)
+                    continue
+                instance = cls.__new__(cls)
+                instance._state_ = next(states)
+                instance._dirty_ = set()
+                instances.append(instance)
+            return instances
+
+    @classmethod
+    def rows_many(cls, items, names=None, tuples=False):
+        """
+        Raw rows of items: python values without instances, defaults and validation
+
+        :param names: names of fields, all fields by default
+        :param tuples: tuples in order of names instead of dicts
+        """
+        with measure_serialization(cls.__name__, 'to_rows', items=len(items)):
+            return cls._get_plan().get_rows(items, names=names, tuples=tuples)
+
+    def to_python(self, data, validate=True):
+        """Loaded fields are not dirty"""
+        loaded = []
         for field in self._fields:
             value = None
             if field in data:
@@ -137,5 +298,14 @@ class Schema(object):
             elif self._defaults_to_python:
                 value = self._get_default_value(field)
             if value is not None:
-                self._set_state(field, value)
+                self._set_state(field, value, validate=validate)
+                loaded.append(field)
+        self._dirty_.difference_update(loaded)
         return self
+
+    def get_dirty_fields(self):
+        """Fields changed since load"""
+        return set(self._dirty_)
+
+    def mark_clean(self):
+        self._dirty_.clear()
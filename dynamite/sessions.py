@@ -0,0 +1,198 @@
+import threading
+from collections import OrderedDict
+
+from dynamite.items import TRANSACT_WRITE_SIZE
+
+_local = threading.local()
+
+PUT = 'put'
+CREATE = 'create'
+DELETE = 'delete'
+
+
+def get_session():
+    """:return: current Session of the thread or None"""
+    sessions = getattr(_local, 'sessions', None)
+    if sessions:
+        return sessions[-1]
+    return None
+
+
+class Session(object):
+    """
+    Unit of work with identity map
+
+    In session, Model.get returns the same instance for the same key.
+    Keys registered by Model.prefetch are requested with one BatchGetItem
+    per model on the next get or flush.
+    Writes are delayed until exit without exception: batch writes,
+    or one transaction if transactional.
+    Batch writes put whole items, and new models are created immediately,
+    because creation is conditional. Transactions create new models with
+    condition and update loaded models partially.
+    Writes stay pending until they succeed, so failed flush may be repeated.
+    """
+
+    def __init__(self, transactional=False):
+        self.transactional = transactional
+        self.identity_map = {}
+        self.pending_gets = OrderedDict()
+        self.pending_writes = OrderedDict()
+
+    def __enter__(self):
+        if getattr(_local, 'sessions', None) is None:
+            _local.sessions = []
+        _local.sessions.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.sessions.remove(self)
+        if exc_type is None:
+            self.flush()
+        else:
+            self.rollback()
+
+    @staticmethod
+    def _normalize_key(model, key):
+        if isinstance(key, dict):
+            return model.items.get_key_from_item(key)
+        return {model.hash: key}
+
+    def _get_identity(self, model, key):
+        return model, model.items._get_key_id(key)
+
+    def register(self, instance):
+        """Add loaded model to identity map, model of the map wins"""
+        identity = self._get_identity(instance.__class__, instance.key)
+        return self.identity_map.setdefault(identity, instance)
+
+    def prefetch(self, model, keys):
+        """Register keys for one BatchGetItem on next get or flush"""
+        pending = self.pending_gets.setdefault(model, OrderedDict())
+        for key in keys:
+            key = self._normalize_key(model, key)
+            identity = self._get_identity(model, key)
+            if identity not in self.identity_map:
+                pending[identity[1]] = key
+
+    def flush_gets(self):
+        pending_gets = self.pending_gets
+        self.pending_gets = OrderedDict()
+        for model, keys in pending_gets.items():
+            if not keys:
+                continue
+            items = model.items.batch_get(list(keys.values()))
+            for key_id, instance in zip(keys, model.from_db_many(items)):
+                identity = (model, key_id)
+                if identity in self.identity_map:
+                    continue
+                if instance is None:
+                    self.identity_map[identity] = None
+                else:
+                    self.register(instance)
+
+    def get(self, model, key):
+        key = self._normalize_key(model, key)
+        identity = self._get_identity(model, key)
+        if identity not in self.identity_map:
+            self.prefetch(model, [key])
+            self.flush_gets()
+        return self.identity_map.get(identity)
+
+    def get_many(self, model, keys):
+        keys = [self._normalize_key(model, key) for key in keys]
+        self.prefetch(model, keys)
+        self.flush_gets()
+        return [self.identity_map.get(self._get_identity(model, key)) for key in keys]
+
+    def save(self, instance):
+        """Delay save of model until flush"""
+        model = instance.__class__
+        operation = PUT
+        if not instance.hk:
+            if not self.transactional:
+                instance._save()
+                self.register(instance)
+                return
+            operation = CREATE
+            instance[model._hash_field] = model.get_table().hash_generator()
+        identity = self._get_identity(model, instance.key)
+        self._add_write(identity, operation, instance)
+        self.identity_map[identity] = instance
+
+    def delete(self, model, key):
+        """Delay delete until flush"""
+        key = self._normalize_key(model, key)
+        identity = self._get_identity(model, key)
+        self._add_write(identity, DELETE, key)
+        self.identity_map[identity] = None
+
+    def _add_write(self, identity, operation, value):
+        """Transaction is checked on every write, not on flush when the whole unit of work is lost"""
+        if self.transactional and identity not in self.pending_writes and \
+                len(self.pending_writes) >= TRANSACT_WRITE_SIZE:
+            raise ValueError('Maximum {} items in transaction'.format(TRANSACT_WRITE_SIZE))
+        self.pending_writes[identity] = (operation, value)
+
+    def _get_transact_item(self, model, operation, value):
+        if operation == DELETE:
+            return model.items.get_transact_delete(value)
+        if operation == PUT and value._loaded and not value._dirty_ & set([model._hash_field, model._range_field]):
+            set_attrs, remove_attrs = value.get_changes()
+            if not set_attrs and not remove_attrs:
+                return None
+            return model.items.get_transact_update(value.key, set_attrs, remove_attrs)
+        return model.items.get_transact_put(value.to_db(), create=operation == CREATE)
+
+    def flush_writes(self):
+        """Pending writes are forgotten only after success"""
+        pending_writes = self.pending_writes
+        if not pending_writes:
+            return
+        if self.transactional:
+            transact_items = []
+            for (model, key_id), (operation, value) in pending_writes.items():
+                transact_item = self._get_transact_item(model, operation, value)
+                if transact_item is not None:
+                    transact_items.append(transact_item)
+            first_model = list(pending_writes)[0][0]
+            first_model.items.transact_write(transact_items)
+            for (model, key_id), (operation, value) in pending_writes.items():
+                model.items._invalidate(dict(key_id))
+            self._written(list(pending_writes))
+        else:
+            by_model = OrderedDict()
+            for identity, (operation, value) in pending_writes.items():
+                puts, deletes, identities = by_model.setdefault(identity[0], ([], [], []))
+                if operation == DELETE:
+                    deletes.append(value)
+                else:
+                    puts.append(value.to_db())
+                identities.append(identity)
+            for model, (puts, deletes, identities) in by_model.items():
+                model.items.batch_write(puts=puts, deletes=deletes)
+                self._written(identities)
+
+    def _written(self, identities):
+        for identity in identities:
+            operation, value = self.pending_writes.pop(identity)
+            if operation != DELETE:
+                value._loaded = True
+                value.mark_clean()
+
+    def flush(self):
+        self.flush_gets()
+        self.flush_writes()
+
+    def rollback(self):
+        """Forget delayed writes"""
+        self.pending_gets.clear()
+        self.pending_writes.clear()
+
+
+def session(transactional=False):
+    """
+    with dynamite.session():
+        ...
+    """
+    return Session(transactional=transactional)
@@ -0,0 +1,67 @@
+"""
+Provisioning of tables of models
+
+Differences of declared models and DescribeTable are applied concurrently,
+waits of tables run in parallel too.
+"""
+import importlib
+
+from dynamite.models import Model
+from dynamite.parallel import thread_map
+
+DEFAULT_MAX_WORKERS = 10
+
+
+def get_models(base=Model):
+    """
+    :return: all not abstract subclasses of base, one model per table
+    """
+    models = []
+    tables = set()
+    pending = list(base.__subclasses__())
+    while pending:
+        model = pending.pop(0)
+        pending.extend(model.__subclasses__())
+        if model.__dict__.get('abstract', False):
+            continue
+        name = model.get_table_name()
+        if name not in tables:
+            tables.add(name)
+            models.append(model)
+    return models
+
+
+def import_modules(modules):
+    """Import modules with models, e.g. 'app.models'"""
+    for module in modules:
+        importlib.import_module(module)
+
+
+def get_plan(models=None, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    :param models: models for sync, all models by default
+    :return: list of (model, actions)
+    """
+    if models is None:
+        models = get_models()
+    actions = thread_map(lambda model: model.get_table().get_sync_actions(), models, max_workers)
+    return list(zip(models, actions))
+
+
+def sync(models=None, dry_run=False, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Create and update tables of models
+
+    Differences of all tables are requested before any changes, so
+    an error of one table (e.g. changed key schema) stops the sync.
+
+    :param models: models for sync, all models by default
+    :param dry_run: only return plan
+    :param max_workers: threads count
+    :return: list of (model, actions)
+    """
+    plan = get_plan(models=models, max_workers=max_workers)
+    if not dry_run:
+        changed = [(model, actions) for model, actions in plan if actions]
+        thread_map(lambda change: change[0].get_table().apply_sync_actions(change[1]), changed, max_workers)
+    return plan
@@ -1,16 +1,45 @@
+import threading
+import time
 import uuid
 
 from botocore import exceptions as boto_exceptions
 from dynamite import connection
 from dynamite import defines
+from dynamite.config import dynamite_options
+from dynamite.cache import get_cache
+from dynamite.indexes import GlobalIndex, LocalIndex
 from dynamite.items import TableItems
 import inspect
 
 
+# create missing table on first request, otherwise tables are created only by Table.create
+# or dynamite sync; True for backward compatibility
+if 'auto_create' not in dynamite_options.TABLES:
+    dynamite_options.TABLES.auto_create = True
+
+# locks of Table.create by table, creation of other tables is not blocked by waiter of one table
+_create_locks = {}
+_create_locks_lock = threading.Lock()
+
+# DescribeTable results of the process, shared by all Table objects
+_descriptions = {}
+_descriptions_lock = threading.Lock()
+
+# actions of Table.sync
+SYNC_CREATE = 'create'
+SYNC_THROUGHPUT = 'throughput'
+SYNC_CREATE_INDEX = 'create_index'
+SYNC_TTL = 'ttl'
+
+
 class KeyValidationError(ValueError):
     pass
 
 
+class TableSyncError(ValueError):
+    pass
+
+
 class Table(object):
     def hash_generator(table):
         return str(uuid.uuid4())
@@ -19,7 +48,14 @@ class Table(object):
         return '<{}>'.format(self.table.__str__())
 
     def __init__(self, name, hash_attr=None, range_attr=None, items=None, read_capacity_units=5,
-                 write_capacity_units=5, hash_generator=None):
+                 write_capacity_units=5, hash_generator=None, cache=None, indexes=None, ttl_attribute=None,
+                 throttle=None):
+        """
+        :param cache: item cache, see dynamite.cache.get_cache
+        :param indexes: list of dynamite.indexes.GlobalIndex and LocalIndex with typed attributes
+        :param ttl_attribute: name of TimeToLive attribute, enabled by sync
+        :param throttle: rate limiter of requests, see dynamite.throttle.get_limiter
+        """
         self.name = name
         if hash_attr is None:
             hash_attr = ('id', defines.STRING,)
@@ -27,10 +63,13 @@ class Table(object):
         if range_attr is None:
             range_attr = []
         self.range_attr = range_attr
+        self.indexes = list(indexes or [])
+        self.ttl_attribute = ttl_attribute
 
         self.read_capacity_units = read_capacity_units
         self.write_capacity_units = write_capacity_units
-        self._table = None
+        self._created = False
+        self._local = threading.local()
         if items is None:
             items = TableItems(self)
         else:
@@ -39,6 +78,10 @@ class Table(object):
 
         self.items = items
         self.items.table = self
+        if getattr(self.items, 'cache', None) is None:
+            self.items.cache = get_cache(cache)
+        if getattr(self.items, 'throttle', None) is None:
+            self.items.throttle = throttle
         if hash_generator is not None:
             self.hash_generator = hash_generator
 
@@ -106,9 +149,35 @@ class Table(object):
             return self.range_attr[1]
 
     def get_attribute_definitions(self):
-        return self.get_hash_attribute_list() + self.get_range_attribute_list()
+        definitions = self.get_hash_attribute_list() + self.get_range_attribute_list()
+        names = set(definition['AttributeName'] for definition in definitions)
+        for index in self.indexes:
+            for definition in index.get_attribute_definitions():
+                if definition['AttributeName'] not in names:
+                    names.add(definition['AttributeName'])
+                    definitions.append(definition)
+        return definitions
+
+    def get_global_indexes(self):
+        return [index for index in self.indexes if isinstance(index, GlobalIndex)]
+
+    def get_local_indexes(self):
+        return [index for index in self.indexes if isinstance(index, LocalIndex)]
+
+    def get_index(self, name):
+        for index in self.indexes:
+            if index.name == name:
+                return index
+        return None
 
     def _create(self):
+        options = {}
+        global_indexes = self.get_global_indexes()
+        if global_indexes:
+            options['GlobalSecondaryIndexes'] = [index.get_schema(self) for index in global_indexes]
+        local_indexes = self.get_local_indexes()
+        if local_indexes:
+            options['LocalSecondaryIndexes'] = [index.get_schema(self) for index in local_indexes]
         table = self.connection.create_table(
             TableName=self.name,
             KeySchema=self.get_key_schema(),
@@ -117,35 +186,212 @@ class Table(object):
                 'ReadCapacityUnits': self.read_capacity_units,
                 'WriteCapacityUnits': self.write_capacity_units,
             },
+            **options
         )
         table.meta.client.get_waiter('table_exists').wait(TableName=self.name)
         return table
 
     def update(self):
-        result = self.table.update(
-            AttributeDefinitions=self.get_attribute_definitions(),
-            ProvisionedThroughput={
+        """
+        Apply differences of declaration and table, see sync
+
+        :return: applied actions
+        """
+        return self.sync(create=False)
+
+    def create_global_indexes(self):
+        """
+        Create declared global indexes missing in table,
+        one index per UpdateTable as DynamoDB requires.
+        Local indexes can be created only with table.
+
+        :return: names of created indexes
+        """
+        actions = [action for action in self.get_sync_actions() if action[0] == SYNC_CREATE_INDEX]
+        self.apply_sync_actions(actions)
+        return [name for _, name in actions]
+
+    def get_sync_actions(self):
+        """
+        Differences of declared table and DescribeTable
+
+        :return: list of (action, value): (create, None), (throughput, ProvisionedThroughput),
+            (create_index, index name), (ttl, attribute name)
+        """
+        try:
+            description = self.describe(refresh=True)
+        except boto_exceptions.ClientError as e:
+            if e.response['Error']['Code'] != u'ResourceNotFoundException':
+                raise e
+            actions = [(SYNC_CREATE, None)]
+            if self.ttl_attribute:
+                actions.append((SYNC_TTL, self.ttl_attribute))
+            return actions
+
+        key_schema = sorted(description['KeySchema'], key=lambda schema: schema['KeyType'])
+        if key_schema != sorted(self.get_key_schema(), key=lambda schema: schema['KeyType']):
+            raise TableSyncError('Key schema of table {} can not be changed: {}'.format(self.name, key_schema))
+
+        actions = []
+        throughput = description.get('ProvisionedThroughput', {})
+        billing_mode = description.get('BillingModeSummary', {}).get('BillingMode')
+        if billing_mode != 'PAY_PER_REQUEST':
+            declared = {
                 'ReadCapacityUnits': self.read_capacity_units,
                 'WriteCapacityUnits': self.write_capacity_units,
-            },
-        )
-        return result
+            }
+            if any(throughput.get(name) != value for name, value in declared.items()):
+                actions.append((SYNC_THROUGHPUT, declared))
+
+        existing = set(index['IndexName'] for index in description.get('GlobalSecondaryIndexes', []))
+        for index in self.get_global_indexes():
+            if index.name not in existing:
+                actions.append((SYNC_CREATE_INDEX, index.name))
+
+        if self.ttl_attribute:
+            ttl = self.connection.client.describe_time_to_live(TableName=self.name)['TimeToLiveDescription']
+            if ttl.get('TimeToLiveStatus') not in ('ENABLED', 'ENABLING') or ttl.get('AttributeName') != self.ttl_attribute:
+                actions.append((SYNC_TTL, self.ttl_attribute))
+        return actions
+
+    def apply_sync_actions(self, actions):
+        """Apply actions of get_sync_actions and wait until table and indexes are active"""
+        client = self.connection.client
+        for action, value in actions:
+            if action == SYNC_CREATE:
+                self.create()
+            elif action == SYNC_THROUGHPUT:
+                client.update_table(TableName=self.name, ProvisionedThroughput=value)
+            elif action == SYNC_CREATE_INDEX:
+                client.update_table(
+                    TableName=self.name,
+                    AttributeDefinitions=self.get_attribute_definitions(),
+                    GlobalSecondaryIndexUpdates=[{'Create': self.get_index(value).get_schema(self)}],
+                )
+            elif action == SYNC_TTL:
+                client.update_time_to_live(
+                    TableName=self.name,
+                    TimeToLiveSpecification={'Enabled': True, 'AttributeName': value},
+                )
+            if action in (SYNC_THROUGHPUT, SYNC_CREATE_INDEX):
+                # DynamoDB allows one update of table at a time
+                self.wait_active()
+        if actions:
+            self.forget_description()
+        return actions
+
+    def wait_active(self, delay=5, max_attempts=120):
+        """Wait until table and its global indexes are active"""
+        client = self.connection.client
+        client.get_waiter('table_exists').wait(TableName=self.name)
+        for _ in range(max_attempts):
+            description = self.describe(refresh=True)
+            statuses = [index.get('IndexStatus') for index in description.get('GlobalSecondaryIndexes', [])]
+            if description['TableStatus'] == 'ACTIVE' and all(status in (None, 'ACTIVE') for status in statuses):
+                return description
+            time.sleep(delay)
+        raise TableSyncError('Table {} is not active'.format(self.name))
+
+    def sync(self, create=True, dry_run=False):
+        """
+        Create table or update it to declaration: throughput, global indexes and TTL
+
+        :param create: create missing table
+        :param dry_run: only return actions
+        :return: actions, see get_sync_actions
+        """
+        actions = self.get_sync_actions()
+        if not create:
+            actions = [action for action in actions if action[0] != SYNC_CREATE]
+        if not dry_run:
+            self.apply_sync_actions(actions)
+        return actions
 
     def _get_table(self):
         table = self.connection.Table(self.name)
         return table
 
-    @property
-    def table(self):
-        if self._table is None:
+    def create(self):
+        """
+        Create table and wait until it exists
+
+        :return: False if table already exists
+        """
+        with self._get_create_lock():
+            if self._created:
+                return False
             try:
-                self._table = self._create()
+                self._create()
+                created = True
             except boto_exceptions.ClientError as e:
-                if e.response['Error']['Code'] == u'ResourceInUseException':
-                    self._table = self._get_table()
-                else:
+                if e.response['Error']['Code'] != u'ResourceInUseException':
                     raise e
-        return self._table
+                created = False
+            self._created = True
+            self.forget_description()
+            return created
+
+    def _get_create_lock(self):
+        with _create_locks_lock:
+            return _create_locks.setdefault(self._get_description_key(), threading.Lock())
+
+    def ensure_created(self):
+        """
+        Called on ResourceNotFoundException of requests
+
+        :return: True if table is created (now or concurrently) and request may be repeated
+        """
+        if not dynamite_options.TABLES.auto_create:
+            return False
+        self._created = False
+        self.create()
+        return True
+
+    def delete(self):
+        result = self.table.delete()
+        self._created = False
+        self.forget_description()
+        return result
+
+    def _get_description_key(self):
+        config = self.connection.config
+        return str(config.get('backend')), config.get('endpoint_url'), config.get('region_name'), self.name
+
+    def describe(self, refresh=False):
+        """
+        DescribeTable, cached for the process
+
+        :param refresh: request new description
+        :return: description of table: KeySchema, GlobalSecondaryIndexes...
+        """
+        key = self._get_description_key()
+        if not refresh:
+            description = _descriptions.get(key)
+            if description is not None:
+                return description
+        description = self.connection.client.describe_table(TableName=self.name)['Table']
+        with _descriptions_lock:
+            _descriptions[key] = description
+        return description
+
+    def forget_description(self):
+        with _descriptions_lock:
+            _descriptions.pop(self._get_description_key(), None)
+
+    @property
+    def table(self):
+        """
+        boto3 table, bound to resource of the current thread
+
+        Binding makes no requests, missing table is created on first request,
+        see TableItems._request and dynamite_options.TABLES.auto_create
+        """
+        resource = self.connection.resource
+        local = self._local
+        if getattr(local, 'resource', None) is not resource:
+            local.table = self._get_table()
+            local.resource = resource
+        return local.table
 
     def __getattr__(self, item):
         """
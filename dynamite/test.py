@@ -39,6 +39,30 @@ class TestConnection(unittest.TestCase):
         self.assertEqual(t.connection.meta.client._endpoint.host, 'http://localhost:8000')
         self.assertEqual(t.connection.meta.client._client_config.region_name, 'eu-central-1')
 
+    def test_thread_resources(self):
+        import threading
+        from dynamite import connection, tables
+
+        conn = connection.Connection()
+        self.assertTrue(conn.resource is conn.resource)
+        self.assertEqual(conn.client_config.max_pool_connections, 50)
+
+        t = tables.Table(get_random_string())
+        resources = []
+        thread_tables = []
+
+        def worker():
+            resources.append(conn.resource)
+            thread_tables.append(t.table)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(id(resource) for resource in resources + [conn.resource])), 4)
+        self.assertEqual(set(id(table.meta.client) for table in thread_tables), set(id(resource.meta.client) for resource in resources))
+
 
 class TestItems(unittest.TestCase):
     def test_items(self):
@@ -71,6 +95,8 @@ class TestTables(unittest.TestCase):
         self.assertTrue(created1)
         self.assertTrue(created2)
         self.assertTrue(created3)
+        self.assertEqual(item1['id'], '123')
+        self.assertNotEqual(item2['id'], '123')
 
         table.items.update(item1)
         table.items.delete(item1)
@@ -145,6 +171,573 @@ class TestTables(unittest.TestCase):
         self.assertEqual(t.get_map_attr('1', '2', '3'), '1.2.3')
         t.delete()
 
+    def test_lazy_binding(self):
+        from botocore.exceptions import ClientError
+        from dynamite import tables
+
+        table_name = get_random_string()
+        table = tables.Table(table_name)
+        client = table.connection.client
+        self.assertEqual(table.table.name, table_name)
+        self.assertFalse(table_name in client.list_tables()['TableNames'])
+
+        dynamite_options.TABLES.auto_create = False
+        try:
+            with self.assertRaises(ClientError):
+                table.items.put(hash_attr=u'1')
+        finally:
+            dynamite_options.TABLES.auto_create = True
+        table.items.put(hash_attr=u'1')
+        self.assertTrue(table_name in client.list_tables()['TableNames'])
+        self.assertFalse(table.create())
+        self.assertTrue(tables.Table(table_name)._get_create_lock() is table._get_create_lock())
+        self.assertFalse(tables.Table(get_random_string())._get_create_lock() is table._get_create_lock())
+
+        description = table.describe()
+        self.assertEqual(description['KeySchema'], table.get_key_schema())
+        self.assertTrue(tables.Table(table_name).describe() is description)
+        table.delete()
+        self.assertFalse(table_name in client.list_tables()['TableNames'])
+        self.assertEqual(table.items.get(hash_attr=u'1'), None)
+        self.assertFalse(tables.Table(table_name).describe() is description)
+        table.delete()
+
+    def test_pagination(self):
+        from dynamite import tables
+
+        table = tables.Table(get_random_string())
+        for i in range(25):
+            table.items.create(item={'number': i})
+
+        results = table.items.scan(page_size=10)
+        self.assertEqual(len(list(results)), 25)
+        self.assertEqual(results.pages_count, 3)
+        self.assertEqual(results.last_evaluated_key, None)
+
+        self.assertEqual(len(list(table.items.all(page_size=7, limit=15))), 15)
+        self.assertEqual([len(page) for page in table.items.scan(page_size=10, limit=15).pages()], [10, 5])
+
+        results = table.items.scan(page_size=10)
+        first = []
+        for item in results:
+            first.append(item['id'])
+            if len(first) == 13:
+                break
+        token = results.last_evaluated_key
+        second = [item['id'] for item in table.items.scan(page_size=10, start_key=token)]
+        self.assertEqual(len(first) + len(second), 25)
+        self.assertEqual(set(first) | set(second), set(item['id'] for item in table.items.all()))
+
+        table.delete()
+
+    def test_parallel_scan(self):
+        from dynamite import tables
+
+        table = tables.Table(get_random_string())
+        for i in range(30):
+            table.items.create(item={'number': i})
+        all_ids = set(item['id'] for item in table.items.all())
+
+        results = table.items.scan(parallel=4, page_size=5)
+        self.assertEqual(set(item['id'] for item in results), all_ids)
+        self.assertEqual(results.last_evaluated_key, None)
+
+        results = table.items.scan(parallel=4, max_workers=2, ordered=True, queue_size=1, page_size=3)
+        self.assertEqual(len([item for page in results.pages() for item in page]), 30)
+
+        self.assertEqual(len(list(table.items.scan(parallel=3, limit=10))), 10)
+
+        results = table.items.scan(parallel=3, page_size=4)
+        first = []
+        for item in results:
+            first.append(item['id'])
+            if len(first) == 11:
+                break
+        token = results.last_evaluated_key
+        second = [item['id'] for item in table.items.scan(parallel=3, page_size=4, start_key=token)]
+        self.assertEqual(len(first) + len(second), 30)
+        self.assertEqual(set(first) | set(second), all_ids)
+
+        import threading
+        from dynamite import parallel
+
+        self.assertTrue(parallel.get_executor() is parallel.get_executor())
+        threads = threading.active_count()
+        for _ in range(3):
+            self.assertEqual(len(list(table.items.scan(parallel=4, page_size=5))), 30)
+            self.assertEqual(parallel.thread_map(lambda x: x * 2, [1, 2, 3], 3), [2, 4, 6])
+        self.assertTrue(threading.active_count() <= max(threads, dynamite_options.PARALLEL.max_workers + 1))
+
+        table.delete()
+
+    def test_batch_write(self):
+        from dynamite import tables
+
+        table = tables.Table(get_random_string())
+        stats = table.items.batch_write(puts=({'id': str(i % 10), 'number': i} for i in range(30)))
+        self.assertEqual([chunk['items'] for chunk in stats], [10])
+        self.assertEqual(table.items.get(hash_attr='1')['number'], 21)
+
+        stats = table.items.batch_write(puts=({'id': str(i), 'number': i} for i in range(40)))
+        self.assertEqual([chunk['items'] for chunk in stats], [25, 15])
+        self.assertEqual(len(list(table.items.all())), 40)
+
+        stats = table.items.batch_write(deletes=[{'id': str(i)} for i in range(30)], puts=[{'id': 'new'}])
+        self.assertEqual(stats[0]['puts'], 1)
+        self.assertEqual(sum(chunk['deletes'] for chunk in stats), 30)
+        self.assertEqual(len(list(table.items.all())), 11)
+
+        table.delete()
+
+    def test_batch_get(self):
+        from dynamite import tables
+
+        table = tables.Table(get_random_string())
+        table.items.batch_write(puts=({'id': str(i), 'number': i, 'data': 'data'} for i in range(150)))
+
+        keys = [{'id': str(i)} for i in range(160, -1, -2)] + [{'id': '3'}]
+        items = table.items.batch_get(keys)
+        self.assertEqual(len(items), len(keys))
+        self.assertEqual(items[0], None)
+        self.assertEqual(items[-2]['number'], 0)
+        self.assertEqual(items[-1]['number'], 3)
+        self.assertEqual([item['id'] if item else None for item in items], [key['id'] if int(key['id']) < 150 else None for key in keys])
+
+        items = table.items.batch_get(keys, projection=['number'], parallel=2, consistent_read=True)
+        self.assertEqual(items[-1], {'id': '3', 'number': 3})
+
+        table.delete()
+
+
+class TestMemory(unittest.TestCase):
+    def setUp(self):
+        from dynamite import connection
+
+        self.backend = connection.Connection().config.get('backend')
+        connection.Connection().rebuild(backend='memory')
+
+    def tearDown(self):
+        from dynamite import connection
+
+        connection.get_backend('memory').reset()
+        connection.Connection().rebuild(backend=self.backend)
+
+    def get_error_code(self, func, *args, **kwargs):
+        from botocore.exceptions import ClientError
+
+        try:
+            func(*args, **kwargs)
+        except ClientError as e:
+            return e.response['Error']['Code']
+
+    def test_items(self):
+        from decimal import Decimal
+        from dynamite import tables
+
+        table = tables.Table(get_random_string(), range_attr=['num', 'N'])
+        self.assertTrue(table.create())
+        self.assertFalse(table.create())
+        table.items.put(item={'id': u'a', 'num': 1, 'tags': set([u'x']), 'data': {'list': [1]}})
+        self.assertEqual(table.items.get(hash_attr=u'a', range_attr=1)['num'], Decimal(1))
+        self.assertEqual(self.get_error_code(table.items.put, item={'id': u'a'}), 'ValidationException')
+        self.assertEqual(self.get_error_code(table.items.put, item={'id': u'a', 'num': u'1'}), 'ValidationException')
+        self.assertEqual(self.get_error_code(
+            table.put_item, Item={'id': u'a', 'num': 1}, ConditionExpression='attribute_not_exists(id)'),
+            'ConditionalCheckFailedException')
+        self.assertEqual(self.get_error_code(
+            table.get_item, Key={'id': u'a', 'num': 1}, ExpressionAttributeNames={'#unused': 'id'}),
+            'ValidationException')
+
+        response = table.update_item(
+            Key={'id': u'a', 'num': 1},
+            UpdateExpression='SET #c = if_not_exists(#c, :zero) + :one, #d.#l = list_append(#d.#l, :list) '
+                             'REMOVE #r ADD #t :tags',
+            ExpressionAttributeNames={'#c': 'count', '#d': 'data', '#l': 'list', '#r': 'missing', '#t': 'tags'},
+            ExpressionAttributeValues={':zero': 0, ':one': 1, ':list': [2], ':tags': set([u'y'])},
+            ReturnValues='ALL_NEW',
+        )
+        item = response['Attributes']
+        self.assertEqual(item['count'], 1)
+        self.assertEqual(item['data'], {'list': [1, 2]})
+        self.assertEqual(item['tags'], set([u'x', u'y']))
+        self.assertEqual(self.get_error_code(
+            table.update_item, Key={'id': u'a', 'num': 1}, UpdateExpression='SET num = :one',
+            ExpressionAttributeValues={':one': 1}), 'ValidationException')
+
+        self.assertTrue(table.items.update_attrs(hash_attr=u'a', range_attr=1, set_attrs={'text': u'b'}))
+        item = table.items.get(hash_attr=u'a', range_attr=1)
+        self.assertEqual(item['text'], u'b')
+        item['text'] = u'changed'
+        self.assertEqual(table.items.get(hash_attr=u'a', range_attr=1)['text'], u'b')
+
+        response = table.delete_item(Key={'id': u'a', 'num': 1}, ReturnValues='ALL_OLD')
+        self.assertEqual(response['Attributes']['text'], u'b')
+        self.assertEqual(table.items.get(hash_attr=u'a', range_attr=1), None)
+        table.delete()
+        self.assertEqual(self.get_error_code(table.describe, refresh=True), 'ResourceNotFoundException')
+
+    def test_query(self):
+        from dynamite import tables
+        from dynamite.indexes import GlobalIndex
+
+        index = GlobalIndex('by_group', ['group', 'S'], ['num', 'N'])
+        table = tables.Table(get_random_string(), range_attr=['num', 'N'], indexes=[index])
+        table.create()
+        table.items.batch_write(puts=[{'id': u'a' if num % 2 else u'b', 'num': num, 'group': u'g{}'.format(num % 3)}
+                                      for num in range(1, 31)])
+
+        nums = [int(item['num']) for item in table.items.objects.where(id=u'a', num__between=(5, 15)).page_size(2)]
+        self.assertEqual(nums, [5, 7, 9, 11, 13, 15])
+        nums = [int(item['num']) for item in table.items.objects.where(id=u'b', num__lt=10).reverse()]
+        self.assertEqual(nums, [8, 6, 4, 2])
+        self.assertEqual(table.items.objects.where(id=u'a').filter(group=u'g0').count(), 5)
+
+        response = table.query(KeyConditionExpression='id = :a', ExpressionAttributeValues={':a': u'a'}, Limit=4)
+        self.assertEqual(response['Count'], 4)
+        self.assertEqual(response['LastEvaluatedKey'], {'id': u'a', 'num': 7})
+        response = table.query(KeyConditionExpression='id = :a', ExpressionAttributeValues={':a': u'a'},
+                               ExclusiveStartKey=response['LastEvaluatedKey'])
+        self.assertEqual(int(response['Items'][0]['num']), 9)
+        self.assertFalse('LastEvaluatedKey' in response)
+
+        results = table.items.objects.where(group=u'g1').page_size(3)
+        self.assertEqual([int(item['num']) for item in results], list(range(1, 31, 3)))
+        self.assertEqual(self.get_error_code(table.query, KeyConditionExpression='num = :n',
+                                             ExpressionAttributeValues={':n': 1}), 'ValidationException')
+
+    def test_scan(self):
+        from dynamite import tables
+
+        table = tables.Table(get_random_string(), range_attr=['num', 'N'])
+        table.create()
+        table.items.batch_write(puts=[{'id': u'h{}'.format(num % 7), 'num': num} for num in range(100)])
+
+        keys = [(item['id'], item['num']) for item in table.items.scan(page_size=7)]
+        self.assertEqual(len(keys), 100)
+        self.assertEqual(keys, sorted(keys))
+        segments = [[item['num'] for item in table.items.scan(Segment=segment, TotalSegments=4)]
+                    for segment in range(4)]
+        self.assertEqual(sorted(num for segment in segments for num in segment), list(range(100)))
+        self.assertEqual(len(list(table.items.scan(parallel=4, page_size=10))), 100)
+        self.assertEqual(len(list(table.items.scan(FilterExpression='num >= :n',
+                                                   ExpressionAttributeValues={':n': 90}))), 10)
+
+    def test_batches(self):
+        from dynamite import tables
+
+        table = tables.Table(get_random_string())
+        table.create()
+        table.items.batch_write(puts=[{'id': str(num), 'num': num} for num in range(60)])
+        items = table.items.batch_get([{'id': str(num)} for num in range(70)], projection=['num'])
+        self.assertEqual([item and item['num'] for item in items], list(range(60)) + [None] * 10)
+        self.assertEqual(self.get_error_code(
+            table.connection.batch_write_item,
+            RequestItems={table.name: [{'PutRequest': {'Item': {'id': u'1'}}}] * 2}), 'ValidationException')
+
+        put = table.items.get_transact_put({'id': u'new'}, create=True)
+        conflict = table.items.get_transact_put({'id': u'1'}, create=True)
+        with self.assertRaises(Exception) as context:
+            table.items.transact_write([put, conflict])
+        reasons = context.exception.response['CancellationReasons']
+        self.assertEqual([reason['Code'] for reason in reasons], ['None', 'ConditionalCheckFailed'])
+        self.assertEqual(table.items.get(hash_attr=u'new'), None)
+        self.assertTrue(table.items.transact_write([put, table.items.get_transact_delete({'id': u'1'})]))
+        self.assertEqual(table.items.get(hash_attr=u'1'), None)
+        self.assertEqual(table.items.get(hash_attr=u'new'), {'id': u'new'})
+
+
+class TestCache(unittest.TestCase):
+    def test_lru_cache(self):
+        from dynamite import cache
+
+        now = [0]
+        c = cache.LRUCache(max_size=2, ttl=10, clock=lambda: now[0])
+        item = {'id': '1', 'data': {'a': 1}}
+        c.set('1', item)
+        item['data']['a'] = 2
+        self.assertEqual(c.get('1'), {'id': '1', 'data': {'a': 1}})
+        c.get('1')['data']['a'] = 3
+        self.assertEqual(c.get('1')['data']['a'], 1)
+        self.assertEqual(c.get('2'), None)
+
+        c.set('2', {'id': '2'})
+        c.get('1')
+        c.set('3', {'id': '3'})
+        self.assertEqual(c.get('2'), None)
+        self.assertEqual(c.get('1')['id'], '1')
+
+        now[0] = 11
+        self.assertEqual(c.get('1'), None)
+        self.assertEqual(c.stats(), {'hits': 5, 'misses': 3, 'evictions': 2, 'size': 1})
+        c.delete('3')
+        self.assertEqual(len(c), 0)
+
+        self.assertEqual(cache.get_cache(), None)
+        self.assertTrue(isinstance(cache.get_cache(True), cache.LRUCache))
+        self.assertTrue(cache.get_cache(c) is c)
+
+    def test_items_cache(self):
+        from dynamite import cache, tables
+
+        table = tables.Table(get_random_string(), cache=True)
+        self.assertTrue(isinstance(table.items.cache, cache.LRUCache))
+        table.items.put({'id': '1', 'data': 'old'})
+        self.assertEqual(table.items.get(hash_attr='1')['data'], 'old')
+        self.assertEqual(table.items.get(hash_attr='1')['data'], 'old')
+        self.assertEqual(table.items.cache.hits, 1)
+
+        table.items.update_attrs(hash_attr='1', set_attrs={'data': 'new'})
+        self.assertEqual(table.items.get(hash_attr='1')['data'], 'new')
+
+        table.connection.Table(table.name).put_item(Item={'id': '1', 'data': 'outside'})
+        self.assertEqual(table.items.get(hash_attr='1')['data'], 'new')
+        self.assertEqual(table.items.get(hash_attr='1', consistent_read=True)['data'], 'outside')
+        self.assertEqual(table.items.get(hash_attr='1')['data'], 'outside')
+
+        table.items.batch_write(puts=[{'id': '1', 'data': 'batch'}, {'id': '2'}])
+        self.assertEqual([item['id'] for item in table.items.batch_get([{'id': '2'}, {'id': '1'}])], ['2', '1'])
+        self.assertEqual(table.items.get(hash_attr='1')['data'], 'batch')
+        hits = table.items.cache.hits
+        self.assertEqual(len(table.items.batch_get([{'id': '1'}, {'id': '2'}])), 2)
+        self.assertEqual(table.items.cache.hits, hits + 2)
+
+        table.items.delete(hash_attr='1')
+        self.assertEqual(table.items.get(hash_attr='1'), None)
+        table.delete()
+
+
+class TestThrottle(unittest.TestCase):
+    def test_token_bucket(self):
+        from dynamite.throttle import TokenBucket
+
+        now = [0.0]
+        sleeps = []
+
+        def sleep(delay):
+            sleeps.append(delay)
+            now[0] += delay
+
+        bucket = TokenBucket(10, clock=lambda: now[0], sleep=sleep)
+        self.assertEqual(bucket.wait(), 0)
+        bucket.consume(15)
+        self.assertEqual(bucket.wait(), 0.5)
+        self.assertEqual(sleeps, [0.5])
+
+        bucket.throttled()
+        self.assertEqual((bucket.rate, bucket.tokens, bucket.throttles), (5, 0, 1))
+        for _ in range(100):
+            bucket.throttled()
+        self.assertEqual(bucket.rate, bucket.min_rate)
+        for _ in range(100):
+            bucket.success()
+        self.assertEqual(bucket.rate, 10)
+
+    def test_limiter(self):
+        from dynamite import tables
+        from dynamite.throttle import CapacityLimiter, get_consumed_units, get_limiter
+
+        self.assertEqual(get_consumed_units({'ConsumedCapacity': {'CapacityUnits': 2.5}}), 2.5)
+        self.assertEqual(get_consumed_units({'ConsumedCapacity': [
+            {'TableName': 'a', 'CapacityUnits': 1},
+            {'TableName': 'b', 'CapacityUnits': 2},
+        ]}, 'b'), 2)
+        self.assertEqual(get_consumed_units({}), 0)
+
+        limiter = CapacityLimiter(100, 100)
+        table = tables.Table(get_random_string(), throttle=limiter)
+        self.assertTrue(table.items.limiter is limiter)
+        self.assertTrue(tables.Table(get_random_string()).items.limiter is None)
+        shared = tables.Table(table.name, throttle=True).items.limiter
+        self.assertTrue(shared is get_limiter(tables.Table(table.name), True))
+        self.assertEqual(shared.buckets['read'].max_rate, 4)
+        with self.assertRaises(ValueError):
+            CapacityLimiter(0, 5)
+
+        on_demand = tables.Table(get_random_string(), throttle=True)
+        on_demand.connection.client.create_table(
+            TableName=on_demand.name,
+            KeySchema=on_demand.get_key_schema(),
+            AttributeDefinitions=on_demand.get_attribute_definitions(),
+            BillingMode='PAY_PER_REQUEST',
+        )
+        on_demand.items.put(hash_attr=u'1')
+        self.assertTrue(on_demand.items.limiter is None)
+        on_demand.delete()
+
+        writes = limiter.buckets['write']
+        table.items.put(hash_attr=u'1', item={'data': u'x'})
+        self.assertTrue(writes.tokens < 100)
+        table.items.get(hash_attr=u'1')
+        self.assertTrue(limiter.buckets['read'].tokens < 100)
+        limiter.after('batch_write_item', {'UnprocessedItems': {table.name: [{}]}}, table.name)
+        self.assertEqual(writes.throttles, 1)
+        limiter.error('put_item', 'ProvisionedThroughputExceededException')
+        self.assertEqual(limiter.stats()['write']['throttles'], 2)
+        table.delete()
+
+
+class TestRetry(unittest.TestCase):
+    def get_error(self, code, status=400):
+        from botocore.exceptions import ClientError
+        return ClientError({'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status}}, 'PutItem')
+
+    def test_retry_policy(self):
+        from botocore.exceptions import ClientError
+        from dynamite.retry import RetryBudget, RetryPolicy, get_error_code
+
+        self.assertEqual(get_error_code(self.get_error('ThrottlingException')), 'ThrottlingException')
+        self.assertEqual(get_error_code(self.get_error('InternalFailure', 500)), 'InternalFailure')
+        self.assertEqual(get_error_code(self.get_error('ConditionalCheckFailedException')), None)
+        self.assertEqual(get_error_code(ValueError()), None)
+
+        now = [0.0]
+        sleeps = []
+
+        def sleep(delay):
+            sleeps.append(delay)
+            now[0] += delay
+
+        policy = RetryPolicy(max_attempts=3, base=1, cap=10, clock=lambda: now[0], sleep=sleep)
+        retries = []
+        policy.add_listener(lambda *args: retries.append(args))
+        errors = [self.get_error('ThrottlingException'), self.get_error('ServiceUnavailable', 503)]
+
+        def flaky():
+            if errors:
+                raise errors.pop(0)
+            return 'ok'
+
+        self.assertEqual(policy.call('put_item', flaky), 'ok')
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(0 <= sleeps[1] <= 2)
+        self.assertEqual([retry[:3] for retry in retries], [('put_item', 1, 'ThrottlingException'),
+                                                           ('put_item', 2, 'ServiceUnavailable')])
+        stats = policy.stats()['put_item']
+        self.assertEqual((stats['attempts'], stats['retries'], stats['error:ThrottlingException']), (3, 2, 1))
+
+        def failing():
+            raise self.get_error('ThrottlingException')
+
+        with self.assertRaises(ClientError):
+            policy.call('get_item', failing)
+        self.assertEqual(policy.stats()['get_item']['exhausted'], 1)
+
+        def conditional():
+            raise self.get_error('ConditionalCheckFailedException')
+
+        with self.assertRaises(ClientError):
+            policy.call('get_item', conditional)
+        self.assertEqual(policy.stats()['get_item']['attempts'], 4)
+
+        policy = RetryPolicy(max_attempts=10, base=1, cap=1, deadlines={'get_item': 0},
+                             clock=lambda: now[0], sleep=sleep)
+        with self.assertRaises(ClientError):
+            policy.call('get_item', failing)
+        self.assertEqual(policy.stats()['get_item']['deadline_exceeded'], 1)
+
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+        policy = RetryPolicy(max_attempts=10, base=0, budget=budget, clock=lambda: now[0], sleep=sleep)
+        with self.assertRaises(ClientError):
+            policy.call('scan', failing)
+        self.assertEqual(policy.stats()['scan']['retries'], 1)
+        self.assertEqual(policy.stats()['scan']['budget_exhausted'], 1)
+        policy.call('scan', lambda: None)
+        policy.call('scan', lambda: None)
+        self.assertTrue(budget.withdraw())
+
+    def test_items_retry(self):
+        from dynamite import tables
+        from dynamite.items import TableItems
+        from dynamite.retry import RetryPolicy
+
+        policy = RetryPolicy(max_attempts=3, base=0)
+        table = tables.Table(get_random_string(), items=TableItems(retry=policy))
+        self.assertTrue(table.items.retry is policy)
+        self.assertTrue(TableItems(retry=False).retry is None)
+
+        calls = []
+        put_item = table.items._request_once
+
+        def request_once(operation, params):
+            calls.append(operation)
+            if len(calls) == 1:
+                raise self.get_error('ProvisionedThroughputExceededException')
+            return put_item(operation, params)
+
+        table.items._request_once = request_once
+        table.items.put(hash_attr=u'1')
+        self.assertEqual(calls, ['put_item', 'put_item'])
+        self.assertEqual(policy.stats()['put_item']['retries'], 1)
+        table.delete()
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_histogram(self):
+        from dynamite.instrumentation import Histogram
+
+        histogram = Histogram()
+        self.assertEqual(histogram.percentile(0.5), 0)
+        for value in [0.001] * 98 + [0.5, 1.0]:
+            histogram.add(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertTrue(0.001 <= histogram.percentile(0.5) < 0.002)
+        self.assertTrue(0.5 <= histogram.percentile(0.99) <= 1.0)
+        self.assertEqual(histogram.percentile(1), 1.0)
+
+    def test_collector(self):
+        from dynamite import instrumentation, models, fields
+        from dynamite.instrumentation import HistogramCollector, PrometheusAdapter, StatsdAdapter
+
+        test_name = get_random_string()
+
+        class InstrumentedModel(models.Model):
+            num = fields.IntField()
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        class FakeSocket(object):
+            def __init__(self):
+                self.sent = []
+
+            def sendto(self, data, address):
+                self.sent.append(data.decode('utf-8'))
+
+        collector = HistogramCollector()
+        sock = FakeSocket()
+        statsd = StatsdAdapter(sock=sock)
+        instrumentation.subscribe(collector)
+        instrumentation.subscribe(statsd)
+        try:
+            InstrumentedModel(id=u'1', num=1).save()
+            InstrumentedModel.get(id=u'1')
+            list(InstrumentedModel.scan())
+        finally:
+            instrumentation.unsubscribe(collector)
+            instrumentation.unsubscribe(statsd)
+        self.assertFalse(instrumentation.is_enabled())
+
+        put = collector.get(test_name, 'put_item').to_dict()
+        self.assertEqual(put['count'], 1)
+        self.assertTrue(put['latency_sum'] > 0)
+        get = collector.get(test_name, 'get_item').to_dict()
+        self.assertEqual(get['items'], 1)
+        self.assertTrue(get['bytes'] > 0)
+        self.assertEqual(collector.get(test_name, 'scan').items, 1)
+        to_python = collector.get('InstrumentedModel', 'to_python', kind=instrumentation.SERIALIZATION)
+        self.assertEqual(to_python.latency.count, 2)
+        self.assertTrue(collector.get('InstrumentedModel', 'to_db', kind=instrumentation.SERIALIZATION))
+
+        self.assertTrue(any(line.startswith('dynamite.request.{}.get_item.latency:'.format(test_name))
+                            for data in sock.sent for line in data.split('\n')))
+        text = PrometheusAdapter(collector).render()
+        self.assertTrue('# TYPE dynamite_latency_seconds histogram' in text)
+        self.assertTrue('dynamite_latency_seconds_count{{kind="request",table="{}",operation="get_item"}} 1'.format(
+            test_name) in text)
+        self.assertEqual(text.count('# TYPE dynamite_items_total counter'), 1)
+        InstrumentedModel.table.delete()
+
 
 class TestSchema(unittest.TestCase):
     def test_schema(self):
@@ -270,6 +863,155 @@ class TestSchema(unittest.TestCase):
 
         self.assertEqual(str(InSchemaTwo()), '<InSchemaTwo: name=BinaryField>')
 
+    def test_compiled_fields(self):
+        from dynamite import schema, fields
+
+        class Base(schema.Schema):
+            number = fields.IntField()
+
+        class Child(Base):
+            text = fields.UnicodeField(name='another_text')
+
+        self.assertEqual(sorted(Base._fields_), ['number'])
+        self.assertEqual(sorted(Child._fields_), ['another_text', 'number'])
+        self.assertTrue(isinstance(Child.__dict__['another_text'], schema.FieldDescriptor))
+        self.assertTrue(isinstance(Child.another_text, fields.UnicodeField))
+        self.assertTrue(isinstance(Child.number, fields.IntField))
+
+        c = Child(number=1, another_text=u'text')
+        c.number = 2
+        self.assertEqual(c._state_, {'number': 2, 'another_text': u'text'})
+        self.assertEqual(c.another_text, u'text')
+        self.assertRaises(fields.SchemaValidationError, lambda: setattr(c, 'number', 'no number'))
+        c.not_field = 1
+        self.assertEqual(c.__dict__['not_field'], 1)
+
+    def test_renamed_fields(self):
+        from dynamite import schema, fields, models
+
+        class Base(schema.Schema):
+            number = fields.IntField(name='z')
+
+        class Child(Base):
+            pass
+
+        self.assertEqual(sorted(Base._fields_), ['z'])
+        self.assertEqual(sorted(Child._fields_), ['z'])
+        Base._get_fields()
+        self.assertEqual(sorted(Base._fields_), ['z'])
+        self.assertEqual(Child(z=3).to_db(), {'z': 3})
+
+        class Override(Base):
+            number = fields.IntField()
+
+        self.assertEqual(sorted(Override._fields_), ['number'])
+
+        class RenamedModel(models.Model):
+            number = fields.IntField(name='z')
+
+            @classmethod
+            def get_table_name(cls):
+                return 'renamed'
+
+        class ChildModel(RenamedModel):
+            pass
+
+        for model in (RenamedModel, ChildModel):
+            instance = model(id=u'hash', z=5)
+            self.assertEqual(instance.to_db()['z'], 5)
+            self.assertEqual(model.to_python_cls(instance.to_db()).z, 5)
+
+    def test_validation(self):
+        from dynamite import schema, fields
+
+        validated = []
+
+        class CountField(fields.UnicodeField):
+            def validate(self, value):
+                validated.append(value)
+                return super(CountField, self).validate(value)
+
+        class CountSchema(schema.Schema):
+            text = CountField(default=u'default')
+
+        s = CountSchema(text=u'text')
+        self.assertEqual(validated, [u'text'])
+        self.assertEqual(s.text, u'text')
+        self.assertEqual(s['text'], u'text')
+        self.assertEqual(validated, [u'text'])
+
+        del validated[:]
+        s = CountSchema.to_python_cls({'text': u'db'})
+        self.assertEqual(s.text, u'db')
+        self.assertEqual(validated, [u'default', u'db'])
+
+        del validated[:]
+        s = CountSchema.to_python_cls({'text': u'db'}, validate=False)
+        self.assertEqual(s.text, u'db')
+        self.assertEqual(validated, [])
+        s = CountSchema.to_python_cls({}, validate=False)
+        self.assertEqual(s.text, u'default')
+        self.assertEqual(validated, [])
+
+    def test_number_fields(self):
+        from decimal import Decimal
+        from dynamite import schema, fields
+
+        class Numbers(schema.Schema):
+            count = fields.IntField(min_value=-10, max_value=10)
+            ratio = fields.FloatField(precision=2)
+            total = fields.DecimalField()
+
+        numbers = Numbers(count=-5, ratio=0.5, total=Decimal('1.1'))
+        numbers.count = Decimal(3)
+        numbers.ratio = 2
+        self.assertEqual(Numbers().ratio, 0.0)
+        for name, value in [('count', 1.5), ('count', True), ('count', u'1'), ('count', Decimal('1.5')),
+                            ('ratio', float('nan')), ('ratio', u'1.0'), ('total', 1.5), ('total', Decimal('Infinity'))]:
+            self.assertRaises(fields.SchemaValidationError, setattr, numbers, name, value)
+        self.assertRaises(fields.SchemaRangeError, setattr, numbers, 'count', 11)
+        self.assertRaises(fields.SchemaRangeError, setattr, numbers, 'count', -11)
+
+        numbers = Numbers(count=7, ratio=1.23456, total=Decimal('0.1'))
+        self.assertEqual(numbers.to_db(), {'count': 7, 'ratio': Decimal('1.23'), 'total': Decimal('0.1')})
+        self.assertEqual(Numbers.ratio.to_db(0.1), Decimal('0.1'))
+        self.assertEqual(Numbers.ratio.to_python_many([Decimal('0.125'), None]), [0.12, None])
+        self.assertEqual(Numbers.count.to_python_many([Decimal(1), None, 2]), [1, None, 2])
+        self.assertEqual(type(Numbers.count.to_python_many([Decimal(1)])[0]), int)
+        self.assertEqual(Numbers.total.to_python_many([Decimal('0.5'), 1, 0.25]), [Decimal('0.5'), Decimal(1), Decimal('0.25')])
+
+        page = Numbers.from_db_many([{'count': Decimal(2), 'ratio': Decimal('0.5'), 'total': Decimal('2.5')}, {}])
+        self.assertEqual([(item.count, item.ratio, item.total) for item in page],
+                         [(2, 0.5, Decimal('2.5')), (0, 0.0, Decimal(0))])
+        self.assertRaises(fields.SchemaRangeError, Numbers.from_db_many, [{'count': Decimal(20)}])
+
+    def test_from_db_many(self):
+        from decimal import Decimal
+        from dynamite import schema, fields
+
+        class Page(schema.Schema):
+            text = fields.UnicodeField(default=u'default')
+            number = fields.IntField()
+            data = fields.DictField()
+            binary = fields.BinaryField(name='bin')
+
+        items = [{'text': u'a', 'number': Decimal(1), 'bin': u'x'}, None, {'number': Decimal(2), 'data': {'a': 1}}]
+        plan = Page._get_plan()
+        self.assertEqual(plan.copied, ['data'])
+        self.assertEqual(plan.converted, ['bin', 'number', 'text'])
+        instances = Page.from_db_many(items)
+        self.assertEqual(instances[1], None)
+        for instance, item in zip([instances[0], instances[2]], [items[0], items[2]]):
+            self.assertEqual(instance._state_, Page.to_python_cls(item)._state_)
+            self.assertEqual(instance.get_dirty_fields(), set())
+        self.assertEqual(instances[0].bin, b'x')
+        self.assertEqual(instances[2].text, u'default')
+        self.assertRaises(fields.SchemaValidationError, Page.from_db_many, [{'data': [1]}])
+        self.assertEqual(Page.from_db_many([{'data': [1]}], validate=False)[0].data, [1])
+
+        self.assertEqual(Page.rows_many(items[::2], names=['number', 'text'], tuples=True), [(1, u'a'), (2, None)])
+        self.assertEqual(Page.rows_many(items[:1], names=['bin']), [{'bin': b'x'}])
+
 
 class TestModels(unittest.TestCase):
     def test_models(self):
@@ -491,6 +1233,464 @@ class TestModels(unittest.TestCase):
 
         self.assertEqual(len(results), 3)
 
+        results = [m.num for m in ModelTestItems.scan(parallel=2)]
+        self.assertEqual(sorted(results), [1, 2, 3])
+        results = [m.num for m in ModelTestItems.scan(validate=False)]
+        self.assertEqual(sorted(results), [1, 2, 3])
+
         ModelTestItems.delete(id=t1.id)
         t1 = ModelTestItems.get(id=t1.id)
         self.assertEqual(t1, None)
+
+        stats = ModelTestItems.bulk_save(ModelTestItems(num=i) for i in range(30))
+        self.assertEqual(sum(chunk['items'] for chunk in stats), 30)
+        self.assertEqual([m.num if m else None for m in ModelTestItems.get_many([t2.id, 'missing', {'id': t3.id}])], [2, None, 3])
+        self.assertEqual(len(list(ModelTestItems.all())), 32)
+        ModelTestItems.table.delete()
+
+    def test_model_key(self):
+        from dynamite import models, fields
+
+        dumps = []
+
+        class CountPickleField(fields.PickleField):
+            def to_db(self, value):
+                dumps.append(value)
+                return super(CountPickleField, self).to_db(value)
+
+        class KeyModel(models.Model):
+            custom_id = fields.UnicodeField(hash_field=True)
+            custom_range = fields.IntField(range_field=True)
+            payload = CountPickleField()
+
+        m = KeyModel(custom_id=u'hash', custom_range=1, payload={'big': 'data'})
+        self.assertEqual(m.key, {'custom_id': u'hash', 'custom_range': 1})
+        self.assertEqual((m.hk, m.rk), (u'hash', 1))
+        self.assertEqual(repr(m), '<KeyModel: {}>'.format(m.key))
+        self.assertEqual(dumps, [])
+
+        key = m.key
+        m.payload = {'other': 'data'}
+        self.assertTrue(m.key is key)
+        m.custom_range = 2
+        self.assertEqual(m.rk, 2)
+        m['custom_id'] = u'new hash'
+        self.assertEqual(m.key, {'custom_id': u'new hash', 'custom_range': 2})
+        m.to_python({'custom_id': u'db hash'})
+        self.assertEqual(m.hk, u'db hash')
+        self.assertEqual(dumps, [])
+
+    def test_partial_save(self):
+        from dynamite import models, fields
+
+        test_name = get_random_string()
+
+        class PartialModel(models.Model):
+            counter = fields.IntField()
+            text = fields.UnicodeField()
+            data = fields.DictField()
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        m = PartialModel(counter=1, text=u'text', data={'a': 1})
+        m.save()
+        self.assertEqual(m.get_dirty_fields(), set())
+
+        loaded = PartialModel.get(id=m.id)
+        self.assertEqual(loaded.get_dirty_fields(), set())
+        other = PartialModel.get(id=m.id)
+        other.text = u'other'
+        other.save()
+
+        loaded.counter = 2
+        self.assertEqual(loaded.get_changes(), ({'counter': 2}, []))
+        loaded.save()
+        fresh = PartialModel.get(id=m.id)
+        self.assertEqual((fresh.counter, fresh.text), (2, u'other'))
+
+        fresh.data['b'] = 2
+        fresh.text = u''
+        self.assertEqual(fresh.get_dirty_fields(), set(['data', 'text']))
+        fresh.save()
+        item = PartialModel.items.get(hash_attr=m.id)
+        self.assertEqual(item['data'], {'a': 1, 'b': 2})
+        self.assertFalse('text' in item)
+
+        loaded.save(full=True)
+        self.assertEqual(PartialModel.items.get(hash_attr=m.id)['text'], u'text')
+        PartialModel.table.delete()
+
+    def test_query(self):
+        from dynamite import models, fields
+        from dynamite.query import QueryError
+
+        test_name = get_random_string()
+
+        class QueryModel(models.Model):
+            owner = fields.UnicodeField(hash_field=True)
+            num = fields.IntField(range_field=True)
+            text = fields.UnicodeField()
+            tags = fields.ListField()
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        QueryModel.bulk_save([QueryModel(owner=u'a', num=i, text=u'text {}'.format(i), tags=[u't{}'.format(i % 2)])
+                              for i in range(1, 10)] + [QueryModel(owner=u'b', num=1, text=u'b')])
+
+        query = QueryModel.objects.where(hash=u'a', range__between=(2, 5))
+        self.assertEqual(query.compile(), {
+            'KeyConditionExpression': '#n0 = :v0 AND #n1 BETWEEN :v1 AND :v2',
+            'ExpressionAttributeNames': {'#n0': 'owner', '#n1': 'num'},
+            'ExpressionAttributeValues': {':v0': u'a', ':v1': 2, ':v2': 5},
+        })
+        self.assertTrue(query.compile() is query.compile())
+        self.assertEqual([m.num for m in query], [2, 3, 4, 5])
+        self.assertEqual([m.num for m in query.reverse().limit(2)], [5, 4])
+        self.assertEqual([m.num for m in query.filter(tags__contains=u't1')], [3, 5])
+        self.assertEqual(query.count(), 4)
+
+        only = list(query.only('text'))
+        self.assertEqual(only[0].text, u'text 2')
+        self.assertEqual(only[0].key, {'owner': u'a', 'num': 2})
+        self.assertEqual(only[0].tags, [])
+
+        items = list(QueryModel.items.objects.where(owner=u'a', num__gte=8).only('num'))
+        self.assertEqual(items, [{'owner': u'a', 'num': 8}, {'owner': u'a', 'num': 9}])
+        self.assertEqual(QueryModel.objects.filter(num=1).count(), 2)
+        self.assertEqual(QueryModel.objects.where(hash=u'b').first().text, u'b')
+        self.assertEqual(QueryModel.objects.where(hash=u'c').first(), None)
+
+        with self.assertRaises(QueryError):
+            QueryModel.objects.where(range=1).compile()
+        with self.assertRaises(QueryError):
+            QueryModel.objects.where(hash=u'a', text__contains=u'x').compile()
+        QueryModel.table.delete()
+
+    def test_bulk_hydration(self):
+        from dynamite import models, fields
+
+        test_name = get_random_string()
+
+        class BulkModel(models.Model):
+            num = fields.IntField(range_field=True)
+            text = fields.UnicodeField()
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        BulkModel.bulk_save(BulkModel(id=u'hash', num=num, text=u'text {}'.format(num)) for num in range(1, 11))
+        results = BulkModel.objects.where(id=u'hash').page_size(4).get_results()
+        instances = []
+        for instance in results:
+            instances.append(instance)
+            if len(instances) == 5:
+                break
+        self.assertEqual([instance.num for instance in instances], [1, 2, 3, 4, 5])
+        self.assertEqual(instances[0].key, BulkModel.to_python_cls(instances[0].to_db()).key)
+        self.assertTrue(instances[0]._loaded)
+        self.assertEqual(results.last_evaluated_key, {'id': u'hash', 'num': 5})
+        rest = BulkModel.objects.where(id=u'hash').start(results.last_evaluated_key).get_results()
+        self.assertEqual([instance.num for instance in rest], list(range(6, 11)))
+
+        pages = list(BulkModel.scan(page_size=4).pages())
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertTrue(all(isinstance(instance, BulkModel) for page in pages for instance in page))
+        rows = list(BulkModel.objects.where(id=u'hash', num__lte=2).rows(names=['num', 'text'], tuples=True))
+        self.assertEqual(rows, [(1, u'text 1'), (2, u'text 2')])
+        self.assertEqual([model.num for model in BulkModel.get_many([{'id': u'hash', 'num': 3}, {'id': u'hash', 'num': 99}]) if model], [3])
+        BulkModel.table.delete()
+
+    def test_export(self):
+        from dynamite import models, fields, export
+
+        test_name = get_random_string()
+
+        class ExportModel(models.Model):
+            num = fields.IntField(range_field=True)
+            count = fields.IntField()
+            text = fields.UnicodeField()
+            data = fields.DictField()
+            flag = fields.BooleanField()
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        self.assertEqual([export.get_kind(ExportModel._fields_[name]) for name in ('num', 'text', 'data', 'flag')],
+                         [export.INT, export.STRING, export.JSON, export.BOOL])
+        self.assertEqual(export.get_kind(fields.FloatField()), export.FLOAT)
+        ExportModel.bulk_save(ExportModel(id=u'hash', num=num, text=u'text {}'.format(num), data={'n': num}, flag=True)
+                              for num in range(1, 8))
+        batches = list(ExportModel.scan(page_size=3).iter_columns(names=['num', 'text', 'data', 'count'], batch_size=2))
+        self.assertEqual([len(batch['num']) for batch in batches], [2, 2, 2, 1])
+        self.assertEqual(sorted(num for batch in batches for num in batch['num']), list(range(1, 8)))
+        self.assertEqual(batches[0]['text'][0], u'text {}'.format(batches[0]['num'][0]))
+        self.assertEqual(batches[0]['data'][0], '{{"n": {}}}'.format(batches[0]['num'][0]))
+        self.assertEqual(batches[0]['count'][0], None)
+        batches = list(ExportModel.scan(parallel=2, page_size=2).iter_columns(names=['num'], batch_size=5))
+        self.assertEqual(sorted(num for batch in batches for num in batch['num']), list(range(1, 8)))
+        self.assertTrue(all(len(batch['num']) <= 5 for batch in batches))
+
+        try:
+            import pyarrow
+        except ImportError:
+            pyarrow = None
+        if pyarrow is not None:
+            table = ExportModel.scan().to_arrow(names=['num', 'text', 'flag'], batch_size=3)
+            self.assertEqual(table.num_rows, 7)
+            self.assertEqual(str(table.schema.field('num').type), 'int64')
+            self.assertEqual(str(table.schema.field('text').type), 'string')
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is not None:
+            arrays = ExportModel.scan().to_numpy(names=['num', 'count'])
+            self.assertEqual(arrays['num'].dtype, numpy.int64)
+            self.assertTrue(numpy.isnan(arrays['count']).all())
+        ExportModel.table.delete()
+
+    def test_indexes(self):
+        from dynamite import models, fields
+        from dynamite import tables
+        from dynamite.indexes import GlobalIndex, LocalIndex, KEYS_ONLY
+        from dynamite.query import QueryError
+
+        test_name = get_random_string()
+
+        class IndexModel(models.Model):
+            owner = fields.UnicodeField(hash_field=True)
+            num = fields.IntField(range_field=True)
+            email = fields.UnicodeField()
+            created = fields.IntField()
+            score = fields.IntField()
+
+            indexes = [
+                GlobalIndex('by_email', 'email', projection=KEYS_ONLY),
+                GlobalIndex('by_email_score', 'email', 'score'),
+                LocalIndex('by_created', 'created'),
+            ]
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        self.assertTrue(IndexModel.table.create())
+        description = IndexModel.table.describe()
+        self.assertEqual(sorted(index['IndexName'] for index in description['GlobalSecondaryIndexes']),
+                         ['by_email', 'by_email_score'])
+        self.assertEqual([index['IndexName'] for index in description['LocalSecondaryIndexes']], ['by_created'])
+        self.assertEqual(IndexModel.table.get_index('by_created').get_key_names(IndexModel.table),
+                         ['owner', 'created'])
+        self.assertTrue({'AttributeName': 'score', 'AttributeType': 'N'} in IndexModel.table.get_attribute_definitions())
+
+        IndexModel.bulk_save([IndexModel(owner=u'a', num=i, email=u'e{}'.format(i % 2), created=10 - i, score=i)
+                              for i in range(1, 7)])
+
+        query = IndexModel.objects.where(email=u'e1')
+        self.assertEqual(query.compile()['IndexName'], 'by_email_score')
+        self.assertEqual(sorted(m.num for m in query), [1, 3, 5])
+        query = IndexModel.objects.where(email=u'e0', score__gt=2)
+        self.assertEqual(sorted(m.num for m in query), [4, 6])
+        query = IndexModel.objects.where(hash=u'a', created__lt=6)
+        self.assertEqual(query.compile()['IndexName'], 'by_created')
+        self.assertEqual([m.num for m in query], [6, 5])
+        self.assertEqual(query.get_key_names(), ['owner', 'num', 'created'])
+        results = query.get_results()
+        self.assertEqual(next(iter(results)).num, 6)
+        self.assertEqual(results.last_evaluated_key, {'owner': u'a', 'num': 6, 'created': 4})
+        rest = IndexModel.objects.where(hash=u'a', created__lt=6).start(results.last_evaluated_key)
+        self.assertEqual([m.num for m in rest], [5])
+        self.assertEqual(IndexModel.objects.where(hash=u'a', num=1).compile().get('IndexName'), None)
+        keys = list(IndexModel.objects.where(email=u'e1').index('by_email').only())
+        self.assertEqual(len(keys), 3)
+
+        with self.assertRaises(QueryError):
+            IndexModel.objects.where(score=1).compile()
+        with self.assertRaises(QueryError):
+            IndexModel.objects.where(email=u'e1', created=1).index('by_email').compile()
+
+        table = tables.Table(test_name, hash_attr=['owner', 'S'], range_attr=['num', 'N'],
+                             indexes=[GlobalIndex('by_score', ['score', 'N'])])
+        self.assertEqual(table.create_global_indexes(), ['by_score'])
+        self.assertEqual(table.create_global_indexes(), [])
+        IndexModel.table.delete()
+
+    def test_sync(self):
+        from dynamite import models, fields, sync, tables
+        from dynamite.indexes import GlobalIndex
+
+        names = [get_random_string(), get_random_string()]
+
+        class SyncModel(models.Model):
+            email = fields.UnicodeField()
+            expires = fields.IntField()
+            indexes = [GlobalIndex('by_email', 'email')]
+            ttl_attribute = 'expires'
+
+            @classmethod
+            def get_table_name(cls):
+                return names[0]
+
+        class OtherSyncModel(models.Model):
+            @classmethod
+            def get_table_name(cls):
+                return names[1]
+
+        self.assertTrue(SyncModel in sync.get_models())
+        self.assertFalse(models.Model in sync.get_models())
+
+        plan = sync.sync([SyncModel, OtherSyncModel], dry_run=True)
+        self.assertEqual(plan, [(SyncModel, [('create', None), ('ttl', 'expires')]), (OtherSyncModel, [('create', None)])])
+        sync.sync([SyncModel, OtherSyncModel])
+        self.assertEqual(sync.get_plan([SyncModel, OtherSyncModel]), [(SyncModel, []), (OtherSyncModel, [])])
+
+        table = OtherSyncModel.table
+        table.read_capacity_units = 7
+        table.indexes = [GlobalIndex('by_created', ['created', 'N'])]
+        self.assertEqual(table.get_sync_actions(), [
+            ('throughput', {'ReadCapacityUnits': 7, 'WriteCapacityUnits': 5}),
+            ('create_index', 'by_created'),
+        ])
+        self.assertEqual(len(table.update()), 2)
+        self.assertEqual(table.describe()['ProvisionedThroughput']['ReadCapacityUnits'], 7)
+        self.assertEqual(table.get_sync_actions(), [])
+
+        table.range_attr = ['num', 'N']
+        with self.assertRaises(tables.TableSyncError):
+            sync.sync([SyncModel, OtherSyncModel])
+        SyncModel.table.delete()
+        table.delete()
+
+    def test_session(self):
+        import dynamite
+        from dynamite import models, fields
+
+        test_name = get_random_string()
+
+        class SessionModel(models.Model):
+            num = fields.IntField()
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        requests = []
+        failures = []
+        original_request = SessionModel.items._request
+
+        def count_request(operation, **params):
+            requests.append(operation)
+            if operation in failures:
+                raise RuntimeError(operation)
+            return original_request(operation, **params)
+
+        SessionModel.items._request = count_request
+        instances = [SessionModel(num=i) for i in range(5)]
+        SessionModel.bulk_save(instances)
+        ids = [instance.id for instance in instances]
+
+        del requests[:]
+        with dynamite.session() as session:
+            SessionModel.prefetch(*ids)
+            SessionModel.prefetch('missing')
+            first = SessionModel.get(id=ids[0])
+            self.assertTrue(SessionModel.get(id=ids[0]) is first)
+            self.assertTrue(SessionModel.get_many(ids)[0] is first)
+            self.assertEqual(SessionModel.get(id='missing'), None)
+            self.assertEqual(requests, ['batch_get_item'])
+
+            first.num = 100
+            first.save()
+            SessionModel.delete(id=ids[1])
+            self.assertEqual(SessionModel.get(id=ids[1]), None)
+            new = SessionModel(num=200)
+            new.save()
+            self.assertTrue(SessionModel.get(id=new.id) is new)
+            self.assertEqual(requests, ['batch_get_item', 'put_item'])
+            self.assertEqual(len(session.pending_writes), 2)
+        self.assertEqual(requests, ['batch_get_item', 'put_item', 'batch_write_item'])
+        self.assertEqual(SessionModel.get(id=ids[0]).num, 100)
+        self.assertEqual(SessionModel.get(id=ids[1]), None)
+
+        try:
+            with dynamite.session():
+                SessionModel.delete(id=ids[2])
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertNotEqual(SessionModel.get(id=ids[2]), None)
+
+        del requests[:]
+        with dynamite.session(transactional=True):
+            third = SessionModel.get(id=ids[2])
+            third.num = 300
+            third.save()
+            SessionModel(num=400).save()
+            SessionModel.delete(id=ids[3])
+        self.assertEqual(requests, ['batch_get_item', 'transact_write_items'])
+        self.assertEqual(sorted(m.num for m in SessionModel.all()), [4, 100, 200, 300, 400])
+
+        del requests[:]
+        with self.assertRaises(ValueError):
+            with dynamite.session(transactional=True) as session:
+                for i in range(101):
+                    SessionModel.delete(id='key {}'.format(i))
+        self.assertEqual(len(session.pending_writes), 0)
+        self.assertEqual(requests, [])
+
+        with dynamite.session(transactional=True) as session:
+            SessionModel.delete(id=ids[4])
+            failures.append('transact_write_items')
+            self.assertRaises(RuntimeError, session.flush)
+            self.assertEqual(len(session.pending_writes), 1)
+            del failures[:]
+        self.assertEqual(len(session.pending_writes), 0)
+        self.assertEqual(SessionModel.get(id=ids[4]), None)
+
+        del SessionModel.items._request
+        SessionModel.table.delete()
+
+    @unittest.skipIf(six.PY2, 'asyncio API requires python 3.5+')
+    def test_async_models(self):
+        import asyncio
+        from dynamite import aio, fields
+
+        test_name = get_random_string()
+
+        class AsyncTestModel(aio.AsyncModel):
+            num = fields.IntField()
+
+            @classmethod
+            def get_table_name(cls):
+                return test_name
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        run = loop.run_until_complete
+
+        instances = [AsyncTestModel(num=i) for i in range(10)]
+        run(asyncio.gather(*[instance.asave() for instance in instances]))
+        results = run(asyncio.gather(*[AsyncTestModel.aget(id=instance.id) for instance in instances]))
+        self.assertEqual([result.num for result in results], list(range(10)))
+        self.assertEqual([m and m.num for m in run(AsyncTestModel.aget_many([instances[3].id, 'missing']))], [3, None])
+
+        results = AsyncTestModel.ascan(page_size=3)
+        nums = []
+        while True:
+            try:
+                nums.append(run(results.__anext__()).num)
+            except StopAsyncIteration:
+                break
+        self.assertEqual(sorted(nums), list(range(10)))
+
+        run(AsyncTestModel.adelete(id=instances[0].id))
+        self.assertEqual(run(AsyncTestModel.aget(id=instances[0].id)), None)
+        asyncio.set_event_loop(None)
+        loop.close()
+        AsyncTestModel.table.delete()
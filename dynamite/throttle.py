@@ -0,0 +1,239 @@
+"""
+Client-side rate limiting by consumed capacity
+
+Every table has a limiter with token buckets for reads and writes, filled with
+a fraction of provisioned capacity (from DescribeTable) per second and shared
+by all threads. On-demand tables are not limited.
+Requests wait while bucket is empty, consumed capacity of responses is taken
+from bucket after request. Rate is halved on throttling and restored gradually
+on successful requests (AIMD).
+"""
+import threading
+import time
+
+from botocore import exceptions as boto_exceptions
+from dynamite.config import dynamite_options
+
+if 'enabled' not in dynamite_options.THROTTLE:
+    dynamite_options.THROTTLE.enabled = False
+# fraction of provisioned capacity
+if 'target' not in dynamite_options.THROTTLE:
+    dynamite_options.THROTTLE.target = 0.8
+
+READ = 'read'
+WRITE = 'write'
+
+OPERATIONS = {
+    'get_item': READ,
+    'query': READ,
+    'scan': READ,
+    'batch_get_item': READ,
+    'put_item': WRITE,
+    'update_item': WRITE,
+    'delete_item': WRITE,
+    'batch_write_item': WRITE,
+    'transact_write_items': WRITE,
+}
+
+THROTTLE_ERRORS = frozenset([
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+])
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket with adaptive rate"""
+
+    def __init__(self, rate, burst=None, min_rate=None, decrease=0.5, increase=0.02,
+                 clock=time.time, sleep=time.sleep):
+        """
+        :param rate: max tokens per second
+        :param burst: max tokens in bucket, rate by default
+        :param min_rate: rate is not decreased below, 5% of rate by default
+        :param decrease: rate multiplier on throttling
+        :param increase: fraction of max rate restored on every success
+        :param clock: for tests
+        :param sleep: for tests
+        """
+        if rate <= 0:
+            raise ValueError('Rate of bucket must be positive: {}'.format(rate))
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.min_rate = float(min_rate or rate * 0.05)
+        self.decrease = decrease
+        self.increase = increase
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated = clock()
+        self.waited = 0.0
+        self.throttles = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self):
+        """
+        Wait while bucket is in debt
+
+        :return: seconds of waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 0:
+                    self.waited += waited
+                    return waited
+                delay = -self.tokens / self.rate
+            self.sleep(delay)
+            waited += delay
+
+    def consume(self, units):
+        """Take consumed capacity, bucket may go below zero"""
+        with self._lock:
+            self._refill()
+            self.tokens -= units
+
+    def success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.increase)
+
+    def throttled(self):
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class CapacityLimiter(object):
+    """Read and write buckets of one table"""
+
+    def __init__(self, read_rate, write_rate, **options):
+        """
+        :param read_rate: RCU per second
+        :param write_rate: WCU per second
+        :param options: for TokenBucket
+        """
+        self.buckets = {
+            READ: TokenBucket(read_rate, **options),
+            WRITE: TokenBucket(write_rate, **options),
+        }
+
+    def get_bucket(self, operation):
+        kind = OPERATIONS.get(operation)
+        if kind is None:
+            return None
+        return self.buckets[kind]
+
+    def before(self, operation, params):
+        """
+        Wait for capacity and ask for consumed capacity
+
+        :return: params of request
+        """
+        bucket = self.get_bucket(operation)
+        if bucket is None:
+            return params
+        bucket.wait()
+        params = dict(params)
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        return params
+
+    def after(self, operation, response, table_name=None):
+        """Take consumed capacity of response, throttled if boto3 retried or items are unprocessed"""
+        bucket = self.get_bucket(operation)
+        if bucket is None:
+            return
+        bucket.consume(get_consumed_units(response, table_name))
+        retried = response.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        if retried or response.get('UnprocessedItems') or response.get('UnprocessedKeys'):
+            bucket.throttled()
+        else:
+            bucket.success()
+
+    def error(self, operation, code):
+        bucket = self.get_bucket(operation)
+        if bucket is not None and code in THROTTLE_ERRORS:
+            bucket.throttled()
+
+    def stats(self):
+        return {
+            kind: {
+                'rate': bucket.rate,
+                'max_rate': bucket.max_rate,
+                'waited': bucket.waited,
+                'throttles': bucket.throttles,
+            }
+            for kind, bucket in self.buckets.items()
+        }
+
+
+def get_consumed_units(response, table_name=None):
+    """
+    :param table_name: count only this table in responses of batch operations
+    :return: CapacityUnits of response
+    """
+    consumed = response.get('ConsumedCapacity')
+    if not consumed:
+        return 0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(float(capacity.get('CapacityUnits', 0)) for capacity in consumed
+               if table_name is None or capacity.get('TableName') in (None, table_name))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_table_capacity(table):
+    """
+    Provisioned capacity of table from cached DescribeTable,
+    declared capacity if table does not exist yet
+
+    :return: (RCU, WCU) or None for on-demand table
+    """
+    try:
+        description = table.describe()
+    except boto_exceptions.ClientError as e:
+        if e.response['Error']['Code'] != u'ResourceNotFoundException':
+            raise e
+        return table.read_capacity_units, table.write_capacity_units
+    if description.get('BillingModeSummary', {}).get('BillingMode') == 'PAY_PER_REQUEST':
+        return None
+    throughput = description.get('ProvisionedThroughput', {})
+    return throughput.get('ReadCapacityUnits', 0), throughput.get('WriteCapacityUnits', 0)
+
+
+def get_limiter(table, limiter=None):
+    """
+    Limiter of table, shared by all Table objects of the same name
+
+    :param table: dynamite.tables.Table
+    :param limiter: CapacityLimiter, True for limiter by dynamite_options.THROTTLE,
+        None for limiter only if dynamite_options.THROTTLE.enabled
+    :return: CapacityLimiter or None, None for on-demand tables too
+    """
+    if isinstance(limiter, CapacityLimiter):
+        return limiter
+    if limiter is None:
+        limiter = dynamite_options.THROTTLE.enabled
+    if not limiter:
+        return None
+    with _limiters_lock:
+        if table.name in _limiters:
+            return _limiters[table.name]
+    capacity = get_table_capacity(table)
+    if capacity is None or not all(capacity):
+        return None
+    target = dynamite_options.THROTTLE.target
+    with _limiters_lock:
+        if table.name not in _limiters:
+            _limiters[table.name] = CapacityLimiter(capacity[0] * target, capacity[1] * target)
+        return _limiters[table.name]
@@ -1,3 +1,11 @@
+import random
+
+
 class ClassProperty(property):
     def __get__(self, cls, owner):
-        return self.fget.__get__(None, owner)()
\ No newline at end of file
+        return self.fget.__get__(None, owner)()
+
+
+def backoff_delay(attempt, base=0.05, cap=5.0):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -1,6 +1,5 @@
 import os
-from distutils.core import setup
-from setuptools import find_packages
+from setuptools import find_packages, setup
 
 __version__ = '0.8.2'
 
@@ -35,5 +34,11 @@ setup(
     description='Dynamite ORM',
     url='https://github.com/viatoriche/dynamite',
     download_url='https://github.com/viatoriche/dynamite/tarball/{}'.format(version),
-    install_requires=['boto3', 'addict==1.0.0', 'six'],
+    install_requires=['boto3', 'addict==1.0.0', 'six', 'futures; python_version < "3"'],
+    extras_require={
+        'arrow': ['pyarrow', 'numpy'],
+    },
+    entry_points={
+        'console_scripts': ['dynamite = dynamite.cli:main'],
+    },
 )